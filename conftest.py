@@ -5,6 +5,195 @@ import pytest
 import allure
 from playwright.sync_api import Browser, BrowserContext, Page
 
+from utils.attachments import attach
+from utils.browser_server import BrowserServerLease, ensure_server
+from utils.memory_probe import parse_thresholds
+from utils.page_events import PageEventCollector
+from utils.responsive import DEFAULT_BREAKPOINTS, parse_breakpoints
+from utils.throttling import apply_cdp_throttling, get_profile, start_proxy
+
+pytest_plugins = [
+    "plugins.history",
+    "plugins.scheduler",
+    "plugins.flaky",
+    "plugins.allure_writer",
+    "plugins.load_metrics",
+    "plugins.interaction_metrics",
+    "plugins.js_coverage",
+    "plugins.page_errors",
+    "plugins.fast_tier",
+    "plugins.result_cache",
+    "plugins.scroll_metrics",
+    "plugins.distributed",
+]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--reuse-browser-server",
+        action="store_true",
+        default=False,
+        help="Подключаться к долгоживущему локальному серверу браузера вместо запуска браузера в каждом прогоне",
+    )
+    parser.addoption(
+        "--browser-server-nodes",
+        action="append",
+        default=[],
+        help="Распределить тесты по удаленным серверам браузеров: '<браузер>=ws://<хост>:<порт>/<путь>' через запятую",
+    )
+    parser.addini(
+        "browser_server_idle_timeout",
+        "Через сколько секунд простоя сервер браузера завершается (--reuse-browser-server)",
+        default="900",
+    )
+    parser.addini(
+        "responsive_breakpoints",
+        "Брейкпоинты для проверки адаптивности, по одному на строку: '<ширина>x<высота> <название>'",
+        type="linelist",
+        default=DEFAULT_BREAKPOINTS,
+    )
+    parser.addini(
+        "memory_cycles",
+        "Количество циклов генерации превью при проверке роста памяти",
+        default="5",
+    )
+    parser.addini(
+        "memory_growth_thresholds",
+        "Допустимый прирост за цикл: js_heap_kb, dom_nodes, listeners, detached_nodes ('<метрика>:<порог>')",
+        type="linelist",
+        default=["js_heap_kb:512", "dom_nodes:50", "listeners:20", "detached_nodes:20"],
+    )
+    parser.addini(
+        "interaction_p75_budget_ms",
+        "Допустимая задержка взаимодействия (p75, от ввода до следующей отрисовки), мс",
+        default="200",
+    )
+    parser.addini(
+        "main_thread_blocking_budget_ms",
+        "Допустимое время блокировки главного потока (сумма длинных задач сверх 50 мс) при генерации превью",
+        default="300",
+    )
+    parser.addini(
+        "scroll_p95_frame_budget_ms",
+        "Допустимая длительность кадра при прокрутке превью (p95), мс",
+        default="50",
+    )
+    parser.addini(
+        "resource_budgets",
+        "Бюджеты переданных данных в КБ по типам ресурсов и на всю страницу ('<тип>:<КБ>', тип total - сумма)",
+        type="linelist",
+        default=[],
+    )
+    parser.addini(
+        "min_cache_lifetime",
+        "Минимальный срок кэширования статических ресурсов (скрипты, стили, изображения, шрифты), секунды",
+        default="3600",
+    )
+    parser.addini(
+        "input_stress_intervals_ms",
+        "Интервалы между действиями в стресс-режиме ввода, мс, через пробел",
+        default="50 250",
+    )
+    parser.addini(
+        "scaling_event_counts",
+        "Количество событий в превью для проверки масштабируемости, через пробел",
+        default="10 100 1000 10000",
+    )
+    parser.addini(
+        "scaling_max_exponent",
+        "Допустимый показатель степени роста (время отрисовки, DOM, память ~ количество^k)",
+        default="1.2",
+    )
+    parser.addini(
+        "http_smoke_endpoints",
+        "Эндпоинты для быстрых HTTP-проверок, пути относительно base_url, по одному на строку",
+        type="linelist",
+        default=[],
+    )
+
+
+@pytest.fixture(scope="session")
+def connect_options(pytestconfig, browser_name, browser_type_launch_args):
+    """Подключение pytest-playwright к серверу браузера: узел распределенного прогона или --reuse-browser-server"""
+    node_endpoint = pytestconfig.getoption("browser_node_endpoint")
+    if node_endpoint:
+        yield {"ws_endpoint": node_endpoint}
+        return
+    if not pytestconfig.getoption("reuse_browser_server"):
+        yield None
+        return
+    ws_endpoint = ensure_server(
+        browser_name,
+        headless=browser_type_launch_args.get("headless", True),
+        idle_timeout=int(pytestconfig.getini("browser_server_idle_timeout")),
+    )
+    lease = BrowserServerLease(browser_name).acquire()
+    yield {"ws_endpoint": ws_endpoint}
+    lease.release()
+
+
+@pytest.fixture(scope="session")
+def responsive_breakpoints(pytestconfig) -> list[dict]:
+    """Брейкпоинты адаптивности из pytest.ini"""
+    return parse_breakpoints(pytestconfig.getini("responsive_breakpoints"))
+
+
+@pytest.fixture(scope="session")
+def memory_settings(pytestconfig) -> dict:
+    """Количество циклов и пороги роста памяти из pytest.ini"""
+    return {
+        "cycles": int(pytestconfig.getini("memory_cycles")),
+        "thresholds": parse_thresholds(pytestconfig.getini("memory_growth_thresholds")),
+    }
+
+
+@pytest.fixture(scope="session")
+def interaction_budget_ms(pytestconfig) -> float:
+    """Бюджет p75 задержки взаимодействия из pytest.ini"""
+    return float(pytestconfig.getini("interaction_p75_budget_ms"))
+
+
+@pytest.fixture(scope="session")
+def blocking_budget_ms(pytestconfig) -> float:
+    """Бюджет блокировки главного потока из pytest.ini"""
+    return float(pytestconfig.getini("main_thread_blocking_budget_ms"))
+
+
+@pytest.fixture(scope="session")
+def scroll_frame_budget_ms(pytestconfig) -> float:
+    """Бюджет p95 длительности кадра при прокрутке из pytest.ini"""
+    return float(pytestconfig.getini("scroll_p95_frame_budget_ms"))
+
+
+@pytest.fixture(scope="session")
+def resource_budgets(pytestconfig) -> dict:
+    """Бюджеты объема загрузки (КБ) и минимальный срок кэширования из pytest.ini"""
+    return {
+        "budgets_kb": parse_thresholds(pytestconfig.getini("resource_budgets")),
+        "min_cache_lifetime": int(pytestconfig.getini("min_cache_lifetime")),
+    }
+
+
+@pytest.fixture(scope="session")
+def input_stress_intervals(pytestconfig) -> list[int]:
+    """Интервалы между действиями стресс-режима ввода из pytest.ini"""
+    return [int(interval) for interval in pytestconfig.getini("input_stress_intervals_ms").split()]
+
+
+@pytest.fixture(scope="session")
+def scaling_settings(pytestconfig) -> dict:
+    """Размеры списка событий и допустимый показатель роста из pytest.ini"""
+    return {
+        "sizes": [int(size) for size in pytestconfig.getini("scaling_event_counts").split()],
+        "max_exponent": float(pytestconfig.getini("scaling_max_exponent")),
+    }
+
+
+@pytest.fixture(scope="session")
+def layout_snapshot_dir(pytestconfig):
+    """Каталог снимков раскладки прошлых прогонов (в .pytest_cache)"""
+    return pytestconfig.cache.mkdir("layout_snapshots")
+
 
 @pytest.fixture(scope="session")
 def browser_context_args(browser_context_args, browser_name):
@@ -33,7 +222,28 @@ def browser_context_args(browser_context_args, browser_name):
 
 
 @pytest.fixture(scope="function")
-def context(browser: Browser, browser_name):
+def throttling_profile(request):
+    """Профиль замедления из маркера @pytest.mark.throttling("<профиль>") или None"""
+    marker = request.node.get_closest_marker("throttling")
+    if marker is None:
+        return None
+    return get_profile(marker.args[0])
+
+
+@pytest.fixture(scope="function")
+def throttling_proxy(throttling_profile, browser_name):
+    """Замедляющий прокси для браузеров без CDP"""
+    if throttling_profile is None or browser_name == "chromium":
+        yield None
+        return
+    proxy = start_proxy(throttling_profile)
+    yield proxy
+    if proxy is not None:
+        proxy.stop()
+
+
+@pytest.fixture(scope="function")
+def context(browser: Browser, browser_name, throttling_proxy):
     """Создание нового контекста для каждого теста"""
     context_args = {
         "viewport": {"width": 1920, "height": 1080},
@@ -47,18 +257,27 @@ def context(browser: Browser, browser_name):
     elif browser_name == "webkit":
         context_args["user_agent"] = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15"
     
+    if throttling_proxy is not None:
+        context_args["proxy"] = {"server": throttling_proxy.server_url}
+    
     context = browser.new_context(**context_args)
     yield context
     context.close()
 
 
 @pytest.fixture(scope="function")
-def page(context: BrowserContext, request, browser_name):
+def page(context: BrowserContext, request, browser_name, throttling_profile):
     """Создание новой страницы для каждого теста"""
     page = context.new_page()
+    # Консоль, ошибки JS, упавшие и медленные запросы в кольцевых буферах
+    events = PageEventCollector(page).start()
+    
+    # В Chromium профиль замедления применяется через CDP, сессия живет вместе со страницей
+    if throttling_profile is not None and browser_name == "chromium":
+        apply_cdp_throttling(page, throttling_profile)
     
     # Добавляем информацию о браузере в Allure
-    allure.attach(
+    attach(
         browser_name.upper(),
         name="Браузер",
         attachment_type=allure.attachment_type.TEXT
@@ -70,7 +289,7 @@ def page(context: BrowserContext, request, browser_name):
     if hasattr(request.node, 'rep_call') and request.node.rep_call.failed:
         try:
             screenshot = page.screenshot()
-            allure.attach(
+            attach(
                 screenshot,
                 name=f"screenshot_{browser_name}_{request.node.name}",
                 attachment_type=allure.attachment_type.PNG
@@ -78,6 +297,21 @@ def page(context: BrowserContext, request, browser_name):
         except Exception:
             pass
     
+    # Журнал страницы нужен только для разбора падения
+    failed = any(getattr(getattr(request.node, f"rep_{when}", None), "failed", False) for when in ("setup", "call"))
+    if failed:
+        log = events.dump()
+        for key, name in (("errors", "Ошибки JS"), ("console", "Консоль"),
+                          ("failed_requests", "Упавшие запросы"), ("slow_requests", "Медленные запросы")):
+            if log[key]:
+                attach({"seen": log["seen"][key], "kept": len(log[key]), "events": log[key]},
+                       name=f"{name} ({browser_name})",
+                       attachment_type=allure.attachment_type.JSON)
+    signatures = events.error_signatures()
+    if signatures:
+        request.node.user_properties.append(("page_errors", {"browser": browser_name, "signatures": signatures}))
+    events.stop()
+    
     page.close()
 
 
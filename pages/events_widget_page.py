@@ -4,13 +4,27 @@ Page Object Model для страницы Events Widget
 import re
 from playwright.sync_api import Page, expect
 
+from utils.interaction_latency import InteractionLatencyMeter
+from utils.layout_shift import LayoutShiftRecorder
+from utils.layout_snapshot import take_layout_snapshot
+from utils.main_thread_profiler import MainThreadProfiler
+from utils.request_capture import RESOURCE_TIMINGS_JS, RequestCapture
+from utils.responsive import ResponsiveChecker
+from utils.scroll_probe import probe_scroll
+
 
 class EventsWidgetPage:
     """Класс для взаимодействия со страницей Events Widget"""
     
-    def __init__(self, page: Page):
+    def __init__(self, page: Page, base_url: str = None, settle_ms: int = 1000):
         self.page = page
+        # Пауза после выбора в селекторе и очистки (после генерации превью - вдвое дольше);
+        # стресс-режим ввода (utils.input_stress) уменьшает ее, чтобы действия шли подряд
+        self.settle_ms = settle_ms
         self.url = "https://dev.3snet.info/eventswidget/"
+        # Другой стенд (например, локальная замена utils.stand_in_server) задается через --base-url
+        if base_url:
+            self.url = f"{base_url.rstrip('/')}/eventswidget/"
         
         # Локаторы основных элементов
         self.widget_container = page.locator('[class*="widget"], [class*="events"], [id*="widget"], [id*="events"]').first
@@ -42,6 +56,9 @@ class EventsWidgetPage:
         self.overlapping_elements = page.locator('[style*="position: absolute"], [style*="z-index"]')
         self.text_elements = page.locator('span, div, p, label').filter(has_text=re.compile(r'\w+'))
         
+        # Задержка взаимодействий с элементами управления (от ввода до следующей отрисовки)
+        self.interaction_latency = InteractionLatencyMeter(page)
+        
     def navigate(self):
         """Переход на страницу"""
         try:
@@ -120,13 +137,17 @@ class EventsWidgetPage:
         """Проверка адаптивности на заданном разрешении"""
         try:
             self.page.set_viewport_size({"width": width, "height": height})
-            self.page.wait_for_timeout(1000)
+            ResponsiveChecker(self.page).wait_for_layout_settle()
             body = self.page.locator("body")
             expect(body).to_be_visible()
             return True
         except Exception:
             return False
             
+    def check_responsive(self, breakpoints: list[dict]) -> list[dict]:
+        """Проверка адаптивности на списке брейкпоинтов без перезагрузки страницы"""
+        return ResponsiveChecker(self.page).check(breakpoints)
+            
     def has_interactive_elements(self) -> bool:
         """Проверка наличия интерактивных элементов"""
         try:
@@ -143,6 +164,69 @@ class EventsWidgetPage:
         except Exception:
             return ""
             
+    def get_navigation_timing(self) -> dict:
+        """Метрики загрузки из Navigation Timing и Paint Timing (мс от начала навигации)"""
+        try:
+            return self.page.evaluate(
+                """() => {
+                    const nav = performance.getEntriesByType('navigation')[0];
+                    const paint = performance.getEntriesByName('first-contentful-paint')[0];
+                    if (!nav) return {};
+                    return {
+                        ttfb_ms: nav.responseStart,
+                        dom_content_loaded_ms: nav.domContentLoadedEventEnd,
+                        load_ms: nav.loadEventEnd,
+                        fcp_ms: paint ? paint.startTime : null,
+                        transfer_size: nav.transferSize,
+                    };
+                }"""
+            )
+        except Exception:
+            return {}
+
+    def get_resource_timings(self) -> list[dict]:
+        """Записи Resource Timing загруженных ресурсов (размеры в байтах, время в мс)"""
+        try:
+            return self.page.evaluate(RESOURCE_TIMINGS_JS)
+        except Exception:
+            return []
+
+    def start_request_capture(self):
+        """Начало записи запросов страницы (вызывается до navigate)"""
+        self._request_capture = RequestCapture(self.page).start()
+
+    def stop_request_capture(self) -> dict:
+        """Остановка записи: запросы с фазами и инициаторами, FCP и первая отрисовка виджета"""
+        capture = getattr(self, "_request_capture", None)
+        if capture is None:
+            return {"requests": [], "marks": {}}
+        self._request_capture = None
+        return capture.stop()
+
+    def profile_action(self, name: str):
+        """Профилирование главного потока во время действия:
+
+            with events_page.profile_action("generate_preview") as profile:
+                events_page.click_generate_preview()
+        """
+        return MainThreadProfiler(self.page).profile(name)
+
+    def trace_layout(self, name: str):
+        """Сдвиги раскладки, смещенные элементы и перекомпоновки по кадрам за одно действие:
+
+            with events_page.trace_layout("clear_country") as layout:
+                events_page.click_clear_country()
+        """
+        return LayoutShiftRecorder(self.page).record(name)
+
+    def probe_scroll(self, steps: int = 5) -> dict:
+        """Плавная прокрутка превью (или страницы) до конца: интервалы кадров, пропущенные кадры, длинные задачи"""
+        return probe_scroll(self.page, selector='[class*="preview"]', steps=steps)
+
+    def take_layout_snapshot(self) -> dict | None:
+        """Компактный снимок раскладки: пути, рамки, шрифты и видимость элементов (utils.layout_snapshot)"""
+        return take_layout_snapshot(self.page)
+
     def wait_for_content_load(self, timeout: int = 5000):
         """Ожидание загрузки контента"""
         try:
@@ -161,15 +245,34 @@ class EventsWidgetPage:
     def click_generate_preview(self):
         """Клик по кнопке 'Сгенерировать превью'"""
         try:
+            self.interaction_latency.begin()
             self.generate_preview_button.click()
-            self.page.wait_for_timeout(2000)  # Ждем загрузки превью
+            self.page.wait_for_timeout(2 * self.settle_ms)  # Ждем загрузки превью
+            self.interaction_latency.end("generate_preview")
         except Exception:
             pass
             
+    def get_widget_code(self) -> str:
+        """Код виджета для вставки на сайт (iframe или script) после генерации превью; пустая строка, если его нет"""
+        try:
+            return self.page.evaluate(
+                """() => {
+                    const fields = document.querySelectorAll('textarea, input[type="text"], pre, code');
+                    for (const field of fields) {
+                        const value = ('value' in field ? field.value : field.textContent) || '';
+                        if (/<(iframe|script)[\\s>]/i.test(value)) return value.trim();
+                    }
+                    return '';
+                }"""
+            )
+        except Exception:
+            return ""
+            
     def select_theme(self, theme_text: str = None):
         """Выбор тематики"""
         try:
             if self.theme_selector.count() > 0:
+                self.interaction_latency.begin()
                 if theme_text:
                     self.theme_selector.select_option(label=theme_text)
                 else:
@@ -179,7 +282,8 @@ class EventsWidgetPage:
                         first_option = options.nth(1).get_attribute('value')
                         if first_option:
                             self.theme_selector.select_option(value=first_option)
-                self.page.wait_for_timeout(1000)
+                self.page.wait_for_timeout(self.settle_ms)
+                self.interaction_latency.end("theme_selector")
         except Exception:
             pass
             
@@ -187,6 +291,7 @@ class EventsWidgetPage:
         """Выбор страны"""
         try:
             if self.country_selector.count() > 0:
+                self.interaction_latency.begin()
                 if country_text:
                     self.country_selector.select_option(label=country_text)
                 else:
@@ -196,7 +301,8 @@ class EventsWidgetPage:
                         first_option = options.nth(1).get_attribute('value')
                         if first_option:
                             self.country_selector.select_option(value=first_option)
-                self.page.wait_for_timeout(1000)
+                self.page.wait_for_timeout(self.settle_ms)
+                self.interaction_latency.end("country_selector")
         except Exception:
             pass
             
@@ -456,12 +562,14 @@ class EventsWidgetPage:
     def click_clear_country(self):
         """Клик по кнопке очистки страны"""
         try:
+            self.interaction_latency.begin()
             if self.clear_country_button.count() > 0:
                 self.clear_country_button.first.click()
             elif self.clear_buttons.count() > 0:
                 # Если специфичная кнопка не найдена, пробуем общую кнопку очистки
                 self.clear_buttons.first.click()
-            self.page.wait_for_timeout(1000)  # Ждем применения изменений
+            self.page.wait_for_timeout(self.settle_ms)  # Ждем применения изменений
+            self.interaction_latency.end("clear_country")
         except Exception:
             pass
             
@@ -0,0 +1,65 @@
+"""
+Подмена файлового логгера Allure на асинхронный (запись вложений в фоновом потоке)
+"""
+import os
+
+import pytest
+import allure_commons
+from allure_commons.logger import AllureFileLogger
+
+from utils.attachments import AsyncAllureFileLogger
+
+writer_key = pytest.StashKey[AsyncAllureFileLogger]()
+
+
+def pytest_addoption(parser):
+    parser.getgroup("allure").addoption(
+        "--allure-sync-writer",
+        action="store_true",
+        default=False,
+        help="Писать файлы Allure синхронно из потока теста (как в allure-pytest по умолчанию)",
+    )
+
+
+def _find_file_logger():
+    for plugin in allure_commons.plugin_manager.get_plugins():
+        if type(plugin) is AllureFileLogger:
+            return plugin
+    return None
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    report_dir = getattr(config.option, "allure_report_dir", None)
+    if not report_dir or config.getoption("allure_sync_writer"):
+        return
+
+    original = _find_file_logger()
+    if original is None:
+        return
+
+    # Каталог уже подготовлен (и при --clean-alluredir очищен) оригинальным логгером;
+    # абсолютный путь не зависит от текущего каталога потока записи
+    writer = AsyncAllureFileLogger(os.path.abspath(report_dir), clean=False)
+    config.stash[writer_key] = writer
+    allure_commons.plugin_manager.unregister(original)
+    allure_commons.plugin_manager.register(writer)
+
+    def restore():
+        errors = writer.close()
+        allure_commons.plugin_manager.unregister(writer)
+        # allure-pytest при завершении снимает с регистрации свой логгер - возвращаем его
+        allure_commons.plugin_manager.register(original)
+        if errors:
+            config.get_terminal_writer().line(f"allure-writer: ошибки записи ({len(errors)}): {errors[0]}", red=True)
+
+    # Очистка выполняется в обратном порядке, поэтому restore отработает раньше очистки allure-pytest
+    config.add_cleanup(restore)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session):
+    # К концу сессии файлы тестов уже на диске: их видят плагины, читающие каталог Allure
+    writer = session.config.stash.get(writer_key, None)
+    if writer is not None:
+        writer.flush()
@@ -0,0 +1,395 @@
+"""
+Распределенный прогон по нескольким удаленным серверам браузеров
+
+С --browser-server-nodes pytest не выполняет тесты сам, а:
+- раскладывает тесты по узлам с учетом длительностей из истории (pack_into_workers):
+  тесты браузера идут только на узлы этого браузера, тесты без браузера - на любые;
+- на каждый узел запускает дочерний pytest, подключенный к серверу узла
+  (connect_options в conftest.py), с теми же параметрами pytest-playwright, -o, -p
+  и тем же каталогом Allure;
+- по мере завершения тестов передает их отчеты (pytest_report_to_serializable)
+  в свои хуки, поэтому терминал, HTML-отчет, история и сводки плагинов общие;
+- если узел недоступен (упавший тест на узле, который больше не принимает
+  соединения, или дочерний процесс завершился, не закончив тесты), незавершенные
+  тесты узла раскладываются по оставшимся узлам того же браузера, не больше
+  --node-retries раз.
+
+Узлы - адреса playwright launch-server с именем браузера:
+    --browser-server-nodes chromium=ws://host-a:3000/abc,firefox=ws://host-b:3001/def
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+from _pytest.reports import TestReport
+
+from plugins.history import get_history
+from plugins.scheduler import estimate_duration, pack_into_workers
+from utils.browser_server import endpoint_reachable
+
+POLL_INTERVAL = 0.5
+ANY_BROWSER = "*"
+# Флаги запуска, которые передаются дочерним процессам как есть
+FORWARDED_FLAGS = ("force_run", "no_flaky_reruns", "no_quarantine", "js_coverage", "no_fast_gate",
+                   "allure_sync_writer")
+# Группы параметров, которые передаются дочерним процессам целиком (браузеры, устройство, трассировка...)
+FORWARDED_GROUPS = ("playwright",)
+LOG_TAIL_LINES = 20
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("distributed", "Распределенный прогон по серверам браузеров")
+    group.addoption(
+        "--node-retries",
+        action="store",
+        type=int,
+        default=2,
+        help="Сколько раз переносить тест на другой узел, если его узел недоступен",
+    )
+    # Внутренние параметры дочернего процесса
+    group.addoption("--browser-node-endpoint", action="store", default=None, help=argparse.SUPPRESS)
+    group.addoption("--browser-node-reports", action="store", default=None, help=argparse.SUPPRESS)
+
+
+def parse_nodes(values: list[str]) -> list[dict]:
+    """Узлы из значений --browser-server-nodes ('<браузер>=<ws-адрес>' через запятую)"""
+    nodes = []
+    for value in values:
+        for spec in filter(None, (part.strip() for part in value.split(","))):
+            browser, separator, ws_endpoint = spec.partition("=")
+            if not separator or not ws_endpoint.startswith("ws"):
+                raise pytest.UsageError(f"Узел '{spec}': ожидается '<браузер>=ws://<хост>:<порт>/<путь>'")
+            nodes.append({"name": f"{browser}@{ws_endpoint.split('//', 1)[-1].split('/', 1)[0]}",
+                          "browser": browser, "ws_endpoint": ws_endpoint})
+    return nodes
+
+
+def _group_args(config, group_name: str, skip: tuple = ()) -> list[str]:
+    """Параметры группы, заданные не по умолчанию, в виде аргументов командной строки"""
+    group = config._parser.getgroup(group_name)
+    args = []
+    for option in group.options:
+        if option.dest in skip:
+            continue
+        value = getattr(config.option, option.dest, None)
+        if value is None or value == option.default:
+            continue
+        flag = option.names()[-1]
+        if value is True:
+            args.append(flag)
+        elif isinstance(value, (list, tuple)):
+            for entry in value:
+                args += [flag, str(entry)]
+        elif value is not False:
+            args += [flag, str(value)]
+    return args
+
+
+def _browser(item) -> str:
+    callspec = getattr(item, "callspec", None)
+    return callspec.params.get("browser_name", ANY_BROWSER) if callspec else ANY_BROWSER
+
+
+class NodeReportWriter:
+    """Дочерний процесс: отчеты тестов построчно в JSON-файл, который читает координатор"""
+
+    def __init__(self, config, path: str):
+        self.config = config
+        self.file = open(path, "a", encoding="utf-8")
+
+    def pytest_runtest_logreport(self, report):
+        data = self.config.hook.pytest_report_to_serializable(config=self.config, report=report)
+        self.file.write(json.dumps(data) + "\n")
+        self.file.flush()
+
+    def pytest_unconfigure(self, config):
+        self.file.close()
+
+
+class Node:
+    """Узел: сервер браузера, очередь частей прогона и текущий дочерний процесс"""
+
+    def __init__(self, spec: dict):
+        self.name = spec["name"]
+        self.browser = spec["browser"]
+        self.ws_endpoint = spec["ws_endpoint"]
+        self.alive = True
+        self.queue = []
+        self.process = None
+        self.shard = None
+        self.reports_file = None
+        self.log_path = None
+        self.completed = set()
+        self.stats = {"shards": 0, "tests": 0, "seconds": 0.0, "lost_tests": 0}
+        self._started = None
+
+
+class DistributedRunner:
+    """Координатор: раскладка тестов, дочерние процессы, прием отчетов и перенос тестов"""
+
+    def __init__(self, config, nodes: list[dict]):
+        self.config = config
+        self.nodes = [Node(spec) for spec in nodes]
+        self.retries = config.getoption("node_retries")
+        self.workdir = None
+        self.items = {}
+        self.durations = {}
+        self.attempts = {}
+        # Отчеты теста копятся до teardown: незавершенный на потерянном узле тест не попадает в отчет
+        self.pending = {}
+        self.given_up = []
+
+    # Раскладка
+
+    def _candidates(self, browser: str) -> list[Node]:
+        return [node for node in self.nodes if node.alive and (browser == ANY_BROWSER or node.browser == browser)]
+
+    def _assign(self, nodeids: list[str]):
+        """Раскладка тестов по живым узлам подходящего браузера, длинные - в наименее загруженные"""
+        groups = {}
+        for nodeid in nodeids:
+            groups.setdefault(_browser(self.items[nodeid]), []).append(self.items[nodeid])
+        order = {nodeid: index for index, nodeid in enumerate(self.items)}
+        for browser, items in groups.items():
+            nodes = self._candidates(browser)
+            if not nodes:
+                for item in items:
+                    self._give_up(item.nodeid, f"нет доступных узлов для браузера {browser}")
+                continue
+            for node, shard in zip(nodes, pack_into_workers(items, self.durations, len(nodes))):
+                if shard:
+                    # Внутри части сохраняется порядок планировщика
+                    node.queue.append(sorted((item.nodeid for item in shard), key=order.get))
+
+    # Дочерние процессы
+
+    def _command(self, node: Node, args_path: str, output_dir: str) -> list[str]:
+        option = self.config.option
+        # addopts из pytest.ini не применяются: браузеры и остальные параметры передаются явно,
+        # иначе --browser из addopts и из командной строки задвоились бы
+        command = [sys.executable, "-m", "pytest", f"@{args_path}", "-q", "-o", "addopts=",
+                   "--browser-node-endpoint", node.ws_endpoint,
+                   "--browser-node-reports", node.reports_file]
+        for override in getattr(option, "override_ini", None) or []:
+            command += ["-o", override]
+        for plugin in getattr(option, "plugins", None) or []:
+            command += ["-p", plugin]
+        for group_name in FORWARDED_GROUPS:
+            command += _group_args(self.config, group_name, skip=("output",))
+        # pytest-playwright очищает --output в начале сессии, поэтому у каждого процесса свой каталог
+        command += ["--output", output_dir]
+        base_url = getattr(option, "base_url", None)
+        if base_url:
+            command += ["--base-url", base_url]
+        report_dir = getattr(option, "allure_report_dir", None)
+        if report_dir:
+            command += ["--alluredir", os.path.abspath(report_dir)]
+        for flag in FORWARDED_FLAGS:
+            if getattr(option, flag, False):
+                command.append("--" + flag.replace("_", "-"))
+        return command
+
+    def _start(self, node: Node):
+        shard = node.queue.pop(0)
+        index = node.stats["shards"]
+        prefix = os.path.join(self.workdir, f"{node.name.replace(':', '_').replace('@', '_')}-{index}")
+        args_path = prefix + ".args"
+        with open(args_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(shard) + "\n")
+        node.reports_file = prefix + ".jsonl"
+        node.log_path = prefix + ".log"
+        open(node.reports_file, "w").close()
+        node.shard = shard
+        node.completed = set()
+        node.stats["shards"] += 1
+        node._offset = 0
+        node._started = time.monotonic()
+        with open(node.log_path, "w", encoding="utf-8") as log:
+            output_dir = os.path.join(os.path.abspath(self.config.getoption("output", "test-results")),
+                                      os.path.basename(prefix))
+            node.process = subprocess.Popen(self._command(node, args_path, output_dir),
+                                            cwd=str(self.config.rootpath),
+                                            stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+
+    def _read_reports(self, node: Node):
+        with open(node.reports_file, encoding="utf-8") as file:
+            file.seek(node._offset)
+            while True:
+                line = file.readline()
+                # Строка без перевода строки еще дописывается
+                if not line.endswith("\n"):
+                    break
+                node._offset = file.tell()
+                report = self.config.hook.pytest_report_from_serializable(config=self.config, data=json.loads(line))
+                if report is None or report.nodeid not in self.items:
+                    continue
+                # Причина пропуска - кортеж (путь, строка, текст), JSON превращает его в список
+                if isinstance(report.longrepr, list):
+                    report.longrepr = tuple(report.longrepr)
+                self.pending.setdefault(report.nodeid, []).append(report)
+                if report.when == "teardown":
+                    self._complete(node, report.nodeid)
+                if not node.alive:
+                    break
+
+    def _complete(self, node: Node, nodeid: str):
+        reports = self.pending.pop(nodeid, [])
+        if any(report.failed for report in reports) and not endpoint_reachable(node.ws_endpoint):
+            # Тест упал, потому что пропал узел: процесс останавливается, тест переносится
+            self._lose(node)
+            return
+        node.completed.add(nodeid)
+        node.stats["tests"] += 1
+        self._forward(nodeid, reports)
+
+    def _forward(self, nodeid: str, reports: list):
+        item = self.items[nodeid]
+        hook = self.config.hook
+        hook.pytest_runtest_logstart(nodeid=nodeid, location=item.location)
+        for report in reports:
+            hook.pytest_runtest_logreport(report=report)
+        hook.pytest_runtest_logfinish(nodeid=nodeid, location=item.location)
+
+    def _lose(self, node: Node):
+        if node.alive:
+            node.alive = False
+            self._write_line(f"узел {node.name} недоступен, его тесты переносятся на другие узлы", red=True)
+        if node.process is not None and node.process.poll() is None:
+            node.process.kill()
+            node.process.wait()
+
+    def _finish_shard(self, node: Node):
+        self._read_reports(node)
+        returncode = node.process.returncode
+        node.stats["seconds"] += time.monotonic() - node._started
+        unfinished = [nodeid for nodeid in node.shard if nodeid not in node.completed]
+        if returncode == pytest.ExitCode.USAGE_ERROR:
+            # Аргументы, которые не принял один дочерний pytest, не примет ни один узел: тесты не переносятся
+            self._write_line(f"узел {node.name}: pytest не принял аргументы (код {returncode})", red=True)
+            self._write_log_tail(node)
+            node.process = None
+            node.shard = None
+            queued = [nodeid for other in self.nodes for shard in other.queue for nodeid in shard]
+            for other in self.nodes:
+                other.queue = []
+            for nodeid in unfinished + queued:
+                self.pending.pop(nodeid, None)
+                self._give_up(nodeid, f"дочерний pytest не принял аргументы (код {returncode})")
+            return
+        if unfinished and node.alive:
+            if not endpoint_reachable(node.ws_endpoint):
+                self._lose(node)
+            else:
+                self._write_line(f"узел {node.name}: pytest завершился с кодом {returncode}, "
+                                 f"не закончено тестов: {len(unfinished)}", red=True)
+                self._write_log_tail(node)
+        node.process = None
+        node.shard = None
+        if not unfinished:
+            return
+        node.stats["lost_tests"] += len(unfinished)
+        for nodeid in unfinished:
+            self.pending.pop(nodeid, None)
+        if not node.alive:
+            # Очередь потерянного узла раскладывается заново вместе с незаконченными тестами
+            unfinished += [nodeid for shard in node.queue for nodeid in shard]
+            node.queue = []
+        retry = []
+        for nodeid in unfinished:
+            self.attempts[nodeid] = self.attempts.get(nodeid, 0) + 1
+            if self.attempts[nodeid] > self.retries:
+                self._give_up(nodeid, f"узел {node.name} не закончил тест за {self.retries + 1} попыток")
+            else:
+                retry.append(nodeid)
+        if retry:
+            self._assign(retry)
+
+    def _give_up(self, nodeid: str, reason: str):
+        item = self.items[nodeid]
+        self.given_up.append(nodeid)
+        report = TestReport(nodeid=nodeid, location=item.location, keywords={name: 1 for name in item.keywords},
+                            outcome="failed", longrepr=f"Распределенный прогон: {reason}", when="call",
+                            user_properties=list(item.user_properties))
+        self._forward(nodeid, [report])
+
+    # Основной цикл
+
+    def _write_line(self, text: str, **markup):
+        terminal = self.config.pluginmanager.get_plugin("terminalreporter")
+        if terminal is not None:
+            terminal.write_line(f"browser-nodes: {text}", **markup)
+
+    def _write_log_tail(self, node: Node):
+        try:
+            with open(node.log_path, encoding="utf-8", errors="replace") as file:
+                lines = file.read().splitlines()[-LOG_TAIL_LINES:]
+        except OSError:
+            return
+        for line in lines:
+            self._write_line(f"  {line}")
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        if session.testsfailed and not session.config.option.continue_on_collection_errors:
+            raise session.Interrupted(f"{session.testsfailed} ошибок при сборе тестов")
+        if session.config.option.collectonly:
+            return True
+
+        self.items = {item.nodeid: item for item in session.items}
+        history = get_history(self.config)
+        self.durations = {nodeid: estimate_duration(item, history) for nodeid, item in self.items.items()}
+        for node in self.nodes:
+            if not endpoint_reachable(node.ws_endpoint):
+                node.alive = False
+                self._write_line(f"узел {node.name} недоступен до начала прогона", red=True)
+        self.workdir = tempfile.mkdtemp(prefix="browser-nodes-")
+        try:
+            self._assign(list(self.items))
+            while True:
+                for node in self.nodes:
+                    if node.process is None and node.alive and node.queue:
+                        self._start(node)
+                running = [node for node in self.nodes if node.process is not None]
+                if not running:
+                    break
+                for node in running:
+                    if node.alive:
+                        self._read_reports(node)
+                    if node.process.poll() is not None:
+                        self._finish_shard(node)
+                time.sleep(POLL_INTERVAL)
+        finally:
+            for node in self.nodes:
+                if node.process is not None and node.process.poll() is None:
+                    node.process.kill()
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        return True
+
+    def pytest_terminal_summary(self, terminalreporter):
+        terminalreporter.section("Узлы браузеров")
+        for node in self.nodes:
+            state = "работает" if node.alive else "потерян"
+            terminalreporter.write_line(
+                f"{node.name:<40}{state:<10} частей {node.stats['shards']:>3}  тестов {node.stats['tests']:>4}  "
+                f"{node.stats['seconds']:>7.1f} с  перенесено {node.stats['lost_tests']:>3}")
+        if self.given_up:
+            terminalreporter.write_line(f"Не выполнены ни на одном узле: {len(self.given_up)}", red=True)
+
+
+def pytest_configure(config):
+    reports_path = config.getoption("browser_node_reports")
+    if reports_path:
+        config.pluginmanager.register(NodeReportWriter(config, reports_path), "browser-node-report-writer")
+        return
+    nodes = parse_nodes(config.getoption("browser_server_nodes") or [])
+    if not nodes:
+        return
+    if getattr(config.option, "numprocesses", None):
+        raise pytest.UsageError("--browser-server-nodes нельзя совмещать с -n: узлы и есть воркеры")
+    config.pluginmanager.register(DistributedRunner(config, nodes), "browser-nodes-runner")
@@ -0,0 +1,111 @@
+"""
+Быстрый уровень проверок без браузера как ворота для тестов Playwright
+
+- тесты с маркером fast (tests/test_http_smoke.py) запускаются первыми;
+- если хотя бы один из них упал, остальные тесты пропускаются: стенд недоступен
+  или отдает не ту страницу, и прогон браузерных тестов ничего не добавит;
+- только быстрый уровень: pytest -m fast; отключить ворота: --no-fast-gate.
+
+Когда тесты выполняются в других процессах (xdist -n, --browser-server-nodes),
+основной процесс до запуска воркеров один раз выполняет быстрый уровень отдельным
+pytest и передает упавшие тесты воркерам через переменную окружения: каждый из них
+пропускает браузерные тесты, даже если сам не выполнил ни одного быстрого.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from plugins.history import normalize_nodeid
+
+FAST_MARKER = "fast"
+# Упавшие быстрые тесты (JSON-список) из предварительного прогона основного процесса
+FAILED_ENV = "EVENTS_WIDGET_FAST_TIER_FAILED"
+PREFLIGHT_TIMEOUT = 300
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("fast_tier", "Быстрый уровень проверок без браузера")
+    group.addoption(
+        "--no-fast-gate",
+        action="store_true",
+        default=False,
+        help="Запускать тесты Playwright даже при падении быстрых HTTP-проверок",
+    )
+
+
+class FastTierGate:
+    """Порядок тестов и пропуск браузерных тестов после падения быстрого уровня"""
+
+    def __init__(self, config, enabled: bool):
+        self.config = config
+        self.enabled = enabled
+        self.failed = json.loads(os.environ.get(FAILED_ENV) or "[]")
+
+    def _runs_elsewhere(self) -> bool:
+        """Тесты выполняют другие процессы: воркеры xdist или узлы распределенного прогона"""
+        option = self.config.option
+        return bool(getattr(option, "numprocesses", None) or getattr(option, "browser_server_nodes", None))
+
+    def _preflight(self) -> list[str]:
+        """Быстрый уровень отдельным pytest; node id упавших тестов"""
+        reports_path = os.path.join(tempfile.mkdtemp(prefix="fast-tier-"), "reports.jsonl")
+        # Без кэша: результаты не попадают в историю и не берутся из кэша результатов
+        command = [sys.executable, "-m", "pytest", "-q", "-m", FAST_MARKER, "-o", "addopts=",
+                   "-p", "no:xdist", "-p", "no:cacheprovider", "--no-quarantine", "--no-flaky-reruns",
+                   "--browser-node-reports", reports_path, str(self.config.rootpath / "tests")]
+        base_url = getattr(self.config.option, "base_url", None)
+        if base_url:
+            command += ["--base-url", base_url]
+        try:
+            subprocess.run(command, cwd=str(self.config.rootpath), stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=PREFLIGHT_TIMEOUT)
+            with open(reports_path, encoding="utf-8") as file:
+                reports = [json.loads(line) for line in file if line.strip()]
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            # Без предварительного прогона ворота остаются в пределах каждого процесса
+            return []
+        finally:
+            shutil.rmtree(os.path.dirname(reports_path), ignore_errors=True)
+        return sorted({report["nodeid"] for report in reports
+                       if report.get("outcome") == "failed" and report.get("when") in ("setup", "call")})
+
+    # Раньше запуска воркеров xdist (их pytest_sessionstart - trylast), чтобы они унаследовали окружение
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionstart(self, session):
+        option = self.config.option
+        if (not self.enabled or hasattr(self.config, "workerinput") or FAILED_ENV in os.environ
+                or option.collectonly or option.markexpr == FAST_MARKER or not self._runs_elsewhere()):
+            return
+        self.failed = self._preflight()
+        os.environ[FAILED_ENV] = json.dumps(self.failed)
+
+    # После планировщика (plugins.scheduler, trylast): устойчивая сортировка сохраняет его порядок внутри уровней
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collection_modifyitems(self, items):
+        yield
+        items.sort(key=lambda item: 0 if item.get_closest_marker(FAST_MARKER) else 1)
+
+    def pytest_runtest_logreport(self, report):
+        if (report.failed and report.when in ("setup", "call") and FAST_MARKER in report.keywords
+                and normalize_nodeid(report.nodeid) not in self.failed):
+            self.failed.append(normalize_nodeid(report.nodeid))
+
+    def pytest_runtest_setup(self, item):
+        if self.enabled and self.failed and not item.get_closest_marker(FAST_MARKER):
+            pytest.skip(f"Быстрые HTTP-проверки не прошли ({len(self.failed)}): {self.failed[0]}")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.enabled and self.failed:
+            terminalreporter.section("Быстрый уровень")
+            terminalreporter.write_line("Тесты Playwright пропущены: не прошли быстрые HTTP-проверки")
+            for nodeid in self.failed:
+                terminalreporter.write_line(f"  {nodeid}")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(FastTierGate(config, not config.getoption("no_fast_gate")), "fast-tier-gate")
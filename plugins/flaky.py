@@ -0,0 +1,223 @@
+"""
+Нестабильные тесты: оценка по истории, адаптивные перезапуски и карантин
+
+История результатов (plugins.history) ведется по node id, а он содержит браузер
+(test_page_loads[chromium]), поэтому каждая пара "тест + браузер" оценивается отдельно.
+
+- оценка нестабильности - доля смен результата (passed/failed/skipped) между соседними
+  прогонами: тест, который то проходит, то падает или пропускается по таймауту,
+  получает высокую оценку, стабильно пропускаемый - нулевую;
+- упавший тест с оценкой не ниже flaky_min_score перезапускается. Число перезапусков
+  адаптивное: первый успех подтверждает нестабильность; серия из k падений при
+  вероятности успеха p (по истории) объясняется случайностью с вероятностью (1-p)^k,
+  и перезапуски прекращаются, когда она ниже 1 - flaky_confidence (не больше
+  flaky_max_reruns). Стабильные тесты не перезапускаются и не маскируют регрессии;
+- тест с оценкой не ниже flaky_quarantine_score за flaky_min_runs и более прогонов
+  уходит в карантин: выполняется как xfail(strict=False) без перезапусков, попадает
+  в отдельный раздел отчета и в категорию Allure (categories.json).
+"""
+import json
+import math
+import os
+
+import allure
+import pytest
+from _pytest.runner import runtestprotocol
+
+from plugins.history import get_history, normalize_nodeid
+
+PROPERTY_NAME = "flaky"
+QUARANTINE_REASON = "Карантин: нестабильный тест"
+ALLURE_CATEGORIES = [
+    {
+        "name": "Карантин нестабильных тестов",
+        "matchedStatuses": ["skipped"],
+        # В сообщении Allure за причиной xfail идет текст исключения с переводами строк
+        "messageRegex": f"(?s).*{QUARANTINE_REASON}.*",
+    },
+]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("flaky", "Нестабильные тесты")
+    group.addoption(
+        "--no-flaky-reruns",
+        action="store_true",
+        default=False,
+        help="Не перезапускать упавшие нестабильные тесты",
+    )
+    group.addoption(
+        "--no-quarantine",
+        action="store_true",
+        default=False,
+        help="Не переводить нестабильные тесты в карантин (xfail)",
+    )
+    parser.addini("flaky_min_score", "Оценка нестабильности, с которой упавший тест перезапускается", default="0.1")
+    parser.addini("flaky_confidence", "Уверенность, что повторные падения не случайны", default="0.95")
+    parser.addini("flaky_max_reruns", "Наибольшее число перезапусков одного теста", default="3")
+    parser.addini("flaky_quarantine_score", "Оценка нестабильности для карантина", default="0.3")
+    parser.addini("flaky_min_runs", "Сколько прогонов в истории нужно для карантина", default="5")
+
+
+def flakiness_score(outcomes: list[str]) -> float:
+    """Доля смен результата между соседними прогонами"""
+    if len(outcomes) < 2:
+        return 0.0
+    flips = sum(1 for previous, current in zip(outcomes, outcomes[1:]) if previous != current)
+    return flips / (len(outcomes) - 1)
+
+
+def pass_probability(outcomes: list[str]) -> float:
+    """Вероятность успеха прогона по истории (со сглаживанием Лапласа)"""
+    return (outcomes.count("passed") + 1) / (len(outcomes) + 2)
+
+
+def reruns_needed(pass_rate: float, confidence: float, max_reruns: int) -> int:
+    """Сколько падений подряд нужно, чтобы счесть падение не случайным"""
+    if pass_rate <= 0:
+        return 0
+    if pass_rate >= 1:
+        return min(1, max_reruns)
+    return min(math.ceil(math.log(1 - confidence) / math.log(1 - pass_rate)), max_reruns)
+
+
+def _browser(item) -> str | None:
+    callspec = getattr(item, "callspec", None)
+    return callspec.params.get("browser_name") if callspec else None
+
+
+class FlakyTracker:
+    """Карантин при сборе, перезапуски при выполнении и сводка в конце прогона"""
+
+    def __init__(self, config):
+        self.config = config
+        self.reruns_enabled = not config.getoption("no_flaky_reruns")
+        self.quarantine_enabled = not config.getoption("no_quarantine")
+        self.min_score = float(config.getini("flaky_min_score"))
+        self.confidence = float(config.getini("flaky_confidence"))
+        self.max_reruns = int(config.getini("flaky_max_reruns"))
+        self.quarantine_score = float(config.getini("flaky_quarantine_score"))
+        self.min_runs = int(config.getini("flaky_min_runs"))
+        # Под xdist отчеты воркеров собираются в контроллере
+        self.results = {}
+
+    def _plan(self, item, history) -> dict:
+        outcomes = history.outcomes(item.nodeid)
+        score = flakiness_score(outcomes)
+        quarantined = self.quarantine_enabled and len(outcomes) >= self.min_runs and score >= self.quarantine_score
+        max_reruns = 0
+        if self.reruns_enabled and not quarantined and score >= self.min_score:
+            max_reruns = reruns_needed(pass_probability(outcomes), self.confidence, self.max_reruns)
+        return {"browser": _browser(item), "score": round(score, 2), "runs": len(outcomes),
+                "quarantined": quarantined, "max_reruns": max_reruns, "attempt": 1}
+
+    def pytest_collection_modifyitems(self, items):
+        history = get_history(self.config)
+        for item in items:
+            plan = self._plan(item, history)
+            if plan["quarantined"]:
+                item.add_marker(pytest.mark.xfail(
+                    reason=f"{QUARANTINE_REASON} (оценка {plan['score']}, прогонов {plan['runs']})", strict=False))
+            if plan["score"] > 0:
+                item.user_properties.append((PROPERTY_NAME, plan))
+
+    @staticmethod
+    def _set_attempt(item, properties: list, plan: dict, attempt: int):
+        # Свойства, добавленные прошлой попыткой (page_errors, метрики), не переходят в следующую
+        item.user_properties[:] = [prop for prop in properties if prop[0] != PROPERTY_NAME]
+        item.user_properties.append((PROPERTY_NAME, {**plan, "attempt": attempt}))
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        plan = dict(item.user_properties).get(PROPERTY_NAME)
+        if not plan or not plan["max_reruns"]:
+            return None
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        properties = list(item.user_properties)
+        attempt = 1
+        while True:
+            self._set_attempt(item, properties, plan, attempt)
+            reports = runtestprotocol(item, nextitem=nextitem, log=False)
+            failed = next((report for report in reports
+                           if report.failed and report.when in ("setup", "call")), None)
+            retry = failed is not None and attempt <= plan["max_reruns"]
+            if retry:
+                # Попытка не последняя: в отчетах она видна как RERUN, а не как падение;
+                # остальные ее отчеты (teardown с ошибками фикстур и длительностью) передаются как есть
+                failed.outcome = "rerun"
+            for report in reports:
+                item.ihook.pytest_runtest_logreport(report=report)
+            if not retry:
+                break
+            try:
+                allure.dynamic.tag("flaky-rerun")
+            except Exception:
+                pass
+            # Фикстуры уровня функции создаются заново для следующей попытки
+            item._initrequest()
+            attempt += 1
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    def pytest_report_teststatus(self, report):
+        if report.outcome == "rerun":
+            return "rerun", "R", ("RERUN", {"yellow": True})
+        return None
+
+    def pytest_runtest_logreport(self, report):
+        plan = dict(report.user_properties).get(PROPERTY_NAME)
+        if plan is None:
+            return
+        result = self.results.setdefault(normalize_nodeid(report.nodeid), {**plan, "reruns": 0, "outcome": "passed"})
+        if report.outcome == "rerun":
+            result["reruns"] += 1
+        elif report.failed:
+            result["outcome"] = "failed"
+        elif hasattr(report, "wasxfail"):
+            result["outcome"] = "xpassed" if report.passed else "xfailed"
+        elif report.skipped and result["outcome"] == "passed":
+            result["outcome"] = "skipped"
+
+    def pytest_terminal_summary(self, terminalreporter):
+        quarantined = {nodeid: result for nodeid, result in self.results.items() if result["quarantined"]}
+        rerun = {nodeid: result for nodeid, result in self.results.items() if result["reruns"]}
+        if not quarantined and not rerun:
+            return
+        terminalreporter.section("Нестабильные тесты")
+        if rerun:
+            terminalreporter.write_line("Перезапуски:")
+            for nodeid, result in sorted(rerun.items()):
+                verdict = "нестабилен, прошел" if result["outcome"] == "passed" else "падает стабильно"
+                terminalreporter.write_line(
+                    f"  {nodeid}: перезапусков {result['reruns']}, {verdict} (оценка {result['score']})")
+        if quarantined:
+            terminalreporter.write_line("Карантин (результат не влияет на прогон):")
+            by_browser = {}
+            for nodeid, result in quarantined.items():
+                by_browser.setdefault(result["browser"] or "-", []).append((nodeid, result))
+            for browser, entries in sorted(by_browser.items()):
+                terminalreporter.write_line(f"  {browser}:")
+                for nodeid, result in sorted(entries):
+                    terminalreporter.write_line(
+                        f"    {nodeid}: оценка {result['score']} за {result['runs']} прогонов, сейчас {result['outcome']}")
+
+    def pytest_sessionfinish(self, session):
+        report_dir = getattr(self.config.option, "allure_report_dir", None)
+        if not report_dir or hasattr(self.config, "workerinput") or not os.path.isdir(report_dir):
+            return
+        path = os.path.join(report_dir, "categories.json")
+        categories = []
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    categories = json.load(file)
+            except (OSError, ValueError):
+                categories = []
+        names = {category["name"] for category in ALLURE_CATEGORIES}
+        categories = [category for category in categories if category.get("name") not in names] + ALLURE_CATEGORIES
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(categories, file, ensure_ascii=False, indent=2)
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(FlakyTracker(config), "flaky-tracker")
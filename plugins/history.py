@@ -0,0 +1,116 @@
+"""
+История прогонов тестов: длительности и результаты по каждому тесту
+
+Тесты учитываются по node id без суффикса группы xdist: при --dist loadgroup
+воркеры переименовывают тест в '<node id>@<группа>', а группа (scheduler_N)
+меняется от прогона к прогону.
+"""
+import re
+
+import pytest
+
+HISTORY_KEY = "events_widget/history"
+MAX_SAMPLES = 20
+
+history_key = pytest.StashKey["RunHistory"]()
+
+# '@группа' в конце node id; '@' внутри параметров ('[a@b]') не затрагивается
+_XDIST_GROUP_SUFFIX = re.compile(r"@[^\[\]/:]*$")
+
+
+def normalize_nodeid(nodeid: str) -> str:
+    """Node id теста без суффикса группы xdist (--dist loadgroup)"""
+    return _XDIST_GROUP_SUFFIX.sub("", nodeid)
+
+
+class RunHistory:
+    """Хранилище истории прогонов в кэше pytest (.pytest_cache)"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.records = cache.get(HISTORY_KEY, {}) if cache is not None else {}
+        # Записи, сохраненные с суффиксом группы xdist, переносятся под обычный node id
+        for nodeid in [nodeid for nodeid in self.records if normalize_nodeid(nodeid) != nodeid]:
+            self.records.setdefault(normalize_nodeid(nodeid), self.records.pop(nodeid))
+        # Результаты текущего прогона копятся отдельно и сохраняются в конце сессии
+        self._current = {}
+
+    def record_report(self, report):
+        """Учет отчета одной фазы теста (setup/call/teardown)"""
+        entry = self._current.setdefault(normalize_nodeid(report.nodeid), {"duration": 0.0, "outcome": "passed"})
+        entry["duration"] += report.duration
+        # Попытка, после которой тест перезапущен (plugins.flaky), тоже считается падением
+        if report.failed or report.outcome == "rerun":
+            entry["outcome"] = "failed"
+        elif report.skipped and entry["outcome"] != "failed":
+            entry["outcome"] = "skipped"
+
+    def commit(self):
+        """Перенос результатов текущего прогона в историю и сохранение"""
+        for nodeid, entry in self._current.items():
+            record = self.records.setdefault(nodeid, {"durations": [], "outcomes": []})
+            # Пропущенные тесты не дают честной длительности
+            if entry["outcome"] != "skipped":
+                record["durations"] = (record["durations"] + [round(entry["duration"], 3)])[-MAX_SAMPLES:]
+            record["outcomes"] = (record["outcomes"] + [entry["outcome"]])[-MAX_SAMPLES:]
+        self._current = {}
+        if self.cache is not None:
+            self.cache.set(HISTORY_KEY, self.records)
+
+    def has_history(self, nodeid: str) -> bool:
+        """Проверка, запускался ли тест раньше"""
+        return normalize_nodeid(nodeid) in self.records
+
+    def duration(self, nodeid: str, default: float = None) -> float:
+        """Медианная длительность теста по истории"""
+        durations = sorted(self.records.get(normalize_nodeid(nodeid), {}).get("durations", []))
+        if not durations:
+            return default
+        return durations[len(durations) // 2]
+
+    def outcomes(self, nodeid: str) -> list[str]:
+        """Последние результаты теста, от старых к новым"""
+        return list(self.records.get(normalize_nodeid(nodeid), {}).get("outcomes", []))
+
+    def failure_rate(self, nodeid: str) -> float:
+        """Доля падений среди прогонов, завершившихся pass/fail"""
+        decisive = [o for o in self.outcomes(nodeid) if o != "skipped"]
+        if not decisive:
+            return 0.0
+        return decisive.count("failed") / len(decisive)
+
+    def last_failed(self, nodeid: str) -> bool:
+        """Упал ли тест в последнем прогоне"""
+        outcomes = self.outcomes(nodeid)
+        return bool(outcomes) and outcomes[-1] == "failed"
+
+
+def get_history(config) -> RunHistory:
+    """Получение истории прогонов текущей сессии"""
+    return config.stash[history_key]
+
+
+class HistoryRecorder:
+    """Плагин, записывающий результаты тестов в историю"""
+
+    def __init__(self, config, history: RunHistory):
+        self.config = config
+        self.history = history
+
+    def pytest_runtest_logreport(self, report):
+        # При запуске через xdist отчеты воркеров приходят сюда, в контроллер
+        # Результаты из кэша (plugins.result_cache) не дают новой длительности и исхода
+        cached = dict(report.user_properties).get("result_cache")
+        if report.when in ("setup", "call", "teardown") and not (cached and cached["reused"]):
+            self.history.record_report(report)
+
+    def pytest_sessionfinish(self, session):
+        # Воркеры xdist историю не сохраняют, это делает контроллер
+        if not hasattr(self.config, "workerinput"):
+            self.history.commit()
+
+
+def pytest_configure(config):
+    history = RunHistory(getattr(config, "cache", None))
+    config.stash[history_key] = history
+    config.pluginmanager.register(HistoryRecorder(config, history), "run-history-recorder")
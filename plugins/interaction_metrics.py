@@ -0,0 +1,46 @@
+"""
+Сводка задержки взаимодействий по элементам управления и браузерам
+
+Фикстура events_page после теста передает замеры EventsWidgetPage.interaction_latency
+через request.node.user_properties:
+    ("interaction_latency", {"control": ..., "browser": ..., "latency_ms": ..., "source": ...})
+Сводка считается по всем тестам прогона (в том числе при запуске через xdist).
+"""
+from utils.interaction_latency import summarize_latencies
+
+SUMMARY_COLUMNS = ("count", "p50", "p75", "p95", "max")
+
+
+class InteractionMetricsCollector:
+    """Сбор замеров задержки из отчетов тестов и вывод перцентилей"""
+
+    def __init__(self):
+        self.samples = []
+
+    def pytest_runtest_logreport(self, report):
+        # Замеры добавляются при завершении фикстуры, поэтому попадают в отчет teardown
+        if report.when != "teardown":
+            return
+        for name, value in report.user_properties:
+            if name == "interaction_latency":
+                self.samples.append(value)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.samples:
+            return
+        terminalreporter.section("Задержка взаимодействий (ввод -> отрисовка), мс")
+        header = f"{'элемент':<20}{'браузер':<10}" + "".join(f"{column:>9}" for column in SUMMARY_COLUMNS)
+        terminalreporter.write_line(header)
+        browsers = sorted({sample["browser"] for sample in self.samples})
+        for browser in browsers + ["все"]:
+            samples = [sample for sample in self.samples if browser == "все" or sample["browser"] == browser]
+            for control, stats in sorted(summarize_latencies(samples).items()):
+                line = f"{control:<20}{browser:<10}"
+                for column in SUMMARY_COLUMNS:
+                    value = stats[column]
+                    line += f"{value:>9.0f}" if value is not None else f"{'-':>9}"
+                terminalreporter.write_line(line)
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(InteractionMetricsCollector(), "interaction-metrics-collector")
@@ -0,0 +1,73 @@
+"""
+Режим покрытия JS и CSS (--js-coverage) и тренд между прогонами
+
+Тест test_js_css_coverage (только Chromium) выполняется лишь с --js-coverage и
+передает суммы через request.node.user_properties:
+    ("js_coverage", {"browser": ..., "totals": {"js": {...}, "css": {...}}})
+Суммы каждого прогона сохраняются в .pytest_cache (последние TREND_LENGTH), в сводке
+видно изменение неиспользованных байтов относительно прошлого прогона.
+"""
+import time
+
+TREND_KEY = "events_widget/js_coverage_trend"
+TREND_LENGTH = 30
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("js_coverage", "Покрытие JS и CSS страницы")
+    group.addoption(
+        "--js-coverage",
+        action="store_true",
+        default=False,
+        help="Снять покрытие JS и CSS страницы в сценарии загрузка -> выбор -> генерация превью (Chromium)",
+    )
+
+
+def _kb(value) -> str:
+    return f"{value / 1024:.1f}" if value is not None else "-"
+
+
+class CoverageTrend:
+    """Сбор сумм покрытия из отчетов и сохранение тренда"""
+
+    def __init__(self, config):
+        self.config = config
+        self.cache = getattr(config, "cache", None)
+        self.trend = self.cache.get(TREND_KEY, []) if self.cache is not None else []
+        self.current = None
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "call" or not report.passed:
+            return
+        for name, value in report.user_properties:
+            if name == "js_coverage":
+                self.current = value
+
+    def pytest_sessionfinish(self, session):
+        if self.current is None or self.cache is None or hasattr(self.config, "workerinput"):
+            return
+        self.cache.set(TREND_KEY, (self.trend + [{"at": time.time(), **self.current}])[-TREND_LENGTH:])
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.current is None:
+            return
+        previous = self.trend[-1] if self.trend else None
+        terminalreporter.section("Покрытие JS и CSS, КБ")
+        terminalreporter.write_line(f"{'':<6}{'всего':>10}{'исп.':>10}{'не исп.':>10}{'после ввода':>13}{'изм. не исп.':>14}")
+        for kind in ("js", "css"):
+            totals = self.current["totals"][kind]
+            line = f"{kind:<6}{_kb(totals['total_bytes']):>10}{_kb(totals['used_bytes']):>10}" \
+                   f"{_kb(totals['unused_bytes']):>10}{_kb(totals['interaction_only_bytes']):>13}"
+            if previous is not None:
+                delta = totals["unused_bytes"] - previous["totals"][kind]["unused_bytes"]
+                line += f"{delta / 1024:>+14.1f}"
+            else:
+                line += f"{'-':>14}"
+            terminalreporter.write_line(line)
+        if self.trend:
+            history = ", ".join(_kb(run["totals"]["js"]["unused_bytes"]) for run in self.trend[-5:])
+            terminalreporter.write_line(f"Неиспользованный JS в прошлых прогонах: {history}")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(CoverageTrend(config), "js-coverage-trend")
@@ -0,0 +1,57 @@
+"""
+Сводка метрик загрузки страницы по профилям замедления и браузерам
+
+Тесты передают метрики через request.node.user_properties:
+    ("load_metrics", {"profile": ..., "browser": ..., "load_s": ..., ...})
+Благодаря этому сводка собирается и при запуске через xdist.
+"""
+import statistics
+
+SUMMARY_COLUMNS = (
+    ("load_s", "загрузка, с"),
+    ("ttfb_ms", "TTFB, мс"),
+    ("fcp_ms", "FCP, мс"),
+    ("load_ms", "load event, мс"),
+)
+
+
+def _median(values: list):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+class LoadMetricsCollector:
+    """Сбор метрик загрузки из отчетов тестов и вывод сводной таблицы"""
+
+    def __init__(self):
+        self.collected = []
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "call":
+            return
+        for name, value in report.user_properties:
+            if name == "load_metrics":
+                self.collected.append(value)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.collected:
+            return
+        groups = {}
+        for metrics in self.collected:
+            key = (metrics.get("profile") or "none", metrics.get("browser", "?"))
+            groups.setdefault(key, []).append(metrics)
+
+        terminalreporter.section("Метрики загрузки по профилям замедления")
+        header = f"{'профиль':<12}{'браузер':<10}{'запусков':>9}"
+        header += "".join(f"{title:>16}" for _, title in SUMMARY_COLUMNS)
+        terminalreporter.write_line(header)
+        for (profile, browser), runs in sorted(groups.items()):
+            line = f"{profile:<12}{browser:<10}{len(runs):>9}"
+            for key, _ in SUMMARY_COLUMNS:
+                value = _median([run.get(key) for run in runs])
+                line += f"{value:>16.2f}" if value is not None else f"{'-':>16}"
+            terminalreporter.write_line(line)
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(LoadMetricsCollector(), "load-metrics-collector")
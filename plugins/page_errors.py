@@ -0,0 +1,47 @@
+"""
+Сводка ошибок страницы по всему прогону
+
+Фикстура page после теста передает сигнатуры ошибок (utils.page_events) через
+request.node.user_properties:
+    ("page_errors", {"browser": ..., "signatures": {сигнатура: {"count": ..., "sample": ...}}})
+Одна ошибка JS виджета, задевшая 20 тестов, выводится одной строкой с числом тестов
+и браузеров (в том числе при запуске через xdist).
+"""
+
+MAX_LISTED = 15
+
+
+class PageErrorsCollector:
+    """Сбор сигнатур ошибок из отчетов тестов и вывод сгруппированной сводки"""
+
+    def __init__(self):
+        self.signatures = {}
+
+    def pytest_runtest_logreport(self, report):
+        # Сигнатуры добавляются при завершении фикстуры, поэтому попадают в отчет teardown
+        if report.when != "teardown":
+            return
+        for name, value in report.user_properties:
+            if name != "page_errors":
+                continue
+            for signature, entry in value["signatures"].items():
+                issue = self.signatures.setdefault(
+                    signature, {"tests": set(), "browsers": set(), "count": 0, "sample": entry["sample"]})
+                issue["tests"].add(report.nodeid)
+                issue["browsers"].add(value["browser"])
+                issue["count"] += entry["count"]
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.signatures:
+            return
+        terminalreporter.section("Ошибки страницы (по сигнатурам)")
+        issues = sorted(self.signatures.items(), key=lambda item: (-len(item[1]["tests"]), -item[1]["count"]))
+        for signature, issue in issues[:MAX_LISTED]:
+            terminalreporter.write_line(
+                f"{len(issue['tests']):>4} тест. {issue['count']:>5} раз  [{', '.join(sorted(issue['browsers']))}]  {signature}")
+        if len(issues) > MAX_LISTED:
+            terminalreporter.write_line(f"... и еще {len(issues) - MAX_LISTED} сигнатур")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(PageErrorsCollector(), "page-errors-collector")
@@ -0,0 +1,209 @@
+"""
+Повторное использование результатов тестов, если не изменились ни код, ни страница
+
+Отпечаток теста складывается из:
+- исходника теста, фикстур и помощников его модуля (utils.test_impact);
+- методов EventsWidgetPage, которые тест вызывает сам или через помощники utils/
+  (с транзитивными вызовами), кода модуля объекта страницы вне методов и модулей
+  utils/, которыми они пользуются;
+- conftest.py, pytest.ini, requirements.txt и plugins/;
+- содержимого страницы и ее скриптов и стилей (быстрый HTTP-запрос, utils.http_smoke).
+
+Прошедший тест с тем же отпечатком в пределах result_cache_ttl_hours не выполняется:
+фикстуры не поднимаются, тело теста заменяется записью о переиспользовании, а отчет
+проходит обычным путем - в терминал, историю и Allure (с тегом result-cache).
+--force-run выполняет все тесты и обновляет кэш.
+
+Страница запрашивается один раз в основном процессе; воркеры xdist и дочерние
+процессы распределенного прогона получают отпечаток через переменную окружения.
+"""
+import hashlib
+import os
+import time
+
+import allure
+import pytest
+
+from plugins.history import normalize_nodeid
+from utils.attachments import attach
+from utils.http_smoke import page_fingerprint
+from utils.test_impact import (
+    GLOBAL_DIRS,
+    GLOBAL_FILES,
+    PAGE_MODULE_LEVEL,
+    PROJECT_ROOT,
+    analyze_fixtures,
+    analyze_page_object,
+    analyze_tests,
+    analyze_utils,
+    collect_dependencies,
+)
+
+CACHE_KEY = "events_widget/result_cache"
+PROPERTY_NAME = "result_cache"
+DEFAULT_PAGE_URL = "https://dev.3snet.info"
+# Отпечаток страницы от основного процесса; пустое значение - страница была недоступна
+PAGE_FINGERPRINT_ENV = "EVENTS_WIDGET_PAGE_FINGERPRINT"
+
+reused_count_key = pytest.StashKey[int]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("result_cache", "Повторное использование результатов тестов")
+    group.addoption(
+        "--force-run",
+        action="store_true",
+        default=False,
+        help="Выполнить все тесты, даже если их результат можно взять из кэша",
+    )
+    parser.addini(
+        "result_cache_ttl_hours",
+        "Сколько часов прошедший результат теста можно переиспользовать (0 - не переиспользовать)",
+        default="24",
+    )
+
+
+def _sha1(*parts: str) -> str:
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _file_hash(relative: str) -> str:
+    path = PROJECT_ROOT / relative
+    return hashlib.sha1(path.read_bytes()).hexdigest() if path.exists() else "-"
+
+
+def code_fingerprints() -> dict:
+    """Отпечатки кода тестов: 'tests/<файл>::<класс>::<тест>' -> хэш"""
+    tests = analyze_tests()
+    methods = analyze_page_object()
+    fixtures = analyze_fixtures()
+    utils = analyze_utils()
+    global_files = list(GLOBAL_FILES)
+    for directory in GLOBAL_DIRS:
+        global_files += sorted(path.relative_to(PROJECT_ROOT).as_posix()
+                               for path in (PROJECT_ROOT / directory).glob("*.py"))
+    global_hash = _sha1(*(f"{name}:{_file_hash(name)}" for name in global_files))
+
+    fingerprints = {}
+    for key, test in tests.items():
+        dependencies = collect_dependencies(test, methods, fixtures, utils)
+        # Объект страницы создается фикстурой, поэтому конструктор и код модуля нужны каждому тесту
+        page_methods = sorted(dependencies["page_methods"] | ({"__init__", PAGE_MODULE_LEVEL} & methods.keys()))
+        fingerprints[key] = _sha1(
+            global_hash,
+            test["hash"],
+            test["module_hash"],
+            *(f"{name}:{methods[name]['hash']}" for name in page_methods),
+            *(f"{module}:{_file_hash(module)}" for module in sorted(dependencies["modules"])),
+        )
+    return fingerprints
+
+
+class ResultCache:
+    """Отбор тестов для переиспользования и сохранение прошедших результатов"""
+
+    def __init__(self, config):
+        self.config = config
+        self.cache = getattr(config, "cache", None)
+        self.entries = self.cache.get(CACHE_KEY, {}) if self.cache is not None else {}
+        self.ttl_seconds = float(config.getini("result_cache_ttl_hours")) * 3600
+        self.force = config.getoption("force_run")
+        self.page_fingerprint = None
+        # Итог текущего прогона по тестам: отпечаток и результат
+        self._current = {}
+
+    def _page_url(self) -> str:
+        base_url = self.config.getoption("base_url", None) or self.config.getini("base_url") or DEFAULT_PAGE_URL
+        return f"{base_url.rstrip('/')}/eventswidget/"
+
+    def _reusable(self, nodeid: str, fingerprint: str) -> dict | None:
+        entry = self.entries.get(nodeid)
+        if self.force or not entry or entry["fingerprint"] != fingerprint:
+            return None
+        if time.time() - entry["passed_at"] > self.ttl_seconds:
+            return None
+        return entry
+
+    # Раньше запуска воркеров xdist (их pytest_sessionstart - trylast), чтобы они унаследовали окружение
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionstart(self, session):
+        if self.config.option.collectonly or PAGE_FINGERPRINT_ENV in os.environ:
+            return
+        os.environ[PAGE_FINGERPRINT_ENV] = page_fingerprint(self._page_url()) or ""
+
+    # После отбора по -m/-k и бюджету планировщика - только по тестам, которые будут запущены
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collection_modifyitems(self, items):
+        yield
+        if not items or self.config.option.collectonly:
+            return
+        self.page_fingerprint = os.environ.get(PAGE_FINGERPRINT_ENV) or None
+        if self.page_fingerprint is None:
+            # Страница недоступна - подтвердить, что она не изменилась, нельзя
+            return
+        fingerprints = code_fingerprints()
+        reused = 0
+        for item in items:
+            # Под --dist loadgroup воркер уже добавил к node id суффикс группы
+            nodeid = normalize_nodeid(item.nodeid)
+            code = fingerprints.get(nodeid.split("[", 1)[0])
+            if code is None:
+                continue
+            fingerprint = _sha1(code, nodeid, self.page_fingerprint)
+            entry = self._reusable(nodeid, fingerprint)
+            item.user_properties.append(
+                (PROPERTY_NAME, {"fingerprint": fingerprint, "reused": entry is not None,
+                                 "passed_at": entry["passed_at"] if entry else None})
+            )
+            if entry is not None:
+                _replay(item, entry)
+                reused += 1
+        self.config.stash[reused_count_key] = reused
+
+    def pytest_report_collectionfinish(self, config, items):
+        if reused_count_key not in config.stash:
+            return None
+        return f"result-cache: результат {config.stash[reused_count_key]} из {len(items)} тестов берется из кэша"
+
+    def pytest_runtest_logreport(self, report):
+        # Под xdist отпечатки приходят от воркеров через user_properties
+        info = dict(report.user_properties).get(PROPERTY_NAME)
+        if info is None:
+            return
+        entry = self._current.setdefault(normalize_nodeid(report.nodeid), {**info, "outcome": "passed"})
+        # Прошедший только после перезапуска (plugins.flaky) тест не кэшируется
+        if report.failed or report.outcome == "rerun":
+            entry["outcome"] = "failed"
+        elif report.skipped and entry["outcome"] != "failed":
+            entry["outcome"] = "skipped"
+
+    def pytest_sessionfinish(self, session):
+        if self.cache is None or hasattr(self.config, "workerinput"):
+            return
+        for nodeid, entry in self._current.items():
+            if entry["reused"]:
+                # Время прежнего прогона сохраняется: срок считается от настоящего запуска
+                continue
+            if entry["outcome"] == "passed":
+                self.entries[nodeid] = {"fingerprint": entry["fingerprint"], "passed_at": time.time()}
+            else:
+                self.entries.pop(nodeid, None)
+        self.cache.set(CACHE_KEY, self.entries)
+
+
+def _replay(item, entry: dict):
+    """Тест проходит обычный путь отчетов, но без фикстур и без выполнения тела"""
+    passed_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["passed_at"]))
+
+    def runtest():
+        allure.dynamic.tag("result-cache")
+        attach({"passed_at": passed_at, "fingerprint": entry["fingerprint"]},
+               name="Результат из кэша",
+               attachment_type=allure.attachment_type.JSON)
+
+    item.setup = lambda: None
+    item.runtest = runtest
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(ResultCache(config), "result-cache")
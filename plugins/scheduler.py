@@ -0,0 +1,151 @@
+"""
+Планировщик порядка тестов с учетом длительностей и истории падений
+
+- smoke-тесты запускаются первыми
+- недавно падавшие тесты поднимаются в начало своей группы
+- длинные тесты распределяются по воркерам xdist (--dist loadgroup)
+- --time-budget отбирает самый ценный набор тестов, укладывающийся в бюджет
+"""
+import pytest
+
+from plugins.history import get_history
+
+planned_seconds_key = pytest.StashKey[float]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("scheduler", "Планирование порядка тестов")
+    group.addoption(
+        "--no-schedule",
+        action="store_true",
+        default=False,
+        help="Не менять порядок тестов (порядок файлов, как раньше)",
+    )
+    group.addoption(
+        "--time-budget",
+        action="store",
+        type=float,
+        default=None,
+        metavar="MINUTES",
+        help="Запустить самый ценный набор тестов, укладывающийся в заданное число минут",
+    )
+    parser.addini(
+        "scheduler_default_duration",
+        "Оценка длительности теста без истории, секунды",
+        default="15",
+    )
+    parser.addini(
+        "scheduler_slow_duration",
+        "Оценка длительности теста с маркером slow без истории, секунды",
+        default="45",
+    )
+
+
+def estimate_duration(item, history) -> float:
+    """Оценка длительности теста: история, иначе значение по умолчанию из pytest.ini"""
+    config = item.config
+    if item.get_closest_marker("slow"):
+        default = float(config.getini("scheduler_slow_duration"))
+    else:
+        default = float(config.getini("scheduler_default_duration"))
+    return history.duration(item.nodeid, default)
+
+
+def item_value(item, history) -> float:
+    """Ценность теста для отбора в бюджет времени"""
+    value = 1.0
+    if item.get_closest_marker("smoke"):
+        value += 3.0
+    value += 4.0 * history.failure_rate(item.nodeid)
+    if history.last_failed(item.nodeid):
+        value += 2.0
+    if not history.has_history(item.nodeid):
+        # Тест ни разу не запускался - о нем ничего не известно, его стоит прогнать
+        value += 1.0
+    return value
+
+
+def priority_key(item, history, durations: dict):
+    """Ключ сортировки: smoke, затем падавшие, затем длинные раньше коротких"""
+    return (
+        0 if item.get_closest_marker("smoke") else 1,
+        0 if history.last_failed(item.nodeid) else 1,
+        -history.failure_rate(item.nodeid),
+        -durations[item.nodeid],
+    )
+
+
+def select_within_budget(items: list, durations: dict, values: dict, budget_seconds: float) -> list:
+    """Жадный отбор по ценности на секунду, пока тесты помещаются в бюджет"""
+    by_density = sorted(items, key=lambda item: values[item.nodeid] / max(durations[item.nodeid], 0.1), reverse=True)
+    selected = set()
+    spent = 0.0
+    for item in by_density:
+        if spent + durations[item.nodeid] <= budget_seconds:
+            selected.add(item.nodeid)
+            spent += durations[item.nodeid]
+    return [item for item in items if item.nodeid in selected]
+
+
+def pack_into_workers(items: list, durations: dict, workers: int) -> list[list]:
+    """Раскладка тестов по воркерам: самый длинный тест - в наименее загруженный воркер (LPT)"""
+    bins = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    for item in sorted(items, key=lambda item: -durations[item.nodeid]):
+        index = loads.index(min(loads))
+        bins[index].append(item)
+        loads[index] += durations[item.nodeid]
+    return bins
+
+
+def get_workers_count(config) -> int:
+    """Количество воркеров xdist (1, если xdist не используется)"""
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        return int(workerinput.get("workercount", 1))
+    numprocesses = getattr(config.option, "numprocesses", None)
+    try:
+        return max(int(numprocesses or 1), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+# После отбора по -m/-k: бюджет, раскладка и оценка считаются только по оставшимся тестам
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    if config.getoption("no_schedule") or not items:
+        return
+
+    history = get_history(config)
+    durations = {item.nodeid: estimate_duration(item, history) for item in items}
+
+    budget_minutes = config.getoption("time_budget")
+    if budget_minutes is not None:
+        values = {item.nodeid: item_value(item, history) for item in items}
+        selected = select_within_budget(items, durations, values, budget_minutes * 60)
+        deselected = [item for item in items if item not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+    items.sort(key=lambda item: priority_key(item, history, durations))
+
+    # При --dist loadgroup каждая группа целиком уходит на один воркер,
+    # поэтому длинные тесты раскладываются по группам заранее
+    workers = get_workers_count(config)
+    if workers > 1 and getattr(config.option, "dist", None) == "loadgroup":
+        for index, worker_items in enumerate(pack_into_workers(items, durations, workers)):
+            for item in worker_items:
+                item.add_marker(pytest.mark.xdist_group(name=f"scheduler_{index}"))
+
+    config.stash[planned_seconds_key] = sum(durations[item.nodeid] for item in items)
+
+
+def pytest_report_collectionfinish(config, items):
+    if config.getoption("no_schedule") or planned_seconds_key not in config.stash:
+        return None
+    lines = [f"scheduler: {len(items)} тестов, оценка длительности {config.stash[planned_seconds_key] / 60:.1f} мин"]
+    budget_minutes = config.getoption("time_budget")
+    if budget_minutes is not None:
+        lines.append(f"scheduler: бюджет времени {budget_minutes:g} мин")
+    return lines
@@ -0,0 +1,51 @@
+"""
+Сводка плавности прокрутки превью по браузерам и размерам окна
+
+Тест прокрутки передает результат каждого брейкпоинта через request.node.user_properties:
+    ("scroll_metrics", {"browser": ..., "viewport": ..., "frames": ..., "dropped_frames": ..., ...})
+Сводка собирается и при запуске через xdist.
+"""
+from utils.interaction_latency import percentile
+
+SUMMARY_COLUMNS = (
+    ("frames", "кадров"),
+    ("dropped_frames", "пропущено"),
+    ("p95_frame_ms", "p95 кадра, мс"),
+    ("max_frame_ms", "макс., мс"),
+    ("long_tasks", "длинных задач"),
+)
+
+
+class ScrollMetricsCollector:
+    """Сбор замеров прокрутки из отчетов тестов и вывод медиан"""
+
+    def __init__(self):
+        self.collected = []
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "call":
+            return
+        for name, value in report.user_properties:
+            if name == "scroll_metrics":
+                self.collected.append(value)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.collected:
+            return
+        groups = {}
+        for metrics in self.collected:
+            groups.setdefault((metrics["browser"], metrics["viewport"]), []).append(metrics)
+
+        terminalreporter.section("Плавность прокрутки превью")
+        header = f"{'браузер':<10}{'окно':<12}" + "".join(f"{title:>15}" for _, title in SUMMARY_COLUMNS)
+        terminalreporter.write_line(header)
+        for (browser, viewport), runs in sorted(groups.items()):
+            line = f"{browser:<10}{viewport:<12}"
+            for key, _ in SUMMARY_COLUMNS:
+                value = percentile([run.get(key) for run in runs], 50)
+                line += f"{value:>15.1f}" if value is not None else f"{'-':>15}"
+            terminalreporter.write_line(line)
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(ScrollMetricsCollector(), "scroll-metrics-collector")
@@ -0,0 +1,154 @@
+"""
+Быстрые проверки страницы Events Widget без браузера
+
+HTML страницы и эндпоинты запрашиваются по HTTP с переиспользованием соединений
+и разбираются парсером HTML. Тесты помечены маркером fast: они запускаются первыми,
+и при их падении тесты Playwright пропускаются (plugins.fast_tier).
+"""
+import json
+
+import pytest
+import allure
+
+from utils.attachments import attach
+from utils.http_smoke import FETCH_ERRORS, ConnectionPool, decode_body, parse_page, same_origin_assets
+
+pytestmark = pytest.mark.fast
+
+
+@pytest.fixture(scope="session")
+def http_pool():
+    """Пул keep-alive соединений на весь прогон"""
+    pool = ConnectionPool()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def widget_url(base_url) -> str:
+    return f"{(base_url or 'https://dev.3snet.info').rstrip('/')}/eventswidget/"
+
+
+@pytest.fixture(scope="session")
+def widget_response(http_pool, widget_url) -> dict:
+    """Ответ страницы генератора (один запрос на все тесты модуля)"""
+    try:
+        return http_pool.request(widget_url)
+    except FETCH_ERRORS as e:
+        pytest.fail(f"Страница {widget_url} недоступна: {e}")
+
+
+@pytest.fixture(scope="session")
+def widget_html(widget_response) -> str:
+    return decode_body(widget_response)
+
+
+@pytest.fixture(scope="session")
+def widget_markup(widget_html) -> dict:
+    return parse_page(widget_html)
+
+
+@allure.feature("Events Widget")
+@allure.story("Быстрые проверки без браузера")
+class TestEventsWidgetHttp:
+    """Ответ сервера, заголовок, контент и ресурсы страницы по HTTP"""
+
+    @allure.title("Страница отдается с кодом 200 и типом text/html")
+    @allure.severity(allure.severity_level.BLOCKER)
+    @pytest.mark.smoke
+    def test_page_responds(self, widget_response):
+        """Тест: Сервер отдает HTML-страницу"""
+        with allure.step("Проверка кода ответа и типа содержимого"):
+            attach({key: widget_response[key] for key in ("url", "status", "elapsed_ms", "headers")},
+                   name="Ответ страницы", attachment_type=allure.attachment_type.JSON)
+            assert widget_response["status"] == 200, f"Страница вернула HTTP {widget_response['status']}"
+            assert "text/html" in widget_response["headers"].get("content-type", ""), "Страница отдается не как HTML"
+
+    @allure.title("Страница имеет заголовок (HTTP)")
+    @allure.severity(allure.severity_level.CRITICAL)
+    @pytest.mark.smoke
+    def test_page_has_title(self, widget_markup):
+        """Тест: В HTML есть непустой <title>"""
+        with allure.step("Проверка заголовка"):
+            attach(widget_markup["title"], name="Заголовок страницы", attachment_type=allure.attachment_type.TEXT)
+            assert widget_markup["title"], "Заголовок страницы пустой"
+
+    @allure.title("Страница содержит контент (HTTP)")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.smoke
+    def test_page_has_content(self, widget_html, widget_markup):
+        """Тест: HTML страницы не пустой"""
+        with allure.step("Проверка объема контента"):
+            attach(f"HTML: {len(widget_html)} символов, видимый текст: {len(widget_markup['text'])} символов, "
+                   f"парсер: {widget_markup['parser']}",
+                   name="Информация о контенте", attachment_type=allure.attachment_type.TEXT)
+            assert len(widget_html) > 100, "Страница содержит слишком мало контента"
+
+    @allure.title("Скрипты и стили страницы доступны")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_page_assets_available(self, http_pool, widget_url, widget_markup):
+        """Тест: Скрипты и стили с того же источника отдаются без ошибок"""
+        assets = same_origin_assets(widget_url, widget_markup)
+        if not assets:
+            pytest.skip("На странице нет скриптов и стилей с того же источника")
+        with allure.step(f"Запрос {len(assets)} ресурсов"):
+            results = []
+            for url in assets:
+                try:
+                    response = http_pool.request(url)
+                    results.append({"url": url, "status": response["status"], "elapsed_ms": response["elapsed_ms"],
+                                    "reused_connection": response["reused_connection"]})
+                except FETCH_ERRORS as e:
+                    results.append({"url": url, "status": None, "error": str(e)})
+            attach(results, name="Ресурсы страницы", attachment_type=allure.attachment_type.JSON)
+        with allure.step("Проверка кодов ответа"):
+            broken = [result for result in results if result["status"] is None or result["status"] >= 400]
+            assert not broken, f"Недоступные ресурсы: {[result['url'] for result in broken]}"
+
+    @allure.title("Разметка генератора виджета (HTTP)")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_generator_markup(self, widget_markup):
+        """Тест: Селекторы и кнопка генерации присутствуют в HTML сервера"""
+        attach({key: widget_markup[key] for key in ("selects", "buttons", "table_headers")},
+               name="Элементы генератора", attachment_type=allure.attachment_type.JSON)
+        if not widget_markup["selects"] and not widget_markup["buttons"]:
+            pytest.skip("Генератор отрисовывается на клиенте - проверяется тестами Playwright")
+        with allure.step("Проверка селекторов и кнопки"):
+            assert widget_markup["selects"] >= 2, "В разметке нет селекторов тематики и страны"
+            assert any("Сгенерировать превью" in text for text in widget_markup["buttons"]), \
+                "В разметке нет кнопки 'Сгенерировать превью'"
+
+
+@allure.feature("Events Widget")
+@allure.story("Быстрые проверки без браузера")
+class TestEventsWidgetEndpoints:
+    """Эндпоинты из настройки http_smoke_endpoints"""
+
+    @allure.title("Эндпоинты генератора отвечают")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_endpoints_respond(self, pytestconfig, http_pool, widget_url):
+        """Тест: Эндпоинты отвечают без ошибок, JSON-ответы разбираются"""
+        endpoints = pytestconfig.getini("http_smoke_endpoints")
+        if not endpoints:
+            pytest.skip("Эндпоинты не заданы (http_smoke_endpoints в pytest.ini)")
+        base = widget_url.split("/eventswidget/")[0]
+        results = []
+        for endpoint in endpoints:
+            url = f"{base}/{endpoint.lstrip('/')}"
+            with allure.step(f"Запрос {url}"):
+                try:
+                    response = http_pool.request(url)
+                except FETCH_ERRORS as e:
+                    results.append({"url": url, "status": None, "error": str(e)})
+                    continue
+                result = {"url": url, "status": response["status"], "elapsed_ms": response["elapsed_ms"]}
+                if "json" in response["headers"].get("content-type", ""):
+                    try:
+                        json.loads(decode_body(response))
+                    except ValueError as e:
+                        result["error"] = f"Некорректный JSON: {e}"
+                results.append(result)
+        attach(results, name="Эндпоинты", attachment_type=allure.attachment_type.JSON)
+        broken = [result for result in results
+                  if result["status"] is None or result["status"] >= 400 or result.get("error")]
+        assert not broken, f"Эндпоинты с ошибками: {broken}"
@@ -0,0 +1,122 @@
+"""
+Вложения Allure: нормализация и сжатие на стороне теста, запись файлов в фоновом потоке
+"""
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+
+import allure
+from allure_commons import hookimpl
+from allure_commons.logger import AllureFileLogger
+
+# Текстовые вложения больше этого размера сжимаются gzip
+COMPRESS_THRESHOLD = 256 * 1024
+# JSON больше этого размера сериализуется без отступов
+COMPACT_JSON_THRESHOLD = 16 * 1024
+GZIP_MIME_TYPE = "application/gzip"
+
+
+def _serialize(body, attachment_type) -> str | bytes:
+    """Приведение тела вложения к строке или байтам"""
+    if isinstance(body, (str, bytes)):
+        return body
+    if attachment_type == allure.attachment_type.JSON:
+        text = json.dumps(body, ensure_ascii=False, indent=2, default=str)
+        if len(text) > COMPACT_JSON_THRESHOLD:
+            text = json.dumps(body, ensure_ascii=False, separators=(",", ":"), default=str)
+        return text
+    return str(body)
+
+
+def attach(body, name: str = None, attachment_type=allure.attachment_type.TEXT, extension: str = None):
+    """Замена allure.attach: словари и списки сериализуются в JSON, большие тексты сжимаются"""
+    body = _serialize(body, attachment_type)
+    is_text = isinstance(body, str) or attachment_type in (
+        allure.attachment_type.TEXT,
+        allure.attachment_type.JSON,
+        allure.attachment_type.CSV,
+        allure.attachment_type.TSV,
+        allure.attachment_type.XML,
+        allure.attachment_type.HTML,
+    )
+    if is_text and len(body) > COMPRESS_THRESHOLD:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        original_extension = getattr(attachment_type, "extension", None) or extension or "txt"
+        body = gzip.compress(body, compresslevel=5)
+        attachment_type = GZIP_MIME_TYPE
+        extension = f"{original_extension}.gz"
+    allure.attach(body, name=name, attachment_type=attachment_type, extension=extension)
+
+
+class AsyncAllureFileLogger(AllureFileLogger):
+    """Файловый логгер Allure, выполняющий запись в отдельном потоке
+
+    Одинаковые вложения записываются один раз, повторные оформляются жесткими ссылками.
+    """
+
+    def __init__(self, report_dir, clean: bool = False, max_queue: int = 1000):
+        super().__init__(report_dir, clean)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._written = {}
+        self._errors = []
+        self._thread = threading.Thread(target=self._run, name="allure-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                task()
+            except Exception as e:
+                self._errors.append(str(e))
+            finally:
+                self._queue.task_done()
+
+    def _write_data(self, body, file_name):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        digest = hashlib.sha1(data).hexdigest()
+        destination = self._report_dir / file_name
+        existing = self._written.get(digest)
+        if existing is not None:
+            try:
+                os.link(existing, destination)
+                return
+            except OSError:
+                # Файловая система без жестких ссылок - пишем копию
+                pass
+        with open(destination, "wb") as attached_file:
+            attached_file.write(data)
+        self._written.setdefault(digest, destination)
+
+    @hookimpl
+    def report_result(self, result):
+        self._queue.put(lambda: self._report_item(result))
+
+    @hookimpl
+    def report_container(self, container):
+        self._queue.put(lambda: self._report_item(container))
+
+    @hookimpl
+    def report_attached_file(self, source, file_name):
+        self._queue.put(lambda: shutil.copy2(source, self._report_dir / file_name))
+
+    @hookimpl
+    def report_attached_data(self, body, file_name):
+        self._queue.put(lambda: self._write_data(body, file_name))
+
+    def flush(self):
+        """Ожидание записи всех поставленных в очередь файлов"""
+        self._queue.join()
+
+    def close(self) -> list[str]:
+        """Остановка потока записи; возвращает ошибки записи, если они были"""
+        self._queue.put(None)
+        self._thread.join()
+        return self._errors
@@ -0,0 +1,320 @@
+"""
+Долгоживущие локальные серверы браузеров (playwright launch-server), общие для запусков pytest
+
+Сервер каждого движка запускается при первом обращении, последующие запуски pytest
+подключаются к нему по WebSocket и не тратят время на старт браузера. Сервер
+завершается сам, если к нему никто не подключен дольше idle-timeout, и
+перезапускается при смене версии Playwright или режима headless/headed.
+
+Ручное управление:
+    python -m utils.browser_server status
+    python -m utils.browser_server stop [--browser chromium]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+from urllib.parse import urlparse
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STATE_DIR = PROJECT_ROOT / ".browser_servers"
+DEFAULT_IDLE_TIMEOUT = 900
+START_TIMEOUT = 60
+POLL_INTERVAL = 2
+
+
+def playwright_version() -> str:
+    return metadata.version("playwright")
+
+
+def _state_path(browser_name: str, port: int = None) -> Path:
+    suffix = f"-{port}" if port else ""
+    return STATE_DIR / f"{browser_name}{suffix}.json"
+
+
+def _leases_dir(browser_name: str, port: int = None) -> Path:
+    suffix = f"-{port}" if port else ""
+    return STATE_DIR / f"{browser_name}{suffix}.leases"
+
+
+def _read_state(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(path: Path, state: dict):
+    # Запись через временный файл, чтобы клиенты не прочитали половину JSON
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def endpoint_reachable(ws_endpoint: str) -> bool:
+    """Принимает ли сервер соединения на порту WebSocket-адреса"""
+    url = urlparse(ws_endpoint)
+    try:
+        with socket.create_connection((url.hostname, url.port), timeout=2):
+            return True
+    except OSError:
+        return False
+
+
+class _FileLock:
+    """Простая межпроцессная блокировка на основе эксклюзивного создания файла"""
+
+    def __init__(self, path: Path, timeout: float = START_TIMEOUT + 30):
+        self.path = path
+        self.timeout = timeout
+
+    def __enter__(self):
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                # Блокировка, оставшаяся от упавшего процесса, снимается
+                try:
+                    owner = int(self.path.read_text() or 0)
+                except (OSError, ValueError):
+                    owner = 0
+                if owner and not _pid_alive(owner):
+                    self.path.unlink(missing_ok=True)
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Не удалось получить блокировку {self.path}")
+                time.sleep(0.2)
+
+    def __exit__(self, *exc_info):
+        self.path.unlink(missing_ok=True)
+
+
+def server_status(browser_name: str, headless: bool = True, port: int = None) -> tuple[dict | None, str]:
+    """Состояние сервера и причина, по которой его нельзя переиспользовать (пустая строка - можно)"""
+    state = _read_state(_state_path(browser_name, port))
+    if state is None:
+        return None, "сервер не запущен"
+    if not _pid_alive(state.get("pid")):
+        return state, "процесс сервера завершился"
+    if state.get("playwright_version") != playwright_version():
+        return state, f"версия Playwright сервера {state.get('playwright_version')}, клиента {playwright_version()}"
+    if state.get("headless") != headless:
+        return state, "сервер запущен в другом режиме headless/headed"
+    if not endpoint_reachable(state.get("ws_endpoint", "")):
+        return state, "порт сервера недоступен"
+    return state, ""
+
+
+def server_pid(browser_name: str, port: int = None) -> int | None:
+    """PID процесса-супервизора сервера (браузер - его потомок)"""
+    state = _read_state(_state_path(browser_name, port))
+    return state.get("pid") if state else None
+
+
+def stop_server(browser_name: str, port: int = None):
+    """Остановка сервера движка (если он запущен)"""
+    state = _read_state(_state_path(browser_name, port))
+    if state and _pid_alive(state.get("pid")):
+        try:
+            os.kill(state["pid"], signal.SIGTERM)
+        except OSError:
+            pass
+        deadline = time.monotonic() + 10
+        while _pid_alive(state["pid"]) and time.monotonic() < deadline:
+            time.sleep(0.1)
+    _state_path(browser_name, port).unlink(missing_ok=True)
+
+
+def ensure_server(browser_name: str, headless: bool = True, idle_timeout: int = DEFAULT_IDLE_TIMEOUT,
+                  port: int = None) -> str:
+    """WebSocket-адрес работающего сервера движка; при необходимости сервер запускается"""
+    with _FileLock(STATE_DIR / f"{browser_name}{f'-{port}' if port else ''}.lock"):
+        state, problem = server_status(browser_name, headless, port)
+        if not problem:
+            return state["ws_endpoint"]
+        if state is not None:
+            stop_server(browser_name, port)
+
+        command = [
+            sys.executable, "-m", "utils.browser_server", "serve",
+            "--browser", browser_name,
+            "--idle-timeout", str(idle_timeout),
+            "--headless" if headless else "--headed",
+        ]
+        if port:
+            command += ["--port", str(port)]
+        popen_args = {"start_new_session": True} if os.name == "posix" else {
+            "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP,
+        }
+        subprocess.Popen(
+            command,
+            cwd=PROJECT_ROOT,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **popen_args,
+        )
+
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            state, problem = server_status(browser_name, headless, port)
+            if not problem:
+                return state["ws_endpoint"]
+            time.sleep(0.2)
+        raise RuntimeError(f"Сервер {browser_name} не запустился за {START_TIMEOUT} с: {problem}")
+
+
+class BrowserServerLease:
+    """Отметка о том, что процесс пользуется сервером; пока она есть, сервер не гасится по простою"""
+
+    def __init__(self, browser_name: str, port: int = None):
+        self.path = _leases_dir(browser_name, port) / str(os.getpid())
+
+    def acquire(self) -> "BrowserServerLease":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(str(time.time()), encoding="utf-8")
+        return self
+
+    def release(self):
+        self.path.unlink(missing_ok=True)
+        # Время последнего обращения отсчитывается от освобождения аренды
+        try:
+            os.utime(self.path.parent)
+        except OSError:
+            pass
+
+
+def _active_leases(leases_dir: Path) -> int:
+    active = 0
+    for lease in leases_dir.glob("*"):
+        try:
+            pid = int(lease.name)
+        except ValueError:
+            continue
+        if _pid_alive(pid):
+            active += 1
+        else:
+            lease.unlink(missing_ok=True)
+    return active
+
+
+def serve(browser_name: str, headless: bool, idle_timeout: int, port: int = None):
+    """Процесс-супервизор: запускает launch-server и гасит его после простоя"""
+    config = {"headless": headless, "port": port or 0, "wsPath": f"/{browser_name}-{os.urandom(8).hex()}"}
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as config_file:
+        json.dump(config, config_file)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "playwright", "launch-server", "--browser", browser_name, "--config", config_file.name],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+
+    def shutdown(*_):
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        state = _read_state(_state_path(browser_name, port))
+        if state and state.get("pid") == os.getpid():
+            _state_path(browser_name, port).unlink(missing_ok=True)
+        os.unlink(config_file.name)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # launch-server печатает адрес WebSocket первой строкой
+    ws_endpoint = server.stdout.readline().strip()
+    if not ws_endpoint.startswith("ws"):
+        shutdown()
+    _write_state(_state_path(browser_name, port), {
+        "pid": os.getpid(),
+        "browser": browser_name,
+        "ws_endpoint": ws_endpoint,
+        "headless": headless,
+        "playwright_version": playwright_version(),
+        "started": time.time(),
+    })
+
+    leases_dir = _leases_dir(browser_name, port)
+    leases_dir.mkdir(parents=True, exist_ok=True)
+    os.utime(leases_dir)
+    while server.poll() is None:
+        time.sleep(POLL_INTERVAL)
+        if _active_leases(leases_dir):
+            continue
+        if time.time() - leases_dir.stat().st_mtime > idle_timeout:
+            break
+    shutdown()
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Локальные серверы браузеров Playwright")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Запуск супервизора сервера (вызывается автоматически)")
+    serve_parser.add_argument("--browser", required=True, choices=["chromium", "firefox", "webkit"])
+    serve_parser.add_argument("--idle-timeout", type=int, default=DEFAULT_IDLE_TIMEOUT)
+    serve_parser.add_argument("--port", type=int, default=None)
+    mode = serve_parser.add_mutually_exclusive_group()
+    mode.add_argument("--headless", dest="headless", action="store_true", default=True)
+    mode.add_argument("--headed", dest="headless", action="store_false")
+
+    start_parser = commands.add_parser("start", help="Запуск сервера заранее")
+    start_parser.add_argument("--browser", action="append", default=None)
+    start_parser.add_argument("--port", type=int, default=None)
+    start_parser.add_argument("--idle-timeout", type=int, default=DEFAULT_IDLE_TIMEOUT)
+
+    stop_parser = commands.add_parser("stop", help="Остановка серверов")
+    stop_parser.add_argument("--browser", action="append", default=None)
+    stop_parser.add_argument("--port", type=int, default=None)
+
+    commands.add_parser("status", help="Состояние серверов")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        serve(args.browser, args.headless, args.idle_timeout, args.port)
+    elif args.command == "start":
+        for browser_name in args.browser or ["chromium", "firefox"]:
+            print(f"{browser_name}: {ensure_server(browser_name, idle_timeout=args.idle_timeout, port=args.port)}")
+    elif args.command == "stop":
+        for browser_name in args.browser or ["chromium", "firefox", "webkit"]:
+            stop_server(browser_name, args.port)
+    elif args.command == "status":
+        for path in sorted(STATE_DIR.glob("*.json")):
+            state = _read_state(path) or {}
+            alive = "работает" if _pid_alive(state.get("pid")) else "остановлен"
+            print(f"{path.stem}: {alive}, {state.get('ws_endpoint')}, playwright {state.get('playwright_version')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Бюджеты объема загрузки и проверка заголовков сжатия и кэширования
+
+Работает с запросами из RequestCapture (EventsWidgetPage.stop_request_capture).
+Бюджеты задаются в pytest.ini в килобайтах переданных данных по типам ресурсов
+Playwright (script, stylesheet, image, font, document, xhr, fetch, ...) и на всю
+страницу (total).
+"""
+import re
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Текстовые ответы меньше этого размера можно не сжимать
+MIN_COMPRESSIBLE_BYTES = 1024
+# Типы статических ресурсов, которые должны кэшироваться
+STATIC_RESOURCE_TYPES = ("script", "stylesheet", "image", "font")
+TEXT_CONTENT_TYPES = re.compile(r"^(text/|application/(javascript|x-javascript|json|xml|.*\+json|.*\+xml)|image/svg\+xml)")
+TOP_RESOURCES = 5
+
+
+def _origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def cache_lifetime(headers: dict) -> int | None:
+    """Срок хранения ответа в кэше, секунды (0 - не кэшируется, None - заголовков нет)"""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = re.search(r"(?:s-maxage|max-age)\s*=\s*(\d+)", cache_control)
+    if match:
+        try:
+            age = int(headers.get("age", 0) or 0)
+        except (TypeError, ValueError):
+            # Некорректный Age не учитывается
+            age = 0
+        return max(int(match.group(1)) - age, 0)
+    if "expires" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["expires"])
+            date = parsedate_to_datetime(headers["date"]) if "date" in headers else None
+        except (TypeError, ValueError):
+            return 0
+        if date is None:
+            return None
+        return max(int((expires - date).total_seconds()), 0)
+    return None
+
+
+def is_uncompressed_text(entry: dict) -> bool:
+    """Текстовый ответ заметного размера, переданный без Content-Encoding"""
+    headers = entry.get("headers", {})
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if not TEXT_CONTENT_TYPES.match(content_type):
+        return False
+    if headers.get("content-encoding", "identity").lower() not in ("", "identity"):
+        return False
+    return (entry.get("body_bytes") or 0) >= MIN_COMPRESSIBLE_BYTES
+
+
+def _add(totals: dict, key: str, entry: dict):
+    bucket = totals.setdefault(key, {"requests": 0, "transfer_bytes": 0, "decoded_bytes": 0})
+    bucket["requests"] += 1
+    bucket["transfer_bytes"] += entry.get("transfer_bytes") or 0
+    bucket["decoded_bytes"] += entry.get("decoded_bytes") or entry.get("body_bytes") or 0
+
+
+def check_budgets(requests: list[dict], budgets_kb: dict, min_cache_lifetime: int) -> dict:
+    """Суммы по типам и источникам, превышения бюджетов, несжатые и плохо кэшируемые ресурсы"""
+    requests = [entry for entry in requests if not entry.get("failure")]
+    by_type, by_origin = {}, {}
+    for entry in requests:
+        _add(by_type, entry["resource_type"], entry)
+        _add(by_origin, _origin(entry["url"]), entry)
+    total_bytes = sum(bucket["transfer_bytes"] for bucket in by_type.values())
+
+    overruns = []
+    for name, budget_kb in budgets_kb.items():
+        actual = total_bytes if name == "total" else by_type.get(name, {}).get("transfer_bytes", 0)
+        if actual <= budget_kb * 1024:
+            continue
+        resources = [entry for entry in requests if name == "total" or entry["resource_type"] == name]
+        resources.sort(key=lambda entry: entry.get("transfer_bytes") or 0, reverse=True)
+        overruns.append({
+            "budget": name,
+            "budget_kb": budget_kb,
+            "actual_kb": round(actual / 1024, 1),
+            "resources": [{"url": entry["url"], "transfer_kb": round((entry.get("transfer_bytes") or 0) / 1024, 1)}
+                          for entry in resources[:TOP_RESOURCES]],
+        })
+
+    uncompressed = [
+        {"url": entry["url"], "content_type": entry["headers"].get("content-type"),
+         "body_kb": round(entry["body_bytes"] / 1024, 1)}
+        for entry in requests if is_uncompressed_text(entry)
+    ]
+    short_cache = []
+    for entry in requests:
+        if entry["resource_type"] not in STATIC_RESOURCE_TYPES:
+            continue
+        lifetime = cache_lifetime(entry.get("headers", {}))
+        if lifetime is None or lifetime < min_cache_lifetime:
+            short_cache.append({
+                "url": entry["url"],
+                "cache_control": entry["headers"].get("cache-control"),
+                "lifetime_s": lifetime,
+            })
+
+    return {
+        "total_kb": round(total_bytes / 1024, 1),
+        "by_type": by_type,
+        "by_origin": by_origin,
+        "overruns": overruns,
+        "uncompressed": uncompressed,
+        "short_cache": short_cache,
+    }
+
+
+def format_overruns(overruns: list[dict]) -> str:
+    """Текст превышений бюджетов с крупнейшими ресурсами каждого типа"""
+    lines = []
+    for overrun in overruns:
+        lines.append(f"{overrun['budget']}: {overrun['actual_kb']} КБ при бюджете {overrun['budget_kb']} КБ")
+        for resource in overrun["resources"]:
+            lines.append(f"    {resource['transfer_kb']:>8} КБ  {resource['url']}")
+    return "\n".join(lines)
@@ -0,0 +1,136 @@
+"""
+Сравнение загрузки страницы с пустым кэшем и с прогретым дисковым кэшем
+
+Обе загрузки выполняются в постоянном контексте (launch_persistent_context) одного
+локально запущенного браузера: холодная - с пустым профилем, теплая - после перезапуска
+с тем же профилем, дисковый кэш которого заполнила холодная загрузка. Поэтому замеры
+сравнимы, но не идут через удаленный сервер браузера (--browser-server-nodes). Попадания в кэш определяются по Resource Timing:
+transferSize == 0 при ненулевом decodedBodySize - ответ взят из кэша,
+маленький transferSize - ответ 304 после ревалидации.
+"""
+import time
+from pathlib import Path
+
+from pages.events_widget_page import EventsWidgetPage
+
+# Ответ ревалидации (304) содержит только заголовки
+REVALIDATION_MAX_TRANSFER = 1024
+
+RESOURCE_TYPES_BY_EXTENSION = {
+    ".js": "script",
+    ".mjs": "script",
+    ".css": "stylesheet",
+    ".woff": "font",
+    ".woff2": "font",
+    ".ttf": "font",
+    ".otf": "font",
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+    ".gif": "image",
+    ".svg": "image",
+    ".webp": "image",
+    ".avif": "image",
+    ".ico": "image",
+}
+
+RESOURCE_TYPES_BY_INITIATOR = {
+    "script": "script",
+    "link": "stylesheet",
+    "css": "image",
+    "img": "image",
+    "image": "image",
+    "xmlhttprequest": "xhr",
+    "fetch": "xhr",
+    "beacon": "xhr",
+    "navigation": "document",
+    "iframe": "document",
+}
+
+
+def resource_type(entry: dict) -> str:
+    """Тип ресурса по расширению URL, а если его нет - по initiatorType"""
+    path = entry["url"].split("?", 1)[0].split("#", 1)[0].lower()
+    for extension, kind in RESOURCE_TYPES_BY_EXTENSION.items():
+        if path.endswith(extension):
+            return kind
+    return RESOURCE_TYPES_BY_INITIATOR.get(entry.get("initiator_type", ""), "other")
+
+
+def cache_status(entry: dict) -> str:
+    """hit / revalidated / network / opaque (кросс-доменный ресурс без Timing-Allow-Origin)"""
+    transfer = entry.get("transfer_size") or 0
+    decoded = entry.get("decoded_body_size") or 0
+    if transfer == 0 and decoded == 0:
+        return "opaque"
+    if transfer == 0:
+        return "hit"
+    if transfer <= REVALIDATION_MAX_TRANSFER < (entry.get("encoded_body_size") or 0):
+        return "revalidated"
+    return "network"
+
+
+def summarize_load(entries: list[dict], load_s: float) -> dict:
+    """Сводка одной загрузки: байты и статусы кэша по типам ресурсов"""
+    by_type = {}
+    statuses = {"hit": 0, "revalidated": 0, "network": 0, "opaque": 0}
+    for entry in entries:
+        kind = resource_type(entry)
+        status = cache_status(entry)
+        statuses[status] += 1
+        bucket = by_type.setdefault(kind, {"requests": 0, "transfer_bytes": 0, "decoded_bytes": 0, "cache_hits": 0})
+        bucket["requests"] += 1
+        bucket["transfer_bytes"] += entry.get("transfer_size") or 0
+        bucket["decoded_bytes"] += entry.get("decoded_body_size") or 0
+        if status in ("hit", "revalidated"):
+            bucket["cache_hits"] += 1
+    measurable = len(entries) - statuses["opaque"]
+    return {
+        "load_s": round(load_s, 3),
+        "requests": len(entries),
+        "transfer_bytes": sum(bucket["transfer_bytes"] for bucket in by_type.values()),
+        "cache_statuses": statuses,
+        "cache_hit_ratio": round((statuses["hit"] + statuses["revalidated"]) / measurable, 3) if measurable else None,
+        "by_type": by_type,
+    }
+
+
+def _measure_load(page, base_url: str = None) -> dict:
+    events_page = EventsWidgetPage(page, base_url)
+    start_time = time.time()
+    events_page.navigate()
+    load_s = time.time() - start_time
+    return {**summarize_load(events_page.get_resource_timings(), load_s), **events_page.get_navigation_timing()}
+
+
+def _measure_persistent_load(browser_type, profile_dir, persistent_args: dict, base_url: str = None) -> dict:
+    # Закрытие контекста сбрасывает дисковый кэш профиля на диск
+    context = browser_type.launch_persistent_context(str(profile_dir), **persistent_args)
+    try:
+        return _measure_load(context.pages[0] if context.pages else context.new_page(), base_url)
+    finally:
+        context.close()
+
+
+def measure_cold_and_warm(browser_type, launch_args: dict, context_args: dict, profile_dir,
+                          base_url: str = None) -> dict:
+    """Холодная загрузка с пустым профилем и теплая - с тем же профилем после перезапуска"""
+    if Path(profile_dir).exists() and any(Path(profile_dir).iterdir()):
+        raise ValueError(f"Профиль для холодной загрузки должен быть пустым: {profile_dir}")
+    persistent_args = {**launch_args, **context_args}
+    cold = _measure_persistent_load(browser_type, profile_dir, persistent_args, base_url)
+    warm = _measure_persistent_load(browser_type, profile_dir, persistent_args, base_url)
+
+    bytes_saved = {}
+    for kind in cold["by_type"].keys() | warm["by_type"].keys():
+        cold_bytes = cold["by_type"].get(kind, {}).get("transfer_bytes", 0)
+        warm_bytes = warm["by_type"].get(kind, {}).get("transfer_bytes", 0)
+        bytes_saved[kind] = cold_bytes - warm_bytes
+
+    return {
+        "cold": cold,
+        "warm": warm,
+        "bytes_saved_by_type": bytes_saved,
+        "bytes_saved_total": sum(bytes_saved.values()),
+        "load_time_saved_s": round(cold["load_s"] - warm["load_s"], 3),
+    }
@@ -0,0 +1,205 @@
+"""
+Покрытие JS и CSS страницы по фазам сценария (только Chromium, CDP)
+
+JS - CDP Profiler.startPreciseCoverage с блочной детализацией, CSS -
+CSS.startRuleUsageTracking. Покрытие снимается после каждой фазы (mark): счетчики
+Profiler.takePreciseCoverage и CSS.takeCoverageDelta сбрасываются при каждом снятии,
+поэтому в фазе "interaction" видно только то, что выполнилось после загрузки.
+
+Для каждого скрипта и таблицы стилей считаются размер, использованные и
+неиспользованные байты, а также байты, которые понадобились только после
+взаимодействия - их можно загружать лениво. Диапазоны блочного покрытия вложены,
+поэтому применяются от внешних к внутренним: внутренний диапазон уточняет внешний.
+"""
+
+# Функции, выполненные только после взаимодействия, в отчете по скрипту
+MAX_LAZY_FUNCTIONS = 10
+
+
+def _used_bytes(functions: list[dict], lengths: dict) -> dict:
+    """scriptId -> bytearray с 1 для выполненных байтов"""
+    ranges = {}
+    for function in functions:
+        for block in function["ranges"]:
+            ranges.setdefault(function["scriptId"], []).append(block)
+    used = {}
+    for script_id, blocks in ranges.items():
+        length = lengths.get(script_id) or max(block["endOffset"] for block in blocks)
+        mask = bytearray(length)
+        for block in sorted(blocks, key=lambda block: (block["startOffset"], -block["endOffset"])):
+            start, end = block["startOffset"], min(block["endOffset"], length)
+            mask[start:end] = (b"\x01" if block["count"] else b"\x00") * (end - start)
+        used[script_id] = mask
+    return used
+
+
+def _script_lengths(entries: list[dict]) -> dict:
+    """Длина скрипта - конец диапазона функции верхнего уровня (самый большой конец)"""
+    lengths = {}
+    for entry in entries:
+        for function in entry["functions"]:
+            for block in function["ranges"]:
+                lengths[entry["scriptId"]] = max(lengths.get(entry["scriptId"], 0), block["endOffset"])
+    return lengths
+
+
+def _mask_int(mask: bytearray) -> int:
+    # Байты 0/1 как одно число: объединение и разность фаз - побитовые операции, а не цикл по байтам
+    return int.from_bytes(mask, "big")
+
+
+def _lazy_functions(result: list[dict], script_id: str, load_mask: bytearray) -> set[str]:
+    """Именованные функции скрипта, выполненные в фазе, но ни разу - при загрузке"""
+    names = set()
+    for entry in result:
+        if entry["scriptId"] != script_id:
+            continue
+        for function in entry["functions"]:
+            block = function["ranges"][0]
+            if block["count"] and function["functionName"] and not any(load_mask[block["startOffset"]:block["endOffset"]]):
+                names.add(function["functionName"])
+    return names
+
+
+def analyze_js_coverage(phases: dict) -> list[dict]:
+    """Покрытие по скриптам из снятий Profiler.takePreciseCoverage по фазам ("load", "interaction")"""
+    entries = [entry for result in phases.values() for entry in result]
+    lengths = _script_lengths(entries)
+    urls = {entry["scriptId"]: entry["url"] for entry in entries}
+    by_phase = {phase: _used_bytes([{**function, "scriptId": entry["scriptId"]}
+                                    for entry in result for function in entry["functions"]], lengths)
+                for phase, result in phases.items()}
+
+    files = {}
+    for script_id, length in lengths.items():
+        # Виртуальные скрипты (evaluate Playwright, расширения) в отчет не попадают
+        if not urls[script_id].startswith("http"):
+            continue
+        load_mask = by_phase.get("load", {}).get(script_id, bytearray(length))
+        load = _mask_int(load_mask)
+        used = load
+        interaction_only = 0
+        lazy = set()
+        for phase, masks in by_phase.items():
+            if phase == "load" or script_id not in masks:
+                continue
+            late = _mask_int(masks[script_id])
+            used |= late
+            interaction_only |= late & ~load
+            lazy |= _lazy_functions(phases[phase], script_id, load_mask)
+        entry = files.setdefault(urls[script_id], {"url": urls[script_id], "total_bytes": 0, "used_bytes": 0,
+                                                   "interaction_only_bytes": 0, "lazy_functions": []})
+        entry["total_bytes"] += length
+        entry["used_bytes"] += used.bit_count()
+        entry["interaction_only_bytes"] += interaction_only.bit_count()
+        entry["lazy_functions"] = sorted(set(entry["lazy_functions"]) | lazy)[:MAX_LAZY_FUNCTIONS]
+    return _finish(files)
+
+
+def analyze_css_coverage(sheets: dict, phases: dict) -> list[dict]:
+    """Покрытие по таблицам стилей: sheets - заголовки CSS.styleSheetAdded, phases - дельты использования правил"""
+    files = {}
+    load_rules = {(rule["styleSheetId"], rule["startOffset"]) for rule in phases.get("load", []) if rule["used"]}
+    used_rules = {}
+    for phase, rules in phases.items():
+        for rule in rules:
+            if rule["used"]:
+                used_rules.setdefault((rule["styleSheetId"], rule["startOffset"]), (rule, phase))
+    for sheet_id, header in sheets.items():
+        url = header.get("sourceURL") or "(inline)"
+        entry = files.setdefault(url, {"url": url, "total_bytes": 0, "used_bytes": 0, "interaction_only_bytes": 0})
+        entry["total_bytes"] += int(header.get("length") or 0)
+    for (sheet_id, start), (rule, phase) in used_rules.items():
+        header = sheets.get(sheet_id)
+        if header is None:
+            continue
+        entry = files[header.get("sourceURL") or "(inline)"]
+        size = int(rule["endOffset"] - rule["startOffset"])
+        entry["used_bytes"] += size
+        if (sheet_id, start) not in load_rules:
+            entry["interaction_only_bytes"] += size
+    return _finish(files)
+
+
+def _finish(files: dict) -> list[dict]:
+    result = []
+    for entry in files.values():
+        if entry["total_bytes"]:
+            entry["used_bytes"] = min(entry["used_bytes"], entry["total_bytes"])
+        entry["unused_bytes"] = max(entry["total_bytes"] - entry["used_bytes"], 0)
+        entry["unused_ratio"] = round(entry["unused_bytes"] / entry["total_bytes"], 3) if entry["total_bytes"] else None
+        result.append(entry)
+    return sorted(result, key=lambda entry: entry["unused_bytes"], reverse=True)
+
+
+def coverage_totals(report: dict) -> dict:
+    """Суммы по всем скриптам и таблицам стилей (для тренда между прогонами)"""
+    totals = {}
+    for kind in ("js", "css"):
+        files = report[kind]
+        total = sum(entry["total_bytes"] for entry in files)
+        used = sum(entry["used_bytes"] for entry in files)
+        totals[kind] = {
+            "total_bytes": total,
+            "used_bytes": used,
+            "unused_bytes": total - used,
+            "interaction_only_bytes": sum(entry["interaction_only_bytes"] for entry in files),
+            "unused_ratio": round((total - used) / total, 3) if total else None,
+        }
+    return totals
+
+
+class CoverageProbe:
+    """Покрытие JS и CSS страницы между start() и stop(), с разбиением на фазы через mark()"""
+
+    def __init__(self, page):
+        self.page = page
+        self._cdp = None
+        self._sheets = {}
+        self._js = {}
+        self._css = {}
+
+    def _on_style_sheet_added(self, event):
+        header = event["header"]
+        self._sheets[header["styleSheetId"]] = header
+
+    def start(self) -> bool:
+        """Включение покрытия; False, если браузер не Chromium или CDP недоступен"""
+        try:
+            if self.page.context.browser.browser_type.name != "chromium":
+                return False
+            self._cdp = self.page.context.new_cdp_session(self.page)
+            self._cdp.on("CSS.styleSheetAdded", self._on_style_sheet_added)
+            self._cdp.send("Profiler.enable")
+            self._cdp.send("Profiler.startPreciseCoverage", {"callCount": True, "detailed": True})
+            self._cdp.send("DOM.enable")
+            self._cdp.send("CSS.enable")
+            self._cdp.send("CSS.startRuleUsageTracking")
+            return True
+        except Exception:
+            self._cdp = None
+            return False
+
+    def mark(self, phase: str):
+        """Снятие покрытия за фазу, закончившуюся сейчас"""
+        if self._cdp is None:
+            return
+        self._js[phase] = self._cdp.send("Profiler.takePreciseCoverage")["result"]
+        self._css[phase] = self._cdp.send("CSS.takeCoverageDelta")["coverage"]
+
+    def stop(self) -> dict:
+        """Отчет по скриптам и таблицам стилей"""
+        if self._cdp is None:
+            return {"js": [], "css": [], "phases": []}
+        try:
+            self._cdp.send("CSS.stopRuleUsageTracking")
+            self._cdp.send("Profiler.stopPreciseCoverage")
+            self._cdp.detach()
+        except Exception:
+            pass
+        self._cdp = None
+        return {
+            "phases": list(self._js),
+            "js": analyze_js_coverage(self._js),
+            "css": analyze_css_coverage(self._sheets, self._css),
+        }
@@ -0,0 +1,206 @@
+"""
+Влияние встроенного виджета на страницу стороннего сайта
+
+Код виджета (после "Сгенерировать превью") вставляется в локальные страницы-хосты,
+которые отдаются через page.route с вымышленного источника:
+- blank - пустая страница с одним абзацем;
+- heavy - длинная статья, таблица и скрипт, нагружающий главный поток;
+- multi - несколько виджетов на одной странице.
+
+Каждая страница загружается с виджетом и без него (каждый раз в новом контексте,
+с пустым кэшем). Снимаются время загрузки, LCP, время работы главного потока
+(CDP TaskDuration в Chromium, иначе сумма длинных задач) и память (PageMemoryProbe);
+разница медиан - стоимость виджета для страницы.
+"""
+from utils.interaction_latency import percentile
+from utils.memory_probe import PageMemoryProbe
+
+HOST_ORIGIN = "http://widget-host.test"
+DEFAULT_WIDGETS_PER_PAGE = 3
+DEFAULT_REPEATS = 3
+# Время на загрузку содержимого виджета (iframe, скрипты) после события load
+SETTLE_TIMEOUT_MS = 10000
+METRICS = ("load_ms", "lcp_ms", "main_thread_ms", "long_tasks_ms", "js_heap_kb", "dom_nodes")
+
+HOST_METRICS_INIT_JS = """
+(() => {
+    const state = {lcp: null, longtasks: 0, supported: []};
+    window.__hostMetrics = state;
+    const observe = (type, handler) => {
+        try {
+            new PerformanceObserver(list => list.getEntries().forEach(handler)).observe({type, buffered: true});
+            state.supported.push(type);
+        } catch (e) {}
+    };
+    observe('largest-contentful-paint', entry => { state.lcp = entry.startTime; });
+    observe('longtask', entry => { state.longtasks += entry.duration; });
+})();
+"""
+
+COLLECT_HOST_METRICS_JS = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const state = window.__hostMetrics || {lcp: null, longtasks: 0, supported: []};
+    return {
+        load_ms: nav ? nav.loadEventEnd : null,
+        lcp_ms: state.lcp,
+        long_tasks_ms: state.supported.includes('longtask') ? state.longtasks : null,
+        widget_frames: document.querySelectorAll('iframe').length,
+    };
+}
+"""
+
+BLANK_HOST_HTML = """<!DOCTYPE html>
+<html lang="ru">
+<head><meta charset="utf-8"><title>Пустая страница</title></head>
+<body>
+<p>Страница сайта-партнера.</p>
+{widgets}
+</body>
+</html>
+"""
+
+HEAVY_HOST_HTML = """<!DOCTYPE html>
+<html lang="ru">
+<head><meta charset="utf-8"><title>Тяжелая страница</title>
+<style>
+body {{ font-family: serif; margin: 0 auto; max-width: 960px; }}
+.hero {{ height: 360px; background: linear-gradient(135deg, #2b5876, #4e4376); color: #fff; font-size: 48px; }}
+td {{ border: 1px solid #ddd; padding: 2px 6px; }}
+</style>
+</head>
+<body>
+<div class="hero">Новости индустрии</div>
+<article>{paragraphs}</article>
+{widgets}
+<table>{rows}</table>
+<script>
+// Имитация аналитики и рекламы сайта: ~150 мс работы главного потока
+const until = performance.now() + 150;
+let counter = 0;
+while (performance.now() < until) {{ counter++; }}
+</script>
+</body>
+</html>
+"""
+
+
+def build_host_page(kind: str, widget_code: str = "", widgets: int = 1) -> str:
+    """HTML страницы-хоста; без widget_code - та же страница без виджета"""
+    block = "\n".join(f'<div class="partner-widget">{widget_code}</div>' for _ in range(widgets)) if widget_code else ""
+    if kind == "heavy":
+        paragraphs = "".join(f"<p>Абзац {index}: " + "текст статьи " * 40 + "</p>" for index in range(60))
+        rows = "".join(f"<tr><td>{index}</td><td>строка {index}</td><td>{index * 7}</td></tr>" for index in range(300))
+        return HEAVY_HOST_HTML.format(paragraphs=paragraphs, widgets=block, rows=rows)
+    return BLANK_HOST_HTML.format(widgets=block)
+
+
+def host_variants(widgets_per_page: int = DEFAULT_WIDGETS_PER_PAGE) -> list[dict]:
+    """Набор страниц-хостов: пустая, тяжелая и страница с несколькими виджетами"""
+    return [
+        {"name": "blank", "kind": "blank", "widgets": 1},
+        {"name": "heavy", "kind": "heavy", "widgets": 1},
+        {"name": f"multi-{widgets_per_page}", "kind": "blank", "widgets": widgets_per_page},
+    ]
+
+
+def _open_cdp(page):
+    """CDP-сессия с доменом Performance (только Chromium)"""
+    try:
+        if page.context.browser.browser_type.name != "chromium":
+            return None
+        cdp = page.context.new_cdp_session(page)
+        cdp.send("Performance.enable")
+        return cdp
+    except Exception:
+        return None
+
+
+def _task_duration_ms(cdp) -> float | None:
+    if cdp is None:
+        return None
+    try:
+        metrics = cdp.send("Performance.getMetrics")["metrics"]
+    except Exception:
+        return None
+    values = {metric["name"]: metric["value"] for metric in metrics}
+    return values["TaskDuration"] * 1000 if "TaskDuration" in values else None
+
+
+def measure_host_page(browser, context_args: dict, html: str) -> dict:
+    """Одна загрузка страницы-хоста в новом контексте"""
+    context = browser.new_context(**context_args)
+    try:
+        page = context.new_page()
+        page.route(f"{HOST_ORIGIN}/**", lambda route: route.fulfill(
+            status=200, content_type="text/html; charset=utf-8", body=html))
+        page.add_init_script(HOST_METRICS_INIT_JS)
+        probe = PageMemoryProbe(page)
+        probe.start()
+        cdp = _open_cdp(page)
+        task_start = _task_duration_ms(cdp)
+        try:
+            page.goto(f"{HOST_ORIGIN}/", wait_until="load", timeout=30000)
+            try:
+                page.wait_for_load_state("networkidle", timeout=SETTLE_TIMEOUT_MS)
+            except Exception:
+                pass
+            # Кадр после загрузки, чтобы последний кандидат LCP успел записаться
+            page.wait_for_timeout(500)
+            metrics = page.evaluate(COLLECT_HOST_METRICS_JS)
+            task_end = _task_duration_ms(cdp)
+            memory = probe.sample()
+        finally:
+            probe.stop()
+    finally:
+        context.close()
+
+    main_thread_ms = task_end - task_start if task_start is not None and task_end is not None else None
+    return {
+        "load_ms": metrics["load_ms"],
+        "lcp_ms": metrics["lcp_ms"],
+        "main_thread_ms": round(main_thread_ms, 1) if main_thread_ms is not None else metrics["long_tasks_ms"],
+        "long_tasks_ms": metrics["long_tasks_ms"],
+        "js_heap_kb": memory["js_heap_kb"],
+        "dom_nodes": memory["dom_nodes"],
+        "widget_frames": metrics["widget_frames"],
+    }
+
+
+def _median(runs: list[dict]) -> dict:
+    return {name: percentile([run[name] for run in runs], 50) for name in METRICS}
+
+
+def marginal_cost(baseline: dict, with_widget: dict, widgets: int = 1) -> dict:
+    """Прирост метрик от виджета: всего и в пересчете на один виджет"""
+    cost = {}
+    for name in METRICS:
+        if baseline.get(name) is None or with_widget.get(name) is None:
+            cost[name] = None
+            continue
+        delta = with_widget[name] - baseline[name]
+        cost[name] = {"total": round(delta, 1), "per_widget": round(delta / widgets, 1)}
+    return cost
+
+
+def run_embed_benchmark(browser, context_args: dict, widget_code: str,
+                        widgets_per_page: int = DEFAULT_WIDGETS_PER_PAGE, repeats: int = DEFAULT_REPEATS) -> dict:
+    """Замеры всех страниц-хостов с виджетом и без; медианы по повторам и стоимость виджета"""
+    hosts = {}
+    for variant in host_variants(widgets_per_page):
+        baseline_html = build_host_page(variant["kind"])
+        widget_html = build_host_page(variant["kind"], widget_code, variant["widgets"])
+        baseline_runs, widget_runs = [], []
+        # Загрузки чередуются, чтобы дрейф сети и машины одинаково влиял на обе серии
+        for _ in range(repeats):
+            baseline_runs.append(measure_host_page(browser, context_args, baseline_html))
+            widget_runs.append(measure_host_page(browser, context_args, widget_html))
+        baseline, with_widget = _median(baseline_runs), _median(widget_runs)
+        hosts[variant["name"]] = {
+            "widgets": variant["widgets"],
+            "baseline": baseline,
+            "with_widget": with_widget,
+            "widget_frames": min(run["widget_frames"] for run in widget_runs),
+            "marginal_cost": marginal_cost(baseline, with_widget, variant["widgets"]),
+        }
+    return {"repeats": repeats, "widget_code": widget_code, "hosts": hosts}
@@ -0,0 +1,237 @@
+"""
+Быстрые проверки без браузера: HTML страницы и эндпоинты по HTTP с переиспользованием соединений
+
+Соединения http.client держатся открытыми (keep-alive) и переиспользуются между
+запросами к одному хосту. HTML разбирается selectolax, если он установлен
+(pip install selectolax), иначе - стандартным html.parser.
+"""
+import gzip
+import hashlib
+import http.client
+import json
+import queue
+import threading
+import time
+import zlib
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as FastHTMLParser
+except ImportError:
+    FastHTMLParser = None
+
+DEFAULT_TIMEOUT = 15
+POOL_SIZE = 4
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) events-widget-http-smoke"
+# Ошибки запроса: сеть, оборванный или некорректный HTTP-ответ, битое сжатие тела
+FETCH_ERRORS = (OSError, EOFError, http.client.HTTPException, zlib.error)
+
+
+class ConnectionPool:
+    """Пул keep-alive соединений по (схема, хост, порт)"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, size: int = POOL_SIZE):
+        self.timeout = timeout
+        self.size = size
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, key) -> queue.LifoQueue:
+        with self._lock:
+            return self._pools.setdefault(key, queue.LifoQueue(maxsize=self.size))
+
+    def _connect(self, scheme: str, host: str, port: int):
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout)
+
+    def request(self, url: str, method: str = "GET", headers: dict = None) -> dict:
+        """Запрос с переиспользованием соединения; ответ распаковывается (gzip/deflate)"""
+        parsed = urlparse(url)
+        scheme = parsed.scheme or "http"
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, parsed.hostname, port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+        request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate", **(headers or {})}
+
+        pool = self._queue(key)
+        try:
+            connection, reused = pool.get_nowait(), True
+        except queue.Empty:
+            connection, reused = self._connect(*key), False
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, headers=request_headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # Сервер закрыл простаивающее соединение - повторяем на новом
+            connection.close()
+            if not reused:
+                raise
+            connection = self._connect(*key)
+            started = time.perf_counter()
+            connection.request(method, path, headers=request_headers)
+            response = connection.getresponse()
+            body = response.read()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+        encoding = response_headers.get("content-encoding", "")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        if response.will_close:
+            connection.close()
+        else:
+            try:
+                pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+        return {
+            "url": url,
+            "status": response.status,
+            "headers": response_headers,
+            "body": body,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "reused_connection": reused,
+        }
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            while not pool.empty():
+                pool.get_nowait().close()
+
+
+def decode_body(response: dict) -> str:
+    """Тело ответа как текст (кодировка из Content-Type, иначе UTF-8)"""
+    content_type = response["headers"].get("content-type", "")
+    charset = "utf-8"
+    if "charset=" in content_type:
+        charset = content_type.split("charset=", 1)[1].split(";")[0].strip() or charset
+    return response["body"].decode(charset, errors="replace")
+
+
+class _StdlibPageParser(HTMLParser):
+    """Сбор заголовка, текста, кнопок, селекторов и ресурсов стандартным парсером"""
+
+    # Как в ветке selectolax: текст берется только из body, без скриптов и стилей
+    SKIP_TEXT_TAGS = ("head", "title", "script", "style", "noscript", "template")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.result = {"title": "", "text": [], "buttons": [], "table_headers": [],
+                       "selects": 0, "scripts": [], "stylesheets": []}
+        self._stack = []
+        self._capture = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        self._stack.append(tag)
+        if tag == "select":
+            self.result["selects"] += 1
+        elif tag == "script" and attrs.get("src"):
+            self.result["scripts"].append(attrs["src"])
+        elif tag == "link" and "stylesheet" in (attrs.get("rel") or "").lower() and attrs.get("href"):
+            self.result["stylesheets"].append(attrs["href"])
+        if tag in ("title", "button", "th"):
+            self._capture = (tag, [])
+
+    def handle_endtag(self, tag):
+        if self._capture and self._capture[0] == tag:
+            text = " ".join("".join(self._capture[1]).split())
+            if tag == "title":
+                self.result["title"] = text
+            elif tag == "button":
+                self.result["buttons"].append(text)
+            else:
+                self.result["table_headers"].append(text)
+            self._capture = None
+        if tag in self._stack:
+            while self._stack and self._stack.pop() != tag:
+                pass
+
+    def handle_data(self, data):
+        if self._capture:
+            self._capture[1].append(data)
+        if not any(tag in self.SKIP_TEXT_TAGS for tag in self._stack) and data.strip():
+            self.result["text"].append(data.strip())
+
+
+def _parse_stdlib(html: str) -> dict:
+    parser = _StdlibPageParser()
+    parser.feed(html)
+    parser.close()
+    result = parser.result
+    result["text"] = " ".join(" ".join(result["text"]).split())
+    return result
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _parse_selectolax(html: str) -> dict:
+    tree = FastHTMLParser(html)
+    title = tree.css_first("title")
+    scripts = [node.attributes.get("src") for node in tree.css("script[src]")]
+    stylesheets = [node.attributes.get("href") for node in tree.css("link[rel~=stylesheet][href]")]
+    tree.strip_tags(["script", "style", "noscript", "template"])
+    body = tree.body
+    return {
+        "title": _collapse(title.text()) if title else "",
+        "text": _collapse(body.text(separator=" ")) if body else "",
+        "buttons": [_collapse(node.text()) for node in tree.css("button")],
+        "table_headers": [_collapse(node.text()) for node in tree.css("th")],
+        "selects": len(tree.css("select")),
+        "scripts": scripts,
+        "stylesheets": stylesheets,
+    }
+
+
+def parse_page(html: str) -> dict:
+    """Заголовок, видимый текст, кнопки, заголовки таблиц, количество селекторов, скрипты и стили"""
+    result = _parse_selectolax(html) if FastHTMLParser is not None else _parse_stdlib(html)
+    result["parser"] = "selectolax" if FastHTMLParser is not None else "html.parser"
+    return result
+
+
+def same_origin_assets(page_url: str, parsed: dict) -> list[str]:
+    """Абсолютные URL скриптов и стилей страницы с того же источника"""
+    origin = urlparse(page_url).netloc
+    urls = []
+    for reference in parsed["scripts"] + parsed["stylesheets"]:
+        url = urljoin(page_url, reference)
+        if urlparse(url).netloc == origin and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def page_fingerprint(page_url: str, pool: ConnectionPool = None) -> str | None:
+    """Хэш содержимого страницы (разобранная разметка) и ее скриптов и стилей; None, если страница недоступна"""
+    own_pool = pool is None
+    pool = pool or ConnectionPool()
+    digest = hashlib.sha1()
+    try:
+        response = pool.request(page_url)
+        if response["status"] >= 400:
+            return None
+        parsed = parse_page(decode_body(response))
+        # Разобранная разметка вместо сырого HTML: одноразовые токены в атрибутах не меняют отпечаток
+        digest.update(json.dumps({key: value for key, value in parsed.items() if key != "parser"},
+                                 ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        for url in same_origin_assets(page_url, parsed):
+            asset = pool.request(url)
+            digest.update(f"{url} {asset['status']} ".encode("utf-8"))
+            digest.update(asset["body"])
+    except FETCH_ERRORS:
+        return None
+    finally:
+        if own_pool:
+            pool.close()
+    return digest.hexdigest()
@@ -0,0 +1,178 @@
+"""
+Стресс-режим ввода: быстрые смены тематики и страны и клики "Сгенерировать превью"
+
+Последовательность действий выполняется с заданным интервалом (паузы объекта
+страницы на это время отключаются). Во время прогона записываются все запросы
+(RequestCapture) и пачки изменений DOM (MutationObserver). После прогона проверяется:
+- устаревшие запросы данных отменены или не отправлены (дебаунс) - запрос, во время
+  которого начался такой же запрос, но который все равно дошел до конца, считается
+  лишним;
+- последним завершился самый свежий запрос - иначе на экране может оказаться ответ
+  на устаревший ввод;
+- значения селекторов совпадают с последним вводом.
+"""
+import random
+
+from utils.interaction_latency import percentile
+
+DEFAULT_SEQUENCE_LENGTH = 12
+# После серии действий ждем ответы и отрисовку
+FINAL_SETTLE_MS = 3000
+# Признаки отмененного запроса в Chromium, Firefox и WebKit
+CANCELLED_FAILURES = ("aborted", "cancel", "ns_binding_aborted")
+DATA_RESOURCE_TYPES = ("xhr", "fetch")
+
+OPTION_LABELS_JS = "el => el.options ? Array.from(el.options).slice(1).map(option => option.label.trim()) : []"
+SELECTED_LABEL_JS = """
+el => el.options && el.selectedIndex >= 0 ? el.options[el.selectedIndex].label.trim() : null
+"""
+
+INSTALL_RENDER_LOG_JS = """
+() => {
+    if (window.__renderLog) window.__renderLog.observer.disconnect();
+    const log = {batches: []};
+    log.observer = new MutationObserver(records => log.batches.push({at_ms: performance.now(), records: records.length}));
+    log.observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    window.__renderLog = log;
+    return performance.now();
+}
+"""
+
+COLLECT_RENDER_LOG_JS = """
+() => {
+    const log = window.__renderLog;
+    if (!log) return [];
+    log.observer.disconnect();
+    return log.batches;
+}
+"""
+
+
+def build_sequence(themes: list[str], countries: list[str], length: int = DEFAULT_SEQUENCE_LENGTH,
+                   seed: int = 0) -> list[tuple[str, str | None]]:
+    """Случайная (воспроизводимая) последовательность действий, последним всегда идет генерация превью"""
+    rng = random.Random(seed)
+    kinds = [kind for kind, options in (("theme", themes), ("country", countries)) if options] + ["preview"]
+    sequence = []
+    for _ in range(max(length - 1, 0)):
+        kind = rng.choice(kinds)
+        if kind == "theme":
+            sequence.append(("theme", rng.choice(themes)))
+        elif kind == "country":
+            sequence.append(("country", rng.choice(countries)))
+        else:
+            sequence.append(("preview", None))
+    sequence.append(("preview", None))
+    return sequence
+
+
+def _endpoint(url: str) -> str:
+    return url.split("?", 1)[0]
+
+
+def _is_cancelled(request: dict) -> bool:
+    failure = (request.get("failure") or "").lower()
+    return any(marker in failure for marker in CANCELLED_FAILURES)
+
+
+def analyze_requests(requests: list[dict], inputs: list[dict], renders: list[dict]) -> dict:
+    """Лишние, отмененные и устаревшие запросы данных за прогон"""
+    first_input = inputs[0]["at_ms"] if inputs else 0
+    data = [request for request in requests
+            if request["resource_type"] in DATA_RESOURCE_TYPES and request["start_ms"] >= first_input]
+    wasted, cancelled = [], []
+    for index, request in enumerate(data):
+        newer = [other for other in data[index + 1:] if _endpoint(other["url"]) == _endpoint(request["url"])]
+        if not newer:
+            continue
+        if _is_cancelled(request):
+            cancelled.append(request["url"])
+        elif not request.get("failure") and (request["end_ms"] is None
+                                              or any(other["start_ms"] < request["end_ms"] for other in newer)):
+            # Запрос, завершившийся до начала следующего, - обычная реакция на медленный ввод
+            wasted.append(request["url"])
+
+    # Последний завершившийся запрос к каждому адресу должен быть и последним начатым
+    stale_last_response = []
+    for endpoint in {_endpoint(request["url"]) for request in data}:
+        calls = [request for request in data if _endpoint(request["url"]) == endpoint and request["end_ms"] is not None]
+        if len(calls) > 1 and max(calls, key=lambda call: call["end_ms"]) is not calls[-1]:
+            stale_last_response.append(endpoint)
+
+    inputs_count = len(inputs)
+    last_response = max((request["end_ms"] for request in data if request["end_ms"] is not None), default=None)
+    return {
+        "inputs": inputs_count,
+        "data_requests": len(data),
+        "cancelled_requests": len(cancelled),
+        "wasted_requests": len(wasted),
+        "wasted_urls": wasted[:10],
+        # Ввод, на который не ушел отдельный запрос, считается погашенным дебаунсом
+        "coalesced_inputs": max(inputs_count - len(data), 0),
+        "stale_last_response": sorted(stale_last_response),
+        "render_batches": len(renders),
+        "rendered_after_last_response": (bool(renders) and last_response is not None
+                                         and renders[-1]["at_ms"] >= last_response),
+        "request_ms_p95": percentile([request["end_ms"] - request["start_ms"] for request in data
+                                      if request["end_ms"] is not None], 95),
+    }
+
+
+def _selected_label(selector) -> str | None:
+    try:
+        return selector.evaluate(SELECTED_LABEL_JS)
+    except Exception:
+        return None
+
+
+def run_input_stress(events_page, interval_ms: int, sequence: list[tuple[str, str | None]]) -> dict:
+    """Выполнение последовательности с заданным интервалом между действиями"""
+    page = events_page.page
+    settle_ms = events_page.settle_ms
+    events_page.settle_ms = 0
+    inputs = []
+    events_page.start_request_capture()
+    try:
+        page.evaluate(INSTALL_RENDER_LOG_JS)
+        last = {"theme": None, "country": None}
+        for kind, label in sequence:
+            inputs.append({"action": kind, "label": label, "at_ms": page.evaluate("performance.now()")})
+            if kind == "theme":
+                events_page.select_theme(label)
+            elif kind == "country":
+                events_page.select_country(label)
+            else:
+                events_page.click_generate_preview()
+            if label is not None:
+                last[kind] = label
+            page.wait_for_timeout(interval_ms)
+        page.wait_for_timeout(FINAL_SETTLE_MS)
+        renders = page.evaluate(COLLECT_RENDER_LOG_JS)
+    finally:
+        capture = events_page.stop_request_capture()
+        events_page.settle_ms = settle_ms
+
+    final = {
+        "theme": _selected_label(events_page.theme_selector) if last["theme"] else None,
+        "country": _selected_label(events_page.country_selector) if last["country"] else None,
+    }
+    mismatched = {kind: {"expected": last[kind], "actual": final[kind]}
+                  for kind in last if last[kind] is not None and final[kind] != last[kind]}
+    return {
+        "interval_ms": interval_ms,
+        "sequence": [f"{kind}:{label}" if label else kind for kind, label in sequence],
+        **analyze_requests(capture["requests"], inputs, renders),
+        "final_state": final,
+        "final_state_mismatch": mismatched,
+    }
+
+
+def selector_labels(events_page) -> tuple[list[str], list[str]]:
+    """Подписи опций селекторов тематики и страны (без placeholder)"""
+    labels = []
+    for selector in (events_page.theme_selector, events_page.country_selector):
+        try:
+            labels.append([label for label in selector.evaluate(OPTION_LABELS_JS) if label])
+        except Exception:
+            labels.append([])
+    return labels[0], labels[1]
@@ -0,0 +1,138 @@
+"""
+Задержка взаимодействий (в духе INP): от ввода до следующей отрисовки
+
+Используются два источника: Event Timing API (PerformanceObserver 'event') и
+rAF-маркеры - обработчик в фазе перехвата запоминает время события, а после
+следующего requestAnimationFrame фиксирует момент отрисовки. Event Timing видит
+только доверенные события длительностью от 16 мс, поэтому для select_option
+(синтетические input/change) и быстрых взаимодействий берется rAF-маркер.
+"""
+import math
+
+INTERACTION_EVENTS = ("pointerdown", "pointerup", "click", "keydown", "keyup", "input", "change")
+
+# Установка наблюдателей (идемпотентно) и текущее время страницы - начало взаимодействия
+BEGIN_INTERACTION_JS = """
+(eventTypes) => {
+    if (!window.__interactionLatency) {
+        const state = {events: [], markers: []};
+        window.__interactionLatency = state;
+        try {
+            const observer = new PerformanceObserver(list => {
+                for (const entry of list.getEntries()) {
+                    state.events.push({
+                        name: entry.name,
+                        interaction_id: entry.interactionId || 0,
+                        start: entry.startTime,
+                        duration: entry.duration,
+                        processing_ms: entry.processingEnd - entry.processingStart,
+                        input_delay_ms: entry.processingStart - entry.startTime,
+                    });
+                }
+            });
+            observer.observe({type: 'event', durationThreshold: 16, buffered: true});
+            state.eventTiming = true;
+        } catch (e) {
+            state.eventTiming = false;
+        }
+        for (const type of eventTypes) {
+            window.addEventListener(type, event => {
+                const marker = {name: type, start: performance.now(), next_paint: null};
+                state.markers.push(marker);
+                requestAnimationFrame(() => setTimeout(() => { marker.next_paint = performance.now(); }, 0));
+            }, true);
+        }
+    }
+    return performance.now();
+}
+"""
+
+# Задержка взаимодействия, начавшегося не раньше since: максимум по событиям Event Timing или rAF-маркерам
+END_INTERACTION_JS = """
+(since) => {
+    const state = window.__interactionLatency;
+    if (!state) {
+        return null;
+    }
+    const events = state.events.filter(entry => entry.start >= since);
+    const markers = state.markers.filter(marker => marker.start >= since && marker.next_paint !== null);
+    state.events = state.events.filter(entry => entry.start < since);
+    state.markers = state.markers.filter(marker => marker.start < since);
+    const slowest = events.reduce((max, entry) => (!max || entry.duration > max.duration) ? entry : max, null);
+    const rafLatency = markers.reduce((max, marker) => Math.max(max, marker.next_paint - marker.start), -1);
+    return {
+        event_timing_supported: state.eventTiming,
+        event_timing_ms: slowest ? slowest.duration : null,
+        input_delay_ms: slowest ? slowest.input_delay_ms : null,
+        processing_ms: slowest ? slowest.processing_ms : null,
+        raf_ms: rafLatency >= 0 ? rafLatency : null,
+        events: markers.map(marker => marker.name),
+    };
+}
+"""
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Перцентиль с линейной интерполяцией (q от 0 до 100)"""
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize_latencies(samples: list[dict]) -> dict:
+    """Перцентили задержки по элементам управления: {control: {count, p50, p75, p95, max}}"""
+    by_control = {}
+    for sample in samples:
+        by_control.setdefault(sample["control"], []).append(sample["latency_ms"])
+    return {
+        control: {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p75": percentile(values, 75),
+            "p95": percentile(values, 95),
+            "max": max((value for value in values if value is not None), default=None),
+        }
+        for control, values in by_control.items()
+    }
+
+
+class InteractionLatencyMeter:
+    """Замер задержки каждого взаимодействия объекта страницы
+
+    begin() вызывается перед действием, end(control) - после ожидания результата;
+    ошибки замера не влияют на само взаимодействие.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.samples = []
+        self._since = None
+
+    def begin(self):
+        try:
+            self._since = self.page.evaluate(BEGIN_INTERACTION_JS, list(INTERACTION_EVENTS))
+        except Exception:
+            self._since = None
+
+    def end(self, control: str) -> dict | None:
+        if self._since is None:
+            return None
+        try:
+            result = self.page.evaluate(END_INTERACTION_JS, self._since)
+        except Exception:
+            result = None
+        finally:
+            self._since = None
+        if not result or (result["event_timing_ms"] is None and result["raf_ms"] is None):
+            return None
+        # Event Timing точнее (учитывает задержку ввода и отрисовку), rAF - запасной вариант
+        if result["event_timing_ms"] is not None:
+            latency, source = result["event_timing_ms"], "event-timing"
+        else:
+            latency, source = result["raf_ms"], "raf"
+        sample = {"control": control, "latency_ms": round(latency, 1), "source": source, **result}
+        self.samples.append(sample)
+        return sample
@@ -0,0 +1,232 @@
+"""
+Сдвиги раскладки и перекомпоновки за одно взаимодействие
+
+За время действия записываются:
+- записи layout-shift с узлами-источниками и их прямоугольниками до/после (Chromium);
+- снимки прямоугольников текстовых элементов до и после действия - какие элементы
+  сдвинулись, изменили размер и с какими начали пересекаться (во всех браузерах);
+- количество и длительность Layout / UpdateLayoutTree по кадрам из трассировки Chromium.
+"""
+import bisect
+import json
+from contextlib import contextmanager
+
+# Сдвиг или изменение размера меньше порога (px) не учитывается
+MOVE_THRESHOLD_PX = 1
+# Пересечение меньше этой площади (px^2) считается касанием
+OVERLAP_MIN_AREA = 4
+SNAPSHOT_LIMIT = 400
+TRACE_CATEGORIES = ["devtools.timeline", "disabled-by-default-devtools.timeline.frame"]
+
+INSTALL_LAYOUT_SHIFT_OBSERVER_JS = """
+() => {
+    const describe = node => {
+        if (!node || node.nodeType !== 1) return node ? node.nodeName.toLowerCase() : null;
+        let name = node.tagName.toLowerCase();
+        if (node.id) name += '#' + node.id;
+        if (typeof node.className === 'string' && node.className.trim()) {
+            name += '.' + node.className.trim().split(/\\s+/).slice(0, 2).join('.');
+        }
+        const text = (node.textContent || '').trim().slice(0, 30);
+        return text ? `${name} "${text}"` : name;
+    };
+    const rect = r => r ? {x: r.x, y: r.y, width: r.width, height: r.height} : null;
+    if (!window.__layoutShifts) {
+        window.__layoutShifts = {entries: [], supported: false};
+        try {
+            new PerformanceObserver(list => {
+                for (const entry of list.getEntries()) {
+                    window.__layoutShifts.entries.push({
+                        start_ms: entry.startTime,
+                        value: entry.value,
+                        had_recent_input: entry.hadRecentInput,
+                        sources: (entry.sources || []).map(source => ({
+                            node: describe(source.node),
+                            previous: rect(source.previousRect),
+                            current: rect(source.currentRect),
+                        })),
+                    });
+                }
+            }).observe({type: 'layout-shift', buffered: false});
+            window.__layoutShifts.supported = true;
+        } catch (e) {}
+    }
+    return performance.now();
+}
+"""
+
+COLLECT_LAYOUT_SHIFTS_JS = """
+(since) => {
+    const state = window.__layoutShifts || {entries: [], supported: false};
+    return {supported: state.supported, entries: state.entries.filter(entry => entry.start_ms >= since)};
+}
+"""
+
+# Прямоугольники видимых элементов с собственным текстом; ключ - путь tag:nth-of-type от body
+SNAPSHOT_TEXT_RECTS_JS = """
+(limit) => {
+    const path = el => {
+        const parts = [];
+        while (el && el !== document.body) {
+            let index = 1;
+            for (let sibling = el.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+                if (sibling.tagName === el.tagName) index++;
+            }
+            parts.unshift(`${el.tagName.toLowerCase()}:${index}`);
+            el = el.parentElement;
+        }
+        return parts.join('>');
+    };
+    const result = [];
+    for (const el of document.body.querySelectorAll('*')) {
+        const ownText = Array.from(el.childNodes)
+            .filter(node => node.nodeType === 3)
+            .map(node => node.textContent.trim())
+            .join(' ');
+        if (!ownText) continue;
+        const r = el.getBoundingClientRect();
+        if (r.width === 0 || r.height === 0) continue;
+        result.push({key: path(el), label: `${el.tagName.toLowerCase()} "${ownText.slice(0, 30)}"`,
+                     x: r.x + scrollX, y: r.y + scrollY, width: r.width, height: r.height});
+        if (result.length >= limit) break;
+    }
+    return result;
+}
+"""
+
+
+def _intersection_area(a: dict, b: dict) -> float:
+    width = min(a["x"] + a["width"], b["x"] + b["width"]) - max(a["x"], b["x"])
+    height = min(a["y"] + a["height"], b["y"] + b["height"]) - max(a["y"], b["y"])
+    return width * height if width > 0 and height > 0 else 0
+
+
+def _contains(a: dict, b: dict) -> bool:
+    return (a["x"] <= b["x"] and a["y"] <= b["y"]
+            and a["x"] + a["width"] >= b["x"] + b["width"] and a["y"] + a["height"] >= b["y"] + b["height"])
+
+
+def overlapping_pairs(rects: list[dict]) -> set[tuple[str, str]]:
+    """Пары текстовых элементов, которые пересекаются, но не вложены друг в друга"""
+    pairs = set()
+    for index, first in enumerate(rects):
+        for second in rects[index + 1:]:
+            if _intersection_area(first, second) < OVERLAP_MIN_AREA:
+                continue
+            if _contains(first, second) or _contains(second, first):
+                continue
+            pairs.add(tuple(sorted((first["key"], second["key"]))))
+    return pairs
+
+
+def diff_text_rects(before: list[dict], after: list[dict]) -> dict:
+    """Сдвинутые, измененные, исчезнувшие элементы и новые пересечения текста"""
+    old = {rect["key"]: rect for rect in before}
+    new = {rect["key"]: rect for rect in after}
+    moved, resized = [], []
+    for key, rect in new.items():
+        previous = old.get(key)
+        if previous is None:
+            continue
+        dx, dy = rect["x"] - previous["x"], rect["y"] - previous["y"]
+        dw, dh = rect["width"] - previous["width"], rect["height"] - previous["height"]
+        if abs(dx) > MOVE_THRESHOLD_PX or abs(dy) > MOVE_THRESHOLD_PX:
+            moved.append({"element": rect["label"], "dx": round(dx, 1), "dy": round(dy, 1)})
+        if abs(dw) > MOVE_THRESHOLD_PX or abs(dh) > MOVE_THRESHOLD_PX:
+            resized.append({"element": rect["label"], "dw": round(dw, 1), "dh": round(dh, 1)})
+    labels = {**{key: rect["label"] for key, rect in old.items()}, **{key: rect["label"] for key, rect in new.items()}}
+    new_overlaps = overlapping_pairs(after) - overlapping_pairs(before)
+    return {
+        "moved": moved,
+        "resized": resized,
+        "appeared": [new[key]["label"] for key in new.keys() - old.keys()],
+        "vanished": [old[key]["label"] for key in old.keys() - new.keys()],
+        "new_overlaps": [[labels[first], labels[second]] for first, second in sorted(new_overlaps)],
+    }
+
+
+def layout_work_per_frame(trace: dict | list) -> dict:
+    """Число и длительность Layout / UpdateLayoutTree по кадрам (BeginFrame) трассировки Chromium"""
+    events = trace.get("traceEvents", []) if isinstance(trace, dict) else trace
+    work = [event for event in events
+            if event.get("name") in ("Layout", "UpdateLayoutTree") and event.get("ph") == "X"]
+    if not work:
+        return {"frames": [], "layout_count": 0, "layout_ms": 0, "recalc_style_count": 0, "recalc_style_ms": 0}
+    renderer_pids = {event["pid"] for event in work}
+    frame_starts = sorted({event["ts"] for event in events
+                           if event.get("name") == "BeginFrame" and event.get("pid") in renderer_pids})
+    origin = min([event["ts"] for event in work] + frame_starts[:1])
+    frames = {}
+    for event in work:
+        index = bisect.bisect_right(frame_starts, event["ts"])
+        frame = frames.setdefault(index, {
+            "frame": index,
+            "offset_ms": round(((frame_starts[index - 1] if index else origin) - origin) / 1000, 2),
+            "layouts": 0, "layout_ms": 0.0, "recalc_styles": 0, "recalc_style_ms": 0.0,
+        })
+        duration_ms = event.get("dur", 0) / 1000
+        if event["name"] == "Layout":
+            frame["layouts"] += 1
+            frame["layout_ms"] = round(frame["layout_ms"] + duration_ms, 3)
+        else:
+            frame["recalc_styles"] += 1
+            frame["recalc_style_ms"] = round(frame["recalc_style_ms"] + duration_ms, 3)
+    frames = [frames[index] for index in sorted(frames)]
+    return {
+        "frames": frames,
+        "layout_count": sum(frame["layouts"] for frame in frames),
+        "layout_ms": round(sum(frame["layout_ms"] for frame in frames), 3),
+        "recalc_style_count": sum(frame["recalc_styles"] for frame in frames),
+        "recalc_style_ms": round(sum(frame["recalc_style_ms"] for frame in frames), 3),
+    }
+
+
+class LayoutShiftRecorder:
+    """Запись сдвигов и перекомпоновок за одно действие (контекстный менеджер record)"""
+
+    def __init__(self, page):
+        self.page = page
+
+    def _start_tracing(self) -> bool:
+        try:
+            browser = self.page.context.browser
+            if browser.browser_type.name != "chromium":
+                return False
+            browser.start_tracing(page=self.page, categories=TRACE_CATEGORIES)
+            return True
+        except Exception:
+            return False
+
+    def _stop_tracing(self) -> dict | None:
+        try:
+            return json.loads(self.page.context.browser.stop_tracing())
+        except Exception:
+            return None
+
+    @contextmanager
+    def record(self, name: str):
+        """Запись на время блока кода; словарь результата заполняется при выходе из блока"""
+        result = {"action": name}
+        try:
+            since = self.page.evaluate(INSTALL_LAYOUT_SHIFT_OBSERVER_JS)
+            before = self.page.evaluate(SNAPSHOT_TEXT_RECTS_JS, SNAPSHOT_LIMIT)
+        except Exception:
+            since, before = None, []
+        tracing = self._start_tracing()
+        try:
+            yield result
+        finally:
+            trace = self._stop_tracing() if tracing else None
+            try:
+                shifts = self.page.evaluate(COLLECT_LAYOUT_SHIFTS_JS, since) if since is not None else None
+                after = self.page.evaluate(SNAPSHOT_TEXT_RECTS_JS, SNAPSHOT_LIMIT)
+            except Exception:
+                shifts, after = None, []
+            shifts = shifts or {"supported": False, "entries": []}
+            result.update({
+                "layout_shift_supported": shifts["supported"],
+                "shift_score": round(sum(entry["value"] for entry in shifts["entries"]), 4),
+                "shifts": shifts["entries"],
+                "elements": diff_text_rects(before, after),
+                "layout_work": layout_work_per_frame(trace) if trace else None,
+            })
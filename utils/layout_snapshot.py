@@ -0,0 +1,264 @@
+"""
+Компактные снимки раскладки страницы и их сравнение
+
+Снимок снимается одним page.evaluate: обход DOM собирает для каждого отрисованного
+элемента сегмент стабильного пути (tag#id или tag:nth-of-type(k)) и числовые поля
+(FIELDS) - координаты и размеры в координатах страницы, метрики шрифта и флаги
+видимости. Числа хранятся в array('i') по FIELD_COUNT на элемент, пути - как сегмент
+плюс индекс родителя; encode_snapshot сжимает снимок zlib (несколько КБ на страницу).
+Элементы без рамки (display: contents, нулевой размер) в снимок не попадают, но их
+сегменты входят в сегменты потомков, чтобы пути оставались однозначными.
+
+diff_snapshots сравнивает снимки разных прогонов или браузеров по стабильным путям:
+сдвинутые, изменившие размер, исчезнувшие и появившиеся элементы, смена шрифта и
+новые наложения текста. Это дешевая первая проверка перед сравнением скриншотов.
+"""
+import json
+import sys
+import zlib
+from array import array
+from pathlib import Path
+
+# Версия 2: сегменты пропущенных контейнеров входят в пути потомков
+FORMAT_VERSION = 2
+FIELDS = ("parent", "x", "y", "width", "height", "font", "font_size", "line_height", "font_weight", "flags")
+FIELD_COUNT = len(FIELDS)
+# Флаги: элемент виден (visibility и opacity), содержит собственный текст
+FLAG_VISIBLE = 1
+FLAG_TEXT = 2
+MAX_ELEMENTS = 5000
+DEFAULT_TOLERANCE_PX = 2
+# Между браузерами раскладка расходится сильнее (шрифты, сглаживание)
+CROSS_BROWSER_TOLERANCE_PX = 6
+# Наложения меньшей площади - соприкосновение границ, а не перекрытие текста
+MIN_OVERLAP_AREA_PX = 16
+MAX_REPORTED = 20
+
+LAYOUT_SNAPSHOT_JS = """
+({rootSelector, maxElements}) => {
+    const root = (rootSelector && document.querySelector(rootSelector)) || document.body;
+    const fonts = [], fontIndex = new Map();
+    const segments = [], values = [];
+    const scrollX = window.scrollX, scrollY = window.scrollY;
+    const fontId = family => {
+        if (!fontIndex.has(family)) {
+            fontIndex.set(family, fonts.length);
+            fonts.push(family);
+        }
+        return fontIndex.get(family);
+    };
+    const segment = el => {
+        const tag = el.tagName.toLowerCase();
+        if (el.id && !/\\d{3,}/.test(el.id)) return tag + '#' + el.id;
+        let index = 1;
+        for (let sibling = el.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+            if (sibling.tagName === el.tagName) index++;
+        }
+        return tag + ':nth-of-type(' + index + ')';
+    };
+    const walk = (el, parent, prefix) => {
+        if (segments.length >= maxElements) return;
+        const style = getComputedStyle(el);
+        if (style.display === 'none') return;
+        const rect = el.getBoundingClientRect();
+        let index = parent;
+        let childPrefix = prefix + segment(el) + '/';
+        if (style.display !== 'contents' && rect.width > 0 && rect.height > 0) {
+            index = segments.length;
+            segments.push(prefix + segment(el));
+            childPrefix = '';
+            const ownText = Array.from(el.childNodes).some(node => node.nodeType === 3 && node.textContent.trim());
+            const visible = style.visibility === 'visible' && parseFloat(style.opacity) > 0;
+            const lineHeight = parseFloat(style.lineHeight);
+            values.push(
+                parent,
+                Math.round(rect.left + scrollX), Math.round(rect.top + scrollY),
+                Math.round(rect.width), Math.round(rect.height),
+                fontId(style.fontFamily.split(',')[0].trim().replace(/["']/g, '')),
+                Math.round(parseFloat(style.fontSize) * 10),
+                isNaN(lineHeight) ? 0 : Math.round(lineHeight * 10),
+                parseInt(style.fontWeight, 10) || 400,
+                (visible ? 1 : 0) | (ownText ? 2 : 0),
+            );
+        }
+        for (const child of el.children) walk(child, index, childPrefix);
+    };
+    walk(root, -1, '');
+    return {
+        url: location.href,
+        viewport: [window.innerWidth, window.innerHeight],
+        truncated: segments.length >= maxElements,
+        segments, fonts, values,
+    };
+}
+"""
+
+
+def _full_paths(segments: list[str], values: array) -> list[str]:
+    """Полные пути элементов из сегментов и индексов родителей (родитель всегда раньше потомка)
+
+    Совпавшие пути (повторяющийся id в разметке) получают порядковый суффикс ~2, ~3...
+    """
+    paths = []
+    seen = {}
+    for index, segment in enumerate(segments):
+        parent = values[index * FIELD_COUNT]
+        path = f"{paths[parent]}/{segment}" if parent >= 0 else segment
+        seen[path] = seen.get(path, 0) + 1
+        paths.append(path if seen[path] == 1 else f"{path}~{seen[path]}")
+    return paths
+
+
+def _build(raw: dict) -> dict:
+    values = array("i", raw["values"])
+    return {
+        "version": raw.get("version", FORMAT_VERSION),
+        "url": raw["url"],
+        "viewport": list(raw["viewport"]),
+        "truncated": raw.get("truncated", False),
+        "segments": raw["segments"],
+        "fonts": raw["fonts"],
+        "values": values,
+        "paths": _full_paths(raw["segments"], values),
+    }
+
+
+def take_layout_snapshot(page, root_selector: str = None, max_elements: int = MAX_ELEMENTS) -> dict | None:
+    """Снимок раскладки страницы (или поддерева root_selector) одним evaluate"""
+    try:
+        raw = page.evaluate(LAYOUT_SNAPSHOT_JS, {"rootSelector": root_selector, "maxElements": max_elements})
+    except Exception:
+        return None
+    return _build(raw)
+
+
+def encode_snapshot(snapshot: dict) -> bytes:
+    """Сжатое представление: JSON-заголовок, перевод строки и int32 little-endian"""
+    header = {name: snapshot[name] for name in ("version", "url", "viewport", "truncated", "segments", "fonts")}
+    values = array("i", snapshot["values"])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return zlib.compress(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + values.tobytes(), 9)
+
+
+def decode_snapshot(data: bytes) -> dict:
+    """Снимок из encode_snapshot"""
+    header, _, body = zlib.decompress(data).partition(b"\n")
+    header = json.loads(header)
+    values = array("i")
+    values.frombytes(body)
+    if sys.byteorder == "big":
+        values.byteswap()
+    header["values"] = values
+    return _build(header)
+
+
+def save_snapshot(directory: Path, name: str, snapshot: dict) -> int:
+    """Сохранение снимка в каталог; возвращает размер файла в байтах"""
+    data = encode_snapshot(snapshot)
+    (Path(directory) / f"{name}.layout").write_bytes(data)
+    return len(data)
+
+
+def load_snapshot(directory: Path, name: str) -> dict | None:
+    """Сохраненный снимок или None, если его нет или он поврежден"""
+    path = Path(directory) / f"{name}.layout"
+    try:
+        snapshot = decode_snapshot(path.read_bytes())
+    except (OSError, ValueError, zlib.error):
+        return None
+    # Пути снимков другой версии не сравнимы с текущими
+    return snapshot if snapshot["version"] == FORMAT_VERSION else None
+
+
+def element(snapshot: dict, index: int) -> dict:
+    """Поля одного элемента снимка по имени"""
+    start = index * FIELD_COUNT
+    record = dict(zip(FIELDS, snapshot["values"][start:start + FIELD_COUNT]))
+    record["path"] = snapshot["paths"][index]
+    record["font"] = snapshot["fonts"][record["font"]]
+    return record
+
+
+def _box(values: array, index: int) -> tuple[int, int, int, int]:
+    start = index * FIELD_COUNT + 1
+    return values[start], values[start + 1], values[start + 2], values[start + 3]
+
+
+def _is_ancestor(values: array, ancestor: int, index: int) -> bool:
+    parent = values[index * FIELD_COUNT]
+    while parent > ancestor:
+        parent = values[parent * FIELD_COUNT]
+    return parent == ancestor
+
+
+def find_overlaps(snapshot: dict, min_area: int = MIN_OVERLAP_AREA_PX) -> list[tuple[str, str, int]]:
+    """Пересечения видимых элементов с собственным текстом (кроме предка с потомком)"""
+    values = snapshot["values"]
+    flags = FIELDS.index("flags")
+    text_mask = FLAG_VISIBLE | FLAG_TEXT
+    candidates = sorted(
+        (index for index in range(len(snapshot["segments"]))
+         if values[index * FIELD_COUNT + flags] & text_mask == text_mask),
+        key=lambda index: values[index * FIELD_COUNT + 1],
+    )
+    overlaps, active = [], []
+    # Заметание по оси X: сравниваются только элементы с пересекающимися проекциями
+    for index in candidates:
+        x, y, width, height = _box(values, index)
+        active = [other for other in active if _box(values, other)[0] + _box(values, other)[2] > x]
+        for other in active:
+            ox, oy, owidth, oheight = _box(values, other)
+            overlap_w = min(x + width, ox + owidth) - x
+            overlap_h = min(y + height, oy + oheight) - max(y, oy)
+            if overlap_w <= 0 or overlap_h <= 0 or overlap_w * overlap_h < min_area:
+                continue
+            first, second = min(index, other), max(index, other)
+            if _is_ancestor(values, first, second):
+                continue
+            overlaps.append((snapshot["paths"][first], snapshot["paths"][second], overlap_w * overlap_h))
+        active.append(index)
+    return overlaps
+
+
+def diff_snapshots(base: dict, current: dict, tolerance: int = DEFAULT_TOLERANCE_PX) -> dict:
+    """Различия раскладки между двумя снимками по стабильным путям элементов"""
+    base_index = {path: index for index, path in enumerate(base["paths"])}
+    current_index = {path: index for index, path in enumerate(current["paths"])}
+    moved, resized, font_changed = [], [], []
+    for path, index in current_index.items():
+        previous = base_index.get(path)
+        if previous is None:
+            continue
+        x, y, width, height = _box(current["values"], index)
+        bx, by, bwidth, bheight = _box(base["values"], previous)
+        if abs(width - bwidth) > tolerance or abs(height - bheight) > tolerance:
+            resized.append({"path": path, "from": [bwidth, bheight], "to": [width, height]})
+        elif abs(x - bx) > tolerance or abs(y - by) > tolerance:
+            moved.append({"path": path, "dx": x - bx, "dy": y - by})
+        old, new = element(base, previous), element(current, index)
+        if (old["font"], old["font_size"], old["font_weight"]) != (new["font"], new["font_size"], new["font_weight"]):
+            font_changed.append({"path": path,
+                                 "from": f"{old['font']} {old['font_size'] / 10}px {old['font_weight']}",
+                                 "to": f"{new['font']} {new['font_size'] / 10}px {new['font_weight']}"})
+    flags = FIELDS.index("flags")
+    vanished = [path for path, index in base_index.items()
+                if path not in current_index and base["values"][index * FIELD_COUNT + flags] & FLAG_VISIBLE]
+    appeared = [path for path in current_index if path not in base_index]
+    base_overlaps = {(first, second) for first, second, _ in find_overlaps(base)}
+    new_overlaps = [{"elements": [first, second], "area_px": area}
+                    for first, second, area in find_overlaps(current) if (first, second) not in base_overlaps]
+    return {
+        "base_url": base["url"],
+        "viewport": [base["viewport"], current["viewport"]],
+        "elements": [len(base["paths"]), len(current["paths"])],
+        "tolerance_px": tolerance,
+        "counts": {"moved": len(moved), "resized": len(resized), "vanished": len(vanished),
+                   "appeared": len(appeared), "font_changed": len(font_changed), "new_overlaps": len(new_overlaps)},
+        "moved": moved[:MAX_REPORTED],
+        "resized": resized[:MAX_REPORTED],
+        "vanished": vanished[:MAX_REPORTED],
+        "appeared": appeared[:MAX_REPORTED],
+        "font_changed": font_changed[:MAX_REPORTED],
+        "new_overlaps": new_overlaps[:MAX_REPORTED],
+    }
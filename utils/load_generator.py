@@ -0,0 +1,303 @@
+"""
+Синтетическая нагрузка: N одновременных пользователей проходят сценарий генератора виджета
+
+Каждый виртуальный пользователь - отдельный поток со своим sync_playwright,
+подключенный к общему серверу браузера (utils.browser_server), и отдельный
+контекст браузера. Сценарий: navigate -> select_theme -> select_country ->
+click_generate_preview с паузами "на раздумье" между шагами.
+
+    python -m utils.load_generator --users 20 --ramp-up 30 --iterations 3 --stand-in
+    python -m utils.load_generator --users 5 --base-url https://dev.3snet.info --json load.json
+
+Шаги с фиксированными ожиданиями объекта страницы (1-2 с) отражаются в wall_ms;
+server_ms - время самого долгого запроса шага, по нему видна деградация бэкенда.
+Память процессов браузера ограничивается --max-browser-memory-mb: при достижении
+лимита новые пользователи не запускаются, при превышении на 25% прогон останавливается.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+from pages.events_widget_page import EventsWidgetPage
+from utils.browser_server import BrowserServerLease, ensure_server, server_pid
+from utils.interaction_latency import percentile
+from utils.stand_in_server import StandInServer
+
+STEPS = (
+    ("navigate", lambda events_page: events_page.navigate()),
+    ("select_theme", lambda events_page: events_page.select_theme()),
+    ("select_country", lambda events_page: events_page.select_country()),
+    ("generate_preview", lambda events_page: events_page.click_generate_preview()),
+)
+MEMORY_POLL_INTERVAL = 1.0
+# Превышение лимита памяти, при котором прогон останавливается
+MEMORY_HARD_LIMIT_FACTOR = 1.25
+
+
+def process_tree_rss_mb(root_pid: int) -> float | None:
+    """Суммарный RSS процесса и всех его потомков (Linux, /proc), МБ"""
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+    children = {}
+    rss_kb = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            # Имя процесса в скобках может содержать пробелы
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            status = (entry / "status").read_text()
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                rss_kb[int(entry.name)] = int(line.split()[1])
+                break
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss_kb.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return round(total / 1024, 1)
+
+
+class MemoryGuard(threading.Thread):
+    """Фоновый замер памяти процессов сервера браузера и реакция на превышение лимита"""
+
+    def __init__(self, root_pid: int, limit_mb: float | None, stop_event: threading.Event):
+        super().__init__(name="memory-guard", daemon=True)
+        self.root_pid = root_pid
+        self.limit_mb = limit_mb
+        self.stop_event = stop_event
+        self.limit_reached = threading.Event()
+        self.peak_mb = 0.0
+        self._finished = threading.Event()
+
+    def run(self):
+        while not self._finished.wait(MEMORY_POLL_INTERVAL):
+            rss = process_tree_rss_mb(self.root_pid)
+            if rss is None:
+                return
+            self.peak_mb = max(self.peak_mb, rss)
+            if self.limit_mb and rss >= self.limit_mb:
+                self.limit_reached.set()
+                if rss >= self.limit_mb * MEMORY_HARD_LIMIT_FACTOR:
+                    self.stop_event.set()
+
+    def finish(self):
+        self._finished.set()
+
+
+def _first_line(error: Exception) -> str:
+    return (str(error).splitlines() or [type(error).__name__])[0]
+
+
+def _run_step(events_page: EventsWidgetPage, name: str, action) -> dict:
+    """Один шаг сценария: время, самый долгий запрос, ошибки"""
+    requests = []
+    on_request = requests.append
+    events_page.page.on("requestfinished", on_request)
+    events_page.page.on("requestfailed", on_request)
+    error = None
+    started = time.monotonic()
+    try:
+        action(events_page)
+    except Exception as e:
+        error = _first_line(e)
+    wall_ms = (time.monotonic() - started) * 1000
+    events_page.page.remove_listener("requestfinished", on_request)
+    events_page.page.remove_listener("requestfailed", on_request)
+
+    server_ms = None
+    for request in requests:
+        try:
+            if request.failure:
+                error = error or f"{request.url}: {request.failure}"
+                continue
+            response = request.response()
+            if response is not None and response.status >= 500:
+                error = error or f"{request.url}: HTTP {response.status}"
+            response_end = request.timing.get("responseEnd", -1)
+            if response_end >= 0:
+                server_ms = max(server_ms or 0, response_end)
+        except Exception:
+            continue
+    return {"step": name, "wall_ms": round(wall_ms, 1), "server_ms": server_ms,
+            "requests": len(requests), "error": error}
+
+
+def run_virtual_user(user_id: int, browser_name: str, ws_endpoint: str, base_url: str | None,
+                     iterations: int, think_time: float, start_delay: float,
+                     stop_event: threading.Event, guard: MemoryGuard, results: list):
+    """Поток виртуального пользователя"""
+    from playwright.sync_api import sync_playwright
+
+    if stop_event.wait(start_delay) or guard.limit_reached.is_set():
+        return
+    with sync_playwright() as playwright:
+        browser = context = None
+        try:
+            browser = getattr(playwright, browser_name).connect(ws_endpoint)
+            context = browser.new_context(viewport={"width": 1920, "height": 1080}, locale="ru-RU")
+            events_page = EventsWidgetPage(context.new_page(), base_url)
+            for iteration in range(iterations):
+                for name, action in STEPS:
+                    if stop_event.is_set():
+                        return
+                    record = _run_step(events_page, name, action)
+                    record.update({"user": user_id, "iteration": iteration})
+                    results.append(record)
+                    # Пауза "на раздумье" +-50%, чтобы пользователи не шли в ногу
+                    stop_event.wait(think_time * random.uniform(0.5, 1.5))
+        except Exception as e:
+            results.append({"step": "session", "user": user_id, "error": _first_line(e),
+                            "wall_ms": None, "server_ms": None, "requests": 0})
+        finally:
+            if context is not None:
+                try:
+                    context.close()
+                except Exception:
+                    pass
+            if browser is not None:
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+
+
+def summarize_load(records: list[dict], duration_s: float) -> dict:
+    """Пропускная способность, доля ошибок и перцентили времени по шагам"""
+    steps = {}
+    for name, _ in STEPS:
+        step_records = [record for record in records if record["step"] == name]
+        if not step_records:
+            continue
+        wall = [record["wall_ms"] for record in step_records]
+        server = [record["server_ms"] for record in step_records]
+        errors = sum(1 for record in step_records if record["error"])
+        steps[name] = {
+            "count": len(step_records),
+            "errors": errors,
+            "error_rate": round(errors / len(step_records), 4),
+            **{f"wall_p{q}": percentile(wall, q) for q in (50, 95, 99)},
+            **{f"server_p{q}": percentile(server, q) for q in (50, 95, 99)},
+        }
+    flows = sum(1 for record in records if record["step"] == STEPS[-1][0] and not record["error"])
+    errors = [record for record in records if record["error"]]
+    return {
+        "duration_s": round(duration_s, 1),
+        "completed_flows": flows,
+        "throughput_flows_per_min": round(flows / duration_s * 60, 2) if duration_s else None,
+        "steps_per_s": round(len(records) / duration_s, 2) if duration_s else None,
+        "error_rate": round(len(errors) / len(records), 4) if records else None,
+        "steps": steps,
+        "sample_errors": sorted({record["error"] for record in errors})[:10],
+    }
+
+
+def run_load(users: int, ramp_up: float, iterations: int, think_time: float, browser_name: str,
+             base_url: str | None, max_memory_mb: float | None) -> dict:
+    """Нагрузочный прогон; возвращает сводку"""
+    ws_endpoint = ensure_server(browser_name)
+    lease = BrowserServerLease(browser_name).acquire()
+    stop_event = threading.Event()
+    guard = MemoryGuard(server_pid(browser_name) or os.getpid(), max_memory_mb, stop_event)
+    guard.start()
+    results = []
+    threads = [
+        threading.Thread(
+            target=run_virtual_user,
+            args=(user_id, browser_name, ws_endpoint, base_url, iterations, think_time,
+                  ramp_up * user_id / users, stop_event, guard, results),
+            name=f"virtual-user-{user_id}",
+            daemon=True,
+        )
+        for user_id in range(users)
+    ]
+    started = time.monotonic()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=30)
+    finally:
+        guard.finish()
+        lease.release()
+    summary = summarize_load(results, time.monotonic() - started)
+    summary.update({
+        "users": users,
+        "users_started": len({record["user"] for record in results}),
+        "browser": browser_name,
+        "base_url": base_url,
+        "peak_browser_memory_mb": guard.peak_mb,
+        "memory_limit_reached": guard.limit_reached.is_set(),
+        "stopped_by_memory": stop_event.is_set() and guard.limit_reached.is_set(),
+    })
+    return summary
+
+
+def print_summary(summary: dict):
+    print(f"\nПользователей: {summary['users_started']}/{summary['users']}, {summary['browser']}, "
+          f"{summary['duration_s']} с, пик памяти браузера {summary['peak_browser_memory_mb']} МБ")
+    print(f"Завершенных сценариев: {summary['completed_flows']} "
+          f"({summary['throughput_flows_per_min']} в минуту), доля ошибок: {summary['error_rate']}")
+    print(f"{'шаг':<18}{'кол-во':>8}{'ошибки':>8}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'сервер p95':>12}")
+    for name, stats in summary["steps"].items():
+        values = [stats["wall_p50"], stats["wall_p95"], stats["wall_p99"]]
+        line = f"{name:<18}{stats['count']:>8}{stats['errors']:>8}"
+        line += "".join(f"{value:>10.0f}" if value is not None else f"{'-':>10}" for value in values)
+        line += f"{stats['server_p95']:>12.0f}" if stats["server_p95"] is not None else f"{'-':>12}"
+        print(line)
+    for error in summary["sample_errors"]:
+        print(f"  ошибка: {error}")
+    if summary["error_rate"] is None:
+        print("Ни один шаг сценария не выполнен: результатов нет")
+    if summary["memory_limit_reached"]:
+        print("Достигнут лимит памяти браузера: часть пользователей не запущена"
+              + (", прогон остановлен" if summary["stopped_by_memory"] else ""))
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Синтетическая нагрузка на генератор виджета")
+    parser.add_argument("--users", type=int, default=10, help="Количество одновременных пользователей")
+    parser.add_argument("--ramp-up", type=float, default=10, help="За сколько секунд запускаются все пользователи")
+    parser.add_argument("--iterations", type=int, default=3, help="Сколько раз каждый пользователь проходит сценарий")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Пауза между шагами, секунды")
+    parser.add_argument("--browser", default="chromium", choices=["chromium", "firefox", "webkit"])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None, help="Стенд (по умолчанию https://dev.3snet.info)")
+    target.add_argument("--stand-in", action="store_true", help="Запустить локальную замену страницы")
+    parser.add_argument("--stand-in-latency-ms", type=float, default=100, help="Задержка API локальной замены")
+    parser.add_argument("--max-browser-memory-mb", type=float, default=None, help="Лимит памяти процессов браузера")
+    parser.add_argument("--json", default=None, help="Сохранить сводку в JSON")
+    args = parser.parse_args(argv)
+
+    stand_in = StandInServer(latency_ms=args.stand_in_latency_ms).start() if args.stand_in else None
+    base_url = stand_in.base_url if stand_in else args.base_url
+    try:
+        summary = run_load(args.users, args.ramp_up, args.iterations, args.think_time,
+                           args.browser, base_url, args.max_browser_memory_mb)
+    finally:
+        if stand_in is not None:
+            stand_in.stop()
+    print_summary(summary)
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Пустой прогон (error_rate None) - тоже провал: нагрузка не была подана
+    return 0 if summary["error_rate"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Профилирование главного потока во время действия объекта страницы
+
+Во время действия собираются длинные задачи (PerformanceObserver 'longtask'),
+длинные кадры анимации с атрибуцией скриптов ('long-animation-frame'), время
+сетевых запросов и, в Chromium, CPU-профиль CDP Profiler с топом функций по
+собственному времени. По соотношению сети и занятости главного потока видно,
+где тратится время: на бэкенде или в отрисовке на клиенте.
+"""
+import time
+from contextlib import contextmanager
+
+# Длинная задача блокирует поток сверх этого порога (как в Total Blocking Time)
+BLOCKING_THRESHOLD_MS = 50
+TOP_FUNCTIONS = 10
+# Служебные узлы CPU-профиля, не относящиеся к коду страницы
+IGNORED_PROFILE_NODES = ("(idle)", "(root)", "(program)")
+
+INSTALL_LONG_TASK_OBSERVER_JS = """
+() => {
+    if (!window.__mainThreadProfile) {
+        const state = {longtasks: [], frames: [], supported: []};
+        window.__mainThreadProfile = state;
+        const observe = (type, handler) => {
+            try {
+                new PerformanceObserver(list => list.getEntries().forEach(handler))
+                    .observe({type, buffered: true});
+                state.supported.push(type);
+            } catch (e) {}
+        };
+        observe('longtask', entry => state.longtasks.push({
+            start: entry.startTime,
+            duration: entry.duration,
+            attribution: (entry.attribution || []).map(item => ({
+                container_type: item.containerType,
+                container_src: item.containerSrc,
+                container_name: item.containerName,
+            })),
+        }));
+        observe('long-animation-frame', entry => state.frames.push({
+            start: entry.startTime,
+            duration: entry.duration,
+            blocking_ms: entry.blockingDuration || 0,
+            scripts: (entry.scripts || []).map(script => ({
+                source: script.sourceURL,
+                function: script.sourceFunctionName,
+                invoker: script.invoker,
+                duration: script.duration,
+                forced_layout_ms: script.forcedStyleAndLayoutDuration,
+            })),
+        }));
+    }
+    return performance.now();
+}
+"""
+
+COLLECT_LONG_TASKS_JS = """
+(since) => {
+    const state = window.__mainThreadProfile;
+    if (!state) {
+        return {supported: [], longtasks: [], frames: []};
+    }
+    return {
+        supported: state.supported,
+        longtasks: state.longtasks.filter(entry => entry.start >= since),
+        frames: state.frames.filter(entry => entry.start >= since),
+    };
+}
+"""
+
+
+def hot_functions(profile: dict, limit: int = TOP_FUNCTIONS) -> list[dict]:
+    """Топ функций CPU-профиля CDP по собственному времени (мс)"""
+    nodes = {node["id"]: node for node in profile.get("nodes", [])}
+    samples = profile.get("samples", [])
+    deltas = profile.get("timeDeltas", [])
+    self_time = {}
+    for index, node_id in enumerate(samples):
+        # Интервал после сэмпла - время, проведенное в его узле
+        duration_us = deltas[index + 1] if index + 1 < len(deltas) else 0
+        self_time[node_id] = self_time.get(node_id, 0) + duration_us
+
+    functions = {}
+    for node_id, duration_us in self_time.items():
+        frame = nodes.get(node_id, {}).get("callFrame", {})
+        name = frame.get("functionName") or "(anonymous)"
+        if name in IGNORED_PROFILE_NODES:
+            continue
+        key = (name, frame.get("url", ""), frame.get("lineNumber", -1))
+        functions[key] = functions.get(key, 0) + duration_us
+    ranked = sorted(functions.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [
+        {"function": name, "url": url, "line": line + 1 if line >= 0 else None, "self_ms": round(duration / 1000, 2)}
+        for (name, url, line), duration in ranked
+    ]
+
+
+def busy_time_ms(profile: dict) -> float:
+    """Время, когда главный поток был занят (все сэмплы, кроме простоя)"""
+    nodes = {node["id"]: node for node in profile.get("nodes", [])}
+    deltas = profile.get("timeDeltas", [])
+    total = 0
+    for index, node_id in enumerate(profile.get("samples", [])):
+        name = nodes.get(node_id, {}).get("callFrame", {}).get("functionName")
+        if name != "(idle)" and index + 1 < len(deltas):
+            total += deltas[index + 1]
+    return round(total / 1000, 2)
+
+
+def _union_ms(intervals: list[tuple[float, float]]) -> float:
+    """Суммарная длительность объединения интервалов"""
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return round(total * 1000, 2)
+
+
+def script_attribution(frames: list[dict], limit: int = TOP_FUNCTIONS) -> list[dict]:
+    """Скрипты длинных кадров, суммарно по источнику и функции"""
+    totals = {}
+    for frame in frames:
+        for script in frame["scripts"]:
+            key = (script.get("source") or "", script.get("function") or "", script.get("invoker") or "")
+            totals[key] = totals.get(key, 0) + (script.get("duration") or 0)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{"source": source, "function": function, "invoker": invoker, "duration_ms": round(duration, 2)}
+            for (source, function, invoker), duration in ranked]
+
+
+class MainThreadProfiler:
+    """Профилировщик главного потока для одного действия (контекстный менеджер profile)"""
+
+    def __init__(self, page):
+        self.page = page
+        self._cdp = None
+        self._requests = {}
+        self._intervals = []
+
+    def _on_request(self, request):
+        self._requests[request] = time.monotonic()
+
+    def _on_request_done(self, request):
+        started = self._requests.pop(request, None)
+        if started is not None:
+            self._intervals.append((started, time.monotonic()))
+
+    def _start_cpu_profile(self):
+        try:
+            if self.page.context.browser.browser_type.name != "chromium":
+                return
+            self._cdp = self.page.context.new_cdp_session(self.page)
+            self._cdp.send("Profiler.enable")
+            self._cdp.send("Profiler.setSamplingInterval", {"interval": 100})
+            self._cdp.send("Profiler.start")
+        except Exception:
+            self._cdp = None
+
+    def _stop_cpu_profile(self) -> dict | None:
+        if self._cdp is None:
+            return None
+        try:
+            return self._cdp.send("Profiler.stop")["profile"]
+        except Exception:
+            return None
+        finally:
+            try:
+                self._cdp.detach()
+            except Exception:
+                pass
+            self._cdp = None
+
+    @contextmanager
+    def profile(self, name: str):
+        """Профилирование блока кода; словарь результата заполняется при выходе из блока"""
+        result = {"action": name}
+        try:
+            since = self.page.evaluate(INSTALL_LONG_TASK_OBSERVER_JS)
+        except Exception:
+            since = None
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+        self._start_cpu_profile()
+        started = time.monotonic()
+        try:
+            yield result
+        finally:
+            finished = time.monotonic()
+            cpu_profile = self._stop_cpu_profile()
+            self.page.remove_listener("request", self._on_request)
+            self.page.remove_listener("requestfinished", self._on_request_done)
+            self.page.remove_listener("requestfailed", self._on_request_done)
+            # Незавершенные запросы считаются до конца действия
+            self._intervals.extend((start, finished) for start in self._requests.values())
+            result.update(self._summarize(since, cpu_profile, (finished - started) * 1000))
+
+    def _summarize(self, since, cpu_profile, wall_ms: float) -> dict:
+        try:
+            tasks = self.page.evaluate(COLLECT_LONG_TASKS_JS, since) if since is not None else None
+        except Exception:
+            tasks = None
+        tasks = tasks or {"supported": [], "longtasks": [], "frames": []}
+        longtasks = tasks["longtasks"]
+        main_thread_ms = busy_time_ms(cpu_profile) if cpu_profile else round(sum(task["duration"] for task in longtasks), 2)
+        network_ms = _union_ms(self._intervals)
+        return {
+            "wall_ms": round(wall_ms, 2),
+            "network_ms": network_ms,
+            "requests": len(self._intervals),
+            "main_thread_ms": main_thread_ms,
+            "main_thread_source": "cpu-profile" if cpu_profile else "longtask",
+            "long_tasks": len(longtasks),
+            "long_tasks_ms": round(sum(task["duration"] for task in longtasks), 2),
+            "blocking_ms": round(sum(max(task["duration"] - BLOCKING_THRESHOLD_MS, 0) for task in longtasks), 2),
+            "observers": tasks["supported"],
+            "longest_tasks": sorted(longtasks, key=lambda task: task["duration"], reverse=True)[:5],
+            "scripts": script_attribution(tasks["frames"]),
+            "hot_functions": hot_functions(cpu_profile) if cpu_profile else [],
+            # Грубая оценка: что дольше - ожидание сети или работа главного потока
+            "bottleneck": "backend" if network_ms > main_thread_ms else "client",
+        }
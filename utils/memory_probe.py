@@ -0,0 +1,149 @@
+"""
+Замеры памяти страницы: JS heap, DOM-узлы, обработчики событий, отсоединенные узлы
+"""
+
+# Метрики в порядке вывода; значение None означает, что браузер метрику не дает
+MEMORY_METRICS = ("js_heap_kb", "dom_nodes", "listeners", "detached_nodes")
+
+COLLECT_DOM_METRICS_JS = """
+() => ({
+    dom_nodes: document.getElementsByTagName('*').length,
+    js_heap_used: (performance.memory && performance.memory.usedJSHeapSize) || null,
+})
+"""
+
+
+def parse_thresholds(lines: list[str]) -> dict:
+    """Разбор порогов роста вида 'dom_nodes:50' из pytest.ini"""
+    thresholds = {}
+    for line in lines:
+        name, _, value = line.strip().partition(":")
+        if name and value:
+            thresholds[name.strip()] = float(value)
+    return thresholds
+
+
+def growth_per_cycle(values: list) -> float | None:
+    """Наклон прямой (метод наименьших квадратов) - средний прирост метрики за цикл"""
+    points = [(index, value) for index, value in enumerate(values) if value is not None]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return numerator / denominator
+
+
+class PageMemoryProbe:
+    """Снятие показателей памяти страницы
+
+    В Chromium используются CDP Performance.getMetrics, HeapProfiler и DOM.getDetachedDomNodes,
+    в остальных браузерах доступно только количество DOM-узлов (и performance.memory, если есть).
+    Источник выбирается один раз в start() и не меняется до конца замеров: JSHeapUsedSize
+    после сборки мусора и performance.memory без нее нельзя сравнивать в одном ряду.
+    Неудавшийся замер возвращается с None во всех метриках.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._cdp = None
+        self.source = "dom"
+
+    @property
+    def is_cdp_available(self) -> bool:
+        return self.source == "cdp"
+
+    def start(self):
+        """Подключение к CDP (только Chromium) и выбор источника замеров"""
+        self.source = "dom"
+        try:
+            if self.page.context.browser.browser_type.name != "chromium":
+                return
+            self._cdp = self.page.context.new_cdp_session(self.page)
+            self._cdp.send("Performance.enable")
+            self._cdp.send("HeapProfiler.enable")
+            self.source = "cdp"
+        except Exception:
+            self._cdp = None
+
+    def stop(self):
+        if self._cdp is not None:
+            try:
+                self._cdp.detach()
+            except Exception:
+                pass
+            self._cdp = None
+
+    def _sample_cdp(self) -> dict:
+        # Сборка мусора перед замером, чтобы учитывать только удерживаемую память
+        self._cdp.send("HeapProfiler.collectGarbage")
+        metrics = self._cdp.send("Performance.getMetrics")["metrics"]
+        values = {metric["name"]: metric["value"] for metric in metrics}
+        sample = {
+            "js_heap_kb": round(values.get("JSHeapUsedSize", 0) / 1024, 1),
+            "dom_nodes": int(values.get("Nodes", 0)),
+            "listeners": int(values.get("JSEventListeners", 0)),
+            "detached_nodes": None,
+        }
+        try:
+            detached = self._cdp.send("DOM.getDetachedDomNodes")
+            sample["detached_nodes"] = len(detached.get("detachedNodes", []))
+        except Exception:
+            # Метод экспериментальный и есть не во всех версиях Chromium
+            pass
+        return sample
+
+    def _sample_dom(self) -> dict:
+        values = self.page.evaluate(COLLECT_DOM_METRICS_JS)
+        heap = values.get("js_heap_used")
+        return {
+            "js_heap_kb": round(heap / 1024, 1) if heap else None,
+            "dom_nodes": values.get("dom_nodes"),
+            "listeners": None,
+            "detached_nodes": None,
+        }
+
+    def sample(self) -> dict:
+        """Один замер всех доступных метрик из источника, выбранного в start()"""
+        try:
+            if self.source == "cdp":
+                return self._sample_cdp()
+            return self._sample_dom()
+        except Exception:
+            return {name: None for name in MEMORY_METRICS}
+
+
+def run_memory_cycles(events_page, cycles: int, thresholds: dict) -> dict:
+    """Циклы 'Сгенерировать превью' / 'Очистить' с замером памяти после каждого цикла"""
+    probe = PageMemoryProbe(events_page.page)
+    probe.start()
+    try:
+        # Прогревочный цикл: первичная инициализация виджета не считается утечкой
+        events_page.click_generate_preview()
+        events_page.click_clear_country()
+        samples = [probe.sample()]
+        for _ in range(cycles):
+            events_page.click_generate_preview()
+            events_page.click_clear_country()
+            samples.append(probe.sample())
+        cdp_used = probe.is_cdp_available
+    finally:
+        probe.stop()
+
+    growth = {}
+    exceeded = {}
+    for name in MEMORY_METRICS:
+        slope = growth_per_cycle([sample[name] for sample in samples])
+        growth[name] = round(slope, 2) if slope is not None else None
+        limit = thresholds.get(name)
+        if slope is not None and limit is not None and slope > limit:
+            exceeded[name] = {"growth_per_cycle": round(slope, 2), "threshold": limit}
+
+    return {
+        "cycles": cycles,
+        "cdp": cdp_used,
+        "samples": samples,
+        "growth_per_cycle": growth,
+        "exceeded": exceeded,
+    }
@@ -0,0 +1,124 @@
+"""
+Журнал событий страницы для разбора упавших тестов
+
+PageEventCollector подписывается на console, pageerror, requestfailed и requestfinished
+и складывает события в кольцевые буферы (deque с maxlen) - память ограничена, а
+обработчик только добавляет объект Playwright в буфер; разбор полей откладывается до
+dump(), который вызывается лишь при падении теста. Медленными считаются запросы
+дольше slow_request_ms (по request.timing, без обращения к браузеру).
+
+error_signatures() сводит ошибки к сигнатурам: из текста убираются числа, query-строки
+и позиции в файлах, поэтому одна и та же ошибка JS виджета в разных тестах дает
+одну сигнатуру (сводка по прогону - plugins/page_errors.py).
+"""
+import re
+from collections import deque
+
+DEFAULT_CAPACITY = 200
+DEFAULT_SLOW_REQUEST_MS = 2000
+# Сообщения консоли, которые входят в сигнатуры ошибок
+SIGNATURE_CONSOLE_TYPES = ("error",)
+MAX_TEXT_LENGTH = 2000
+
+_QUERY_RE = re.compile(r"\?[^\s'\")]*")
+_POSITION_RE = re.compile(r":\d+(:\d+)?\b")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_HEX_RE = re.compile(r"\b[0-9a-f]{8,}\b", re.IGNORECASE)
+
+
+def normalize_message(text: str) -> str:
+    """Текст ошибки без изменчивых частей: query-строк, позиций, чисел и хэшей"""
+    lines = (text or "").strip().splitlines()
+    text = lines[0] if lines else ""
+    text = _QUERY_RE.sub("", text)
+    text = _POSITION_RE.sub("", text)
+    text = _HEX_RE.sub("<hash>", text)
+    text = _NUMBER_RE.sub("N", text)
+    return text[:300]
+
+
+class PageEventCollector:
+    """Кольцевые буферы консоли, ошибок JS, упавших и медленных запросов одной страницы"""
+
+    def __init__(self, page, capacity: int = DEFAULT_CAPACITY, slow_request_ms: float = DEFAULT_SLOW_REQUEST_MS):
+        self.page = page
+        self.slow_request_ms = slow_request_ms
+        self.console = deque(maxlen=capacity)
+        self.errors = deque(maxlen=capacity)
+        self.failed_requests = deque(maxlen=capacity)
+        self.slow_requests = deque(maxlen=capacity)
+        # Сколько событий было всего: буфер хранит только последние capacity
+        self.seen = {"console": 0, "errors": 0, "failed_requests": 0, "slow_requests": 0}
+
+    def _on_console(self, message):
+        self.seen["console"] += 1
+        self.console.append(message)
+
+    def _on_page_error(self, error):
+        self.seen["errors"] += 1
+        self.errors.append(error)
+
+    def _on_request_failed(self, request):
+        self.seen["failed_requests"] += 1
+        self.failed_requests.append(request)
+
+    def _on_request_finished(self, request):
+        response_end = request.timing.get("responseEnd", -1)
+        if response_end >= self.slow_request_ms:
+            self.seen["slow_requests"] += 1
+            self.slow_requests.append(request)
+
+    def start(self) -> "PageEventCollector":
+        self.page.on("console", self._on_console)
+        self.page.on("pageerror", self._on_page_error)
+        self.page.on("requestfailed", self._on_request_failed)
+        self.page.on("requestfinished", self._on_request_finished)
+        return self
+
+    def stop(self):
+        for event, handler in (("console", self._on_console), ("pageerror", self._on_page_error),
+                               ("requestfailed", self._on_request_failed),
+                               ("requestfinished", self._on_request_finished)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+    def dump(self) -> dict:
+        """Содержимое буферов в виде словарей (для вложений Allure)"""
+        console = []
+        for message in self.console:
+            location = message.location or {}
+            console.append({"type": message.type, "text": message.text[:MAX_TEXT_LENGTH],
+                            "url": location.get("url"), "line": location.get("lineNumber")})
+        errors = [{"name": error.name, "message": error.message[:MAX_TEXT_LENGTH],
+                   "stack": (error.stack or "")[:MAX_TEXT_LENGTH]} for error in self.errors]
+        failed = [{"url": request.url, "method": request.method, "resource_type": request.resource_type,
+                   "failure": request.failure} for request in self.failed_requests]
+        slow = [{"url": request.url, "method": request.method, "resource_type": request.resource_type,
+                 "duration_ms": round(request.timing.get("responseEnd", -1), 1)} for request in self.slow_requests]
+        return {
+            "seen": dict(self.seen),
+            "console": console,
+            "errors": errors,
+            "failed_requests": failed,
+            "slow_requests": slow,
+        }
+
+    def error_signatures(self) -> dict:
+        """Сигнатура ошибки -> количество и пример: ошибки JS, ошибки консоли и упавшие запросы"""
+        signatures = {}
+
+        def add(signature: str, sample: str):
+            entry = signatures.setdefault(signature, {"count": 0, "sample": sample[:300]})
+            entry["count"] += 1
+
+        for error in self.errors:
+            add(f"pageerror: {error.name}: {normalize_message(error.message)}", error.message)
+        for message in self.console:
+            if message.type in SIGNATURE_CONSOLE_TYPES:
+                add(f"console.{message.type}: {normalize_message(message.text)}", message.text)
+        for request in self.failed_requests:
+            add(f"requestfailed: {request.resource_type} {_QUERY_RE.sub('', request.url)} ({request.failure})",
+                request.url)
+        return signatures
@@ -0,0 +1,225 @@
+"""
+Запись всех запросов страницы с фазами загрузки, инициаторами и признаком блокировки рендеринга
+
+Фазы берутся из request.timing Playwright, инициаторы - из CDP Network.requestWillBeSent
+(только Chromium; в остальных браузерах инициатором считается заголовок Referer),
+признак блокировки рендеринга - из Resource Timing renderBlockingStatus, а где его нет -
+по разметке <head>.
+"""
+
+# Заголовки ответа, нужные для анализа сжатия и кэширования
+KEPT_RESPONSE_HEADERS = (
+    "content-type", "content-encoding", "content-length", "cache-control",
+    "expires", "date", "age", "etag", "last-modified",
+)
+
+# Момент первой отрисовки виджета: в DOM появляется кнопка генератора или заголовок таблицы событий
+WIDGET_RENDER_OBSERVER_JS = """
+(() => {
+    if (window.__widgetFirstRender !== undefined) {
+        return;
+    }
+    window.__widgetFirstRender = null;
+    const markers = ['Сгенерировать превью', 'Название события'];
+    const check = nodes => {
+        for (const node of nodes) {
+            const text = node.textContent || '';
+            if (markers.some(marker => text.includes(marker))) {
+                window.__widgetFirstRender = performance.now();
+                observer.disconnect();
+                return;
+            }
+        }
+    };
+    const observer = new MutationObserver(records => {
+        for (const record of records) {
+            check(record.addedNodes);
+            if (window.__widgetFirstRender !== null) {
+                return;
+            }
+        }
+    });
+    observer.observe(document, {childList: true, subtree: true});
+})();
+"""
+
+RESOURCE_TIMINGS_JS = """
+() => performance.getEntriesByType('resource').map(entry => ({
+    url: entry.name,
+    initiator_type: entry.initiatorType,
+    transfer_size: entry.transferSize,
+    encoded_body_size: entry.encodedBodySize,
+    decoded_body_size: entry.decodedBodySize,
+    render_blocking_status: entry.renderBlockingStatus || null,
+    start_ms: entry.startTime,
+    duration_ms: entry.duration,
+}))
+"""
+
+COLLECT_RENDER_MARKS_JS = """
+() => {
+    const paint = performance.getEntriesByName('first-contentful-paint')[0];
+    return {
+        time_origin: performance.timeOrigin,
+        fcp_ms: paint ? paint.startTime : null,
+        widget_render_ms: window.__widgetFirstRender === undefined ? null : window.__widgetFirstRender,
+    };
+}
+"""
+
+# Блокирующие ресурсы по разметке: синхронные скрипты и таблицы стилей в <head>
+COLLECT_BLOCKING_URLS_JS = """
+() => {
+    const urls = [];
+    document.querySelectorAll('head script[src]').forEach(script => {
+        if (!script.async && !script.defer && script.type !== 'module') urls.push(script.src);
+    });
+    document.querySelectorAll('head link[rel="stylesheet"]').forEach(link => {
+        if (!link.media || link.media === 'all' || matchMedia(link.media).matches) urls.push(link.href);
+    });
+    return urls;
+}
+"""
+
+
+def _phase(end, start) -> float | None:
+    if end is None or start is None or end < 0 or start < 0:
+        return None
+    return round(max(end - start, 0), 2)
+
+
+def request_phases(timing: dict) -> dict:
+    """Длительности фаз запроса в мс (None - фаза не выполнялась, например, соединение переиспользовано)"""
+    secure_start = timing.get("secureConnectionStart", -1)
+    return {
+        "dns": _phase(timing.get("domainLookupEnd"), timing.get("domainLookupStart")),
+        "connect": _phase(secure_start if secure_start > 0 else timing.get("connectEnd"), timing.get("connectStart")),
+        "tls": _phase(timing.get("connectEnd"), secure_start) if secure_start > 0 else None,
+        "ttfb": _phase(timing.get("responseStart"), timing.get("requestStart")),
+        "download": _phase(timing.get("responseEnd"), timing.get("responseStart")),
+    }
+
+
+def _cdp_initiator(initiator: dict) -> str | None:
+    """URL ресурса-инициатора из CDP Initiator (для скриптов - верхний кадр стека)"""
+    if initiator.get("url"):
+        return initiator["url"]
+    stack = initiator.get("stack")
+    while stack:
+        for frame in stack.get("callFrames", []):
+            if frame.get("url"):
+                return frame["url"]
+        stack = stack.get("parent")
+    return None
+
+
+class RequestCapture:
+    """Запись запросов страницы между start() и stop()"""
+
+    def __init__(self, page):
+        self.page = page
+        self._requests = []
+        self._initiators = {}
+        self._cdp = None
+
+    def _on_request_done(self, request):
+        self._requests.append(request)
+
+    def _on_request_will_be_sent(self, event):
+        initiator = event.get("initiator", {})
+        self._initiators.setdefault(event["request"]["url"], {
+            "type": initiator.get("type"),
+            "url": _cdp_initiator(initiator),
+        })
+
+    def start(self) -> "RequestCapture":
+        self.page.add_init_script(WIDGET_RENDER_OBSERVER_JS)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+        try:
+            if self.page.context.browser.browser_type.name == "chromium":
+                self._cdp = self.page.context.new_cdp_session(self.page)
+                self._cdp.on("Network.requestWillBeSent", self._on_request_will_be_sent)
+                self._cdp.send("Network.enable")
+        except Exception:
+            self._cdp = None
+        return self
+
+    def _detach(self):
+        self.page.remove_listener("requestfinished", self._on_request_done)
+        self.page.remove_listener("requestfailed", self._on_request_done)
+        if self._cdp is not None:
+            try:
+                self._cdp.detach()
+            except Exception:
+                pass
+            self._cdp = None
+
+    def render_marks(self) -> dict:
+        """FCP и первая отрисовка виджета (мс от начала навигации)"""
+        try:
+            return self.page.evaluate(COLLECT_RENDER_MARKS_JS)
+        except Exception:
+            return {"time_origin": None, "fcp_ms": None, "widget_render_ms": None}
+
+    def _describe(self, request, time_origin, resource_timings, blocking_urls) -> dict:
+        timing = request.timing
+        start_ms = timing["startTime"] - time_origin if time_origin else 0
+        end_offset = timing.get("responseEnd", -1)
+        response = None
+        failure = request.failure
+        headers = {}
+        sizes = {}
+        if failure is None:
+            try:
+                response = request.response()
+                all_headers = response.all_headers() if response else {}
+                headers = {name: all_headers[name] for name in KEPT_RESPONSE_HEADERS if name in all_headers}
+                sizes = request.sizes()
+            except Exception:
+                pass
+        resource_timing = resource_timings.get(request.url, {})
+        blocking_status = resource_timing.get("render_blocking_status")
+        if blocking_status:
+            render_blocking = blocking_status == "blocking"
+        else:
+            render_blocking = request.url in blocking_urls
+        cdp_initiator = self._initiators.get(request.url, {})
+        initiator_url = cdp_initiator.get("url") if cdp_initiator else request.headers.get("referer")
+        return {
+            "url": request.url,
+            "method": request.method,
+            "resource_type": request.resource_type,
+            "status": response.status if response else None,
+            "failure": failure,
+            "start_ms": round(start_ms, 2),
+            "end_ms": round(start_ms + end_offset, 2) if end_offset >= 0 else None,
+            "phases": request_phases(timing),
+            "transfer_bytes": sizes.get("responseHeadersSize", 0) + sizes.get("responseBodySize", 0) if sizes else None,
+            "body_bytes": sizes.get("responseBodySize") if sizes else None,
+            "decoded_bytes": resource_timing.get("decoded_body_size"),
+            "headers": headers,
+            "initiator_type": cdp_initiator.get("type") if cdp_initiator else None,
+            "initiator_url": initiator_url if initiator_url != request.url else None,
+            # Основной документ блокирует отрисовку всегда
+            "render_blocking": render_blocking or (request.resource_type == "document"
+                                                   and request.frame.parent_frame is None),
+        }
+
+    def stop(self) -> dict:
+        """Остановка записи: {"requests": [...], "marks": {...}} с временем от начала навигации"""
+        self._detach()
+        marks = self.render_marks()
+        try:
+            resource_timings = {entry["url"]: entry for entry in self.page.evaluate(RESOURCE_TIMINGS_JS)}
+            blocking_urls = set(self.page.evaluate(COLLECT_BLOCKING_URLS_JS))
+        except Exception:
+            resource_timings, blocking_urls = {}, set()
+        requests = []
+        for request in self._requests:
+            try:
+                requests.append(self._describe(request, marks.get("time_origin"), resource_timings, blocking_urls))
+            except Exception:
+                continue
+        requests.sort(key=lambda entry: entry["start_ms"])
+        return {"requests": requests, "marks": marks}
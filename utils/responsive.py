@@ -0,0 +1,224 @@
+"""
+Проверка адаптивности: одна загрузка страницы, последовательный обход брейкпоинтов
+"""
+
+# Ожидание стабилизации раскладки: размеры документа не меняются несколько кадров подряд
+WAIT_FOR_LAYOUT_SETTLE_JS = """
+async ({stableFrames, timeout}) => {
+    const start = performance.now();
+    if (document.fonts && document.fonts.ready) {
+        await document.fonts.ready;
+    }
+    const snapshot = () => {
+        const body = document.body ? document.body.getBoundingClientRect() : {width: 0, height: 0};
+        const root = document.documentElement;
+        return [body.width, body.height, root.scrollWidth, root.scrollHeight,
+                document.getElementsByTagName('*').length].join(',');
+    };
+    let last = snapshot();
+    let stable = 0;
+    while (stable < stableFrames) {
+        await new Promise(resolve => requestAnimationFrame(() => resolve()));
+        const current = snapshot();
+        stable = current === last ? stable + 1 : 0;
+        last = current;
+        if (performance.now() - start > timeout) {
+            return {settled: false, settle_ms: performance.now() - start};
+        }
+    }
+    return {settled: true, settle_ms: performance.now() - start};
+}
+"""
+
+# Наблюдатель за изменением размеров элементов - счетчик перекомпоновок между брейкпоинтами
+INSTALL_REFLOW_OBSERVER_JS = """
+(maxElements) => {
+    if (window.__responsiveReflow) {
+        return;
+    }
+    const state = {count: 0, elements: new Set(), initialized: false};
+    const observer = new ResizeObserver(entries => {
+        // Первый вызов приходит сразу после observe() и перекомпоновкой не является
+        if (!state.initialized) {
+            state.initialized = true;
+            return;
+        }
+        for (const entry of entries) {
+            state.count += 1;
+            state.elements.add(entry.target);
+        }
+    });
+    const elements = Array.from(document.body.querySelectorAll('*')).slice(0, maxElements);
+    elements.forEach(el => observer.observe(el));
+    window.__responsiveReflow = state;
+}
+"""
+
+TAKE_REFLOW_COUNT_JS = """
+() => {
+    const state = window.__responsiveReflow;
+    if (!state) {
+        return {reflow_count: 0, reflowed_elements: 0};
+    }
+    const result = {reflow_count: state.count, reflowed_elements: state.elements.size};
+    state.count = 0;
+    state.elements = new Set();
+    return result;
+}
+"""
+
+# Метрики раскладки: горизонтальный скролл, элементы за пределами вьюпорта, обрезанный текст
+COLLECT_LAYOUT_METRICS_JS = """
+(limit) => {
+    const describe = el => {
+        let name = el.tagName.toLowerCase();
+        if (el.id) name += '#' + el.id;
+        if (typeof el.className === 'string' && el.className.trim()) {
+            name += '.' + el.className.trim().split(/\\s+/).slice(0, 2).join('.');
+        }
+        return name;
+    };
+    const hasOwnText = el => Array.from(el.childNodes).some(
+        node => node.nodeType === Node.TEXT_NODE && node.textContent.trim().length > 0
+    );
+    const root = document.documentElement;
+    const viewportWidth = root.clientWidth;
+    const overflowing = [];
+    const clipped = [];
+    let visible = 0;
+    for (const el of document.body.querySelectorAll('*')) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 && rect.height === 0) continue;
+        const style = getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.display === 'none') continue;
+        visible += 1;
+        if (rect.right > viewportWidth + 1 || rect.left < -1) {
+            overflowing.push({element: describe(el), left: Math.round(rect.left), right: Math.round(rect.right)});
+        }
+        if (!hasOwnText(el)) continue;
+        const clipsX = ['hidden', 'clip'].includes(style.overflowX) || style.textOverflow === 'ellipsis';
+        const clipsY = ['hidden', 'clip'].includes(style.overflowY);
+        if ((clipsX && el.scrollWidth > el.clientWidth + 1) || (clipsY && el.scrollHeight > el.clientHeight + 1)) {
+            clipped.push({element: describe(el), text: el.textContent.trim().slice(0, 50)});
+        }
+    }
+    return {
+        viewport_width: viewportWidth,
+        scroll_width: root.scrollWidth,
+        horizontal_overflow: root.scrollWidth > viewportWidth,
+        visible_elements: visible,
+        overflowing_count: overflowing.length,
+        overflowing_elements: overflowing.slice(0, limit),
+        clipped_text_count: clipped.length,
+        clipped_text: clipped.slice(0, limit),
+        body_visible: !!document.body && document.body.getBoundingClientRect().height > 0,
+    };
+}
+"""
+
+DEFAULT_BREAKPOINTS = [
+    "1920x1080 Desktop",
+    "768x1024 Tablet",
+    "375x667 Mobile",
+]
+
+
+def parse_breakpoints(lines: list[str]) -> list[dict]:
+    """Разбор брейкпоинтов вида '1920x1080 Desktop' из pytest.ini"""
+    breakpoints = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        size, _, name = line.partition(" ")
+        width, _, height = size.lower().partition("x")
+        breakpoints.append({
+            "name": name.strip() or size,
+            "width": int(width),
+            "height": int(height),
+        })
+    return breakpoints
+
+
+class ResponsiveChecker:
+    """Обход брейкпоинтов на уже загруженной странице с ожиданием стабилизации раскладки"""
+
+    def __init__(self, page, settle_frames: int = 3, settle_timeout: int = 5000, max_observed: int = 3000):
+        self.page = page
+        self.settle_frames = settle_frames
+        self.settle_timeout = settle_timeout
+        self.max_observed = max_observed
+        self._cdp = None
+
+    def _is_chromium(self) -> bool:
+        try:
+            return self.page.context.browser.browser_type.name == "chromium"
+        except Exception:
+            return False
+
+    def _layout_counters(self) -> dict:
+        """Счетчики Layout/RecalcStyle из CDP (только Chromium)"""
+        if self._cdp is None:
+            return {}
+        try:
+            metrics = self._cdp.send("Performance.getMetrics")["metrics"]
+            values = {metric["name"]: metric["value"] for metric in metrics}
+            return {
+                "layout_count": values.get("LayoutCount", 0),
+                "recalc_style_count": values.get("RecalcStyleCount", 0),
+            }
+        except Exception:
+            return {}
+
+    def wait_for_layout_settle(self) -> dict:
+        """Ожидание, пока раскладка не перестанет меняться"""
+        try:
+            return self.page.evaluate(
+                WAIT_FOR_LAYOUT_SETTLE_JS,
+                {"stableFrames": self.settle_frames, "timeout": self.settle_timeout},
+            )
+        except Exception as e:
+            return {"settled": False, "settle_ms": None, "error": str(e)}
+
+    def check_breakpoint(self, breakpoint: dict) -> dict:
+        """Переключение на брейкпоинт и сбор метрик раскладки"""
+        counters_before = self._layout_counters()
+        self.page.set_viewport_size({"width": breakpoint["width"], "height": breakpoint["height"]})
+        result = {**breakpoint, **self.wait_for_layout_settle()}
+        try:
+            result.update(self.page.evaluate(COLLECT_LAYOUT_METRICS_JS, 20))
+            result.update(self.page.evaluate(TAKE_REFLOW_COUNT_JS))
+        except Exception as e:
+            result["error"] = str(e)
+            result["body_visible"] = False
+        counters_after = self._layout_counters()
+        for name, value in counters_after.items():
+            result[name] = int(value - counters_before.get(name, 0))
+        result["is_responsive"] = bool(
+            result.get("settled")
+            and result.get("body_visible")
+            and not result.get("horizontal_overflow")
+        )
+        return result
+
+    def check(self, breakpoints: list[dict]) -> list[dict]:
+        """Проверка всех брейкпоинтов за один проход"""
+        if self._is_chromium():
+            try:
+                self._cdp = self.page.context.new_cdp_session(self.page)
+                self._cdp.send("Performance.enable")
+            except Exception:
+                self._cdp = None
+        try:
+            try:
+                self.page.evaluate(INSTALL_REFLOW_OBSERVER_JS, self.max_observed)
+            except Exception:
+                pass
+            return [self.check_breakpoint(breakpoint) for breakpoint in breakpoints]
+        finally:
+            if self._cdp is not None:
+                try:
+                    self._cdp.detach()
+                except Exception:
+                    pass
+                self._cdp = None
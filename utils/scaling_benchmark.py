@@ -0,0 +1,240 @@
+"""
+Масштабируемость отрисовки таблицы событий в зависимости от их количества
+
+Ответы API превью (JSON-запросы fetch/xhr во время генерации) перехватываются
+через page.route, и список событий в них заменяется синтетическим списком нужной
+длины: исходные события повторяются по кругу с измененным названием. Списком событий
+считается список словарей, в котором есть событие с названием и датой; прочие ответы
+(настройки, справочники тематик и стран) не меняются. Пустой список подменяется только
+в ответе эндпоинта событий (в последнем сегменте адреса есть "event") - тогда
+используется формат локальной замены страницы (utils.stand_in_server).
+
+Для каждого размера измеряются время отрисовки (от клика до последнего изменения DOM),
+количество DOM-узлов, память и частота кадров при прокрутке. По точкам строится
+степенная зависимость прироста показателя относительно самого маленького размера:
+metric(n) - metric(n0) ~ (n - n0)^k (МНК в логарифмических координатах). Постоянная
+часть (сеть, сама страница) при этом не занижает k; k заметно больше 1 означает
+сверхлинейный рост.
+"""
+import json
+import math
+from urllib.parse import urlparse
+
+from utils.memory_probe import PageMemoryProbe
+from utils.scroll_probe import measure_scroll_fps
+from utils.stand_in_server import generate_events
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+# Показатели, для которых подбирается степенная зависимость
+FITTED_METRICS = ("render_ms", "dom_nodes", "js_heap_kb")
+# Отрисовка считается законченной, если DOM не менялся столько времени
+SETTLE_QUIET_MS = 500
+SETTLE_TIMEOUT_MS = 30000
+TITLE_KEYS = ("title", "name", "event_name")
+DATE_KEYS = ("date", "start_date", "date_start", "starts_at", "start")
+
+INSTALL_MUTATION_CLOCK_JS = """
+() => {
+    window.__lastMutation = performance.now();
+    if (window.__mutationClock) window.__mutationClock.disconnect();
+    window.__mutationClock = new MutationObserver(() => { window.__lastMutation = performance.now(); });
+    window.__mutationClock.observe(document.body, {childList: true, subtree: true, characterData: true});
+    return performance.now();
+}
+"""
+
+WAIT_DOM_QUIET_JS = """
+({quiet, timeout}) => new Promise(resolve => {
+    const started = performance.now();
+    const check = () => {
+        const now = performance.now();
+        if (now - window.__lastMutation >= quiet || now - started >= timeout) {
+            resolve(window.__lastMutation);
+        } else {
+            setTimeout(check, 50);
+        }
+    };
+    check();
+})
+"""
+
+
+def _is_event_list(value, allow_empty: bool) -> bool:
+    if not isinstance(value, list):
+        return False
+    if not value:
+        return allow_empty
+    return any(isinstance(entry, dict) and any(key in entry for key in TITLE_KEYS)
+               and any(key in entry for key in DATE_KEYS) for entry in value)
+
+
+def is_events_endpoint(url: str) -> bool:
+    """Адрес эндпоинта событий: в последнем сегменте пути есть "event" (api/events, get_events.php)"""
+    return "event" in urlparse(url).path.rstrip("/").rsplit("/", 1)[-1].lower()
+
+
+def _find_event_list(payload, allow_empty: bool = False):
+    """Путь к самому длинному списку событий в JSON-ответе: [] для списка верхнего уровня, ключи для вложенного"""
+    if _is_event_list(payload, allow_empty):
+        return []
+    if isinstance(payload, dict):
+        best, best_length = None, -1
+        for key, value in payload.items():
+            path = _find_event_list(value, allow_empty)
+            if path is None:
+                continue
+            length = len(_get_path(value, path))
+            if length > best_length:
+                best, best_length = [key, *path], length
+        return best
+    return None
+
+
+def _get_path(payload, path: list):
+    for key in path:
+        payload = payload[key]
+    return payload
+
+
+def synthesize_events(template: list[dict], count: int) -> list[dict]:
+    """Список из count событий: шаблонные события по кругу, к названию добавляется номер"""
+    if not template:
+        return generate_events(count=count)
+    events = []
+    for index in range(count):
+        event = dict(template[index % len(template)])
+        for key in TITLE_KEYS:
+            if isinstance(event.get(key), str):
+                event[key] = f"{event[key]} #{index + 1}"
+                break
+        events.append(event)
+    return events
+
+
+def scale_payload(payload, count: int, allow_empty: bool = False):
+    """JSON-ответ с подмененным списком событий; None, если списка событий в ответе нет
+
+    allow_empty - пустой список тоже считается списком событий (ответ эндпоинта событий)
+    """
+    path = _find_event_list(payload, allow_empty)
+    if path is None:
+        return None
+    if not path:
+        return synthesize_events(payload, count)
+    scaled = json.loads(json.dumps(payload))
+    parent = _get_path(scaled, path[:-1])
+    parent[path[-1]] = synthesize_events(parent[path[-1]], count)
+    return scaled
+
+
+class PreviewResponseScaler:
+    """Перехват JSON-ответов fetch/xhr страницы с подменой списка событий"""
+
+    def __init__(self, page, count: int):
+        self.page = page
+        self.count = count
+        self.scaled_urls = []
+
+    def _handle(self, route):
+        request = route.request
+        if request.resource_type not in ("xhr", "fetch"):
+            route.fallback()
+            return
+        try:
+            response = route.fetch()
+        except Exception:
+            route.fallback()
+            return
+        try:
+            scaled = scale_payload(json.loads(response.text()), self.count,
+                                   allow_empty=is_events_endpoint(request.url))
+        except ValueError:
+            scaled = None
+        if scaled is None:
+            route.fulfill(response=response)
+            return
+        self.scaled_urls.append(request.url)
+        # Тело заменяется целиком, длина и сжатие исходного ответа к нему не относятся
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in ("content-length", "content-encoding")}
+        route.fulfill(response=response, headers=headers, json=scaled)
+
+    def install(self) -> "PreviewResponseScaler":
+        self.page.route("**/*", self._handle)
+        return self
+
+    def remove(self):
+        self.page.unroute("**/*", self._handle)
+
+
+def fit_power_law(sizes: list[float], values: list[float]) -> dict | None:
+    """Показатель степени k и R^2 для values ~ a * sizes^k (только положительные точки)"""
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values)
+              if size and value is not None and value > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    if not sxx:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / sxx
+    intercept = mean_y - slope * mean_x
+    ss_total = sum((y - mean_y) ** 2 for _, y in points)
+    ss_residual = sum((y - (intercept + slope * x)) ** 2 for x, y in points)
+    return {
+        "exponent": round(slope, 3),
+        "r2": round(1 - ss_residual / ss_total, 3) if ss_total else 1.0,
+        "points": len(points),
+    }
+
+
+def measure_size(events_page, count: int) -> dict:
+    """Генерация превью с count событиями на свежезагруженной странице"""
+    page = events_page.page
+    events_page.navigate()
+    events_page.wait_for_content_load()
+    events_page.select_theme()
+    scaler = PreviewResponseScaler(page, count).install()
+    probe = PageMemoryProbe(page)
+    probe.start()
+    try:
+        started = page.evaluate(INSTALL_MUTATION_CLOCK_JS)
+        events_page.click_generate_preview()
+        last_mutation = page.evaluate(WAIT_DOM_QUIET_JS, {"quiet": SETTLE_QUIET_MS, "timeout": SETTLE_TIMEOUT_MS})
+        memory = probe.sample()
+        scroll = measure_scroll_fps(page)
+    finally:
+        probe.stop()
+        scaler.remove()
+    return {
+        "count": count,
+        "scaled_responses": len(scaler.scaled_urls),
+        "render_ms": round(last_mutation - started, 1),
+        "dom_nodes": memory["dom_nodes"],
+        "js_heap_kb": memory["js_heap_kb"],
+        "scroll_fps": scroll["fps"],
+        "scroll_max_frame_ms": scroll["max_frame_ms"],
+    }
+
+
+def analyze_scaling(points: list[dict], max_exponent: float) -> dict:
+    """Степенные зависимости прироста показателей и список сверхлинейных"""
+    points = sorted(points, key=lambda point: point["count"])
+    base, rest = points[0], points[1:]
+    sizes = [point["count"] - base["count"] for point in rest]
+    fits = {}
+    for name in FITTED_METRICS:
+        if base[name] is None:
+            fits[name] = None
+            continue
+        increments = [point[name] - base[name] if point[name] is not None else None for point in rest]
+        fits[name] = fit_power_law(sizes, increments)
+    superlinear = {name: fit for name, fit in fits.items() if fit and fit["exponent"] > max_exponent}
+    return {"fits": fits, "superlinear": superlinear, "max_exponent": max_exponent}
+
+
+def run_scaling_benchmark(events_page, sizes=DEFAULT_SIZES, max_exponent: float = 1.2) -> dict:
+    """Замеры для всех размеров списка и анализ роста"""
+    points = [measure_size(events_page, count) for count in sizes]
+    return {"points": points, **analyze_scaling(points, max_exponent)}
@@ -0,0 +1,175 @@
+"""
+Плавность прокрутки длинного списка событий
+
+Прокручивается элемент превью с наибольшим прокручиваемым расстоянием, если такого
+нет - вся страница. Интервалы между кадрами записываются через requestAnimationFrame.
+
+- measure_scroll_fps - равномерная прокрутка по кадрам за заданное время, одинаковая
+  нагрузка для сравнения списков разной длины (utils.scaling_benchmark);
+- probe_scroll - несколько плавных прокруток (scrollTo с behavior: 'smooth'), как при
+  прокрутке пользователем, с длинными задачами за время прокрутки.
+
+Пропущенные кадры считаются по интервалу обновления экрана, оцененному по самым
+коротким кадрам: кадр длиной 2.6 интервала означает два пропущенных кадра.
+"""
+from utils.interaction_latency import percentile
+
+DEFAULT_SCROLL_DURATION_MS = 2000
+DEFAULT_SCROLL_STEPS = 5
+# Ожидание окончания одной плавной прокрутки
+SCROLL_STEP_TIMEOUT_MS = 3000
+# Кадр дольше этого порога заметен как рывок
+JANK_FRAME_MS = 50
+
+# Выбор прокручиваемого элемента; используется в начале функций ниже
+_FIND_SCROLL_TARGET_JS = """
+    const root = (selector && document.querySelector(selector)) || document.body;
+    let target = document.scrollingElement;
+    let extent = target.scrollHeight - target.clientHeight;
+    for (const el of root.querySelectorAll('*')) {
+        const style = getComputedStyle(el);
+        if (!/(auto|scroll)/.test(style.overflowY)) continue;
+        const elExtent = el.scrollHeight - el.clientHeight;
+        if (elExtent > extent) {
+            target = el;
+            extent = elExtent;
+        }
+    }
+    target.scrollTop = 0;
+"""
+
+SCROLL_FRAMES_JS = "async ({duration, selector}) => {" + _FIND_SCROLL_TARGET_JS + """
+    const frames = [];
+    await new Promise(resolve => requestAnimationFrame(() => {
+        const start = performance.now();
+        let previous = start;
+        const step = now => {
+            frames.push(now - previous);
+            previous = now;
+            const progress = Math.min((now - start) / duration, 1);
+            target.scrollTop = extent * progress;
+            if (progress < 1) requestAnimationFrame(step); else resolve();
+        };
+        requestAnimationFrame(step);
+    }));
+    return {scrollable_px: extent, frames};
+}
+"""
+
+SMOOTH_SCROLL_PROBE_JS = "async ({steps, stepTimeout, selector}) => {" + _FIND_SCROLL_TARGET_JS + """
+    const longtasks = [];
+    let observer = null;
+    let longtaskSupported = false;
+    try {
+        observer = new PerformanceObserver(list => list.getEntries().forEach(entry =>
+            longtasks.push({start_ms: entry.startTime, duration_ms: entry.duration})));
+        observer.observe({type: 'longtask', buffered: false});
+        longtaskSupported = true;
+    } catch (e) {}
+
+    const frames = [];
+    let recording = true;
+    let previous = null;
+    const tick = now => {
+        if (previous !== null) frames.push(now - previous);
+        previous = now;
+        if (recording) requestAnimationFrame(tick);
+    };
+    requestAnimationFrame(tick);
+
+    const started = performance.now();
+    const nextFrame = () => new Promise(resolve => requestAnimationFrame(resolve));
+    for (let i = 1; i <= steps && extent > 0; i++) {
+        const top = Math.round(extent * i / steps);
+        target.scrollTo({top, behavior: 'smooth'});
+        // Прокрутка закончена, когда позиция не меняется несколько кадров подряд
+        const stepStart = performance.now();
+        let last = -1, stable = 0;
+        while (stable < 3 && performance.now() - stepStart < stepTimeout) {
+            await nextFrame();
+            const current = target.scrollTop;
+            stable = current === last ? stable + 1 : 0;
+            last = current;
+        }
+    }
+    recording = false;
+    await nextFrame();
+    if (observer) {
+        longtasks.push(...observer.takeRecords().map(entry => ({start_ms: entry.startTime, duration_ms: entry.duration})));
+        observer.disconnect();
+    }
+    return {
+        scrollable_px: extent,
+        target: target === document.scrollingElement ? 'document' : target.tagName.toLowerCase() +
+            (typeof target.className === 'string' && target.className ? '.' + target.className.split(/\\s+/)[0] : ''),
+        duration_ms: performance.now() - started,
+        frames,
+        longtasks: longtasks.filter(task => task.start_ms >= started),
+        longtask_supported: longtaskSupported,
+    };
+}
+"""
+
+
+def estimate_refresh_interval(frames: list[float]) -> float | None:
+    """Интервал обновления экрана по самым коротким кадрам (10-й перцентиль)"""
+    interval = percentile(frames, 10)
+    return max(interval, 1.0) if interval is not None else None
+
+
+def summarize_frames(frames: list[float]) -> dict:
+    """Частота кадров, перцентили длительности кадра и пропущенные кадры"""
+    if not frames:
+        return {"frames": 0, "fps": None, "refresh_ms": None, "dropped_frames": 0, "dropped_ratio": None,
+                "p50_frame_ms": None, "p95_frame_ms": None, "max_frame_ms": None, "janky_frames": 0}
+    refresh = estimate_refresh_interval(frames)
+    dropped = sum(max(round(frame / refresh) - 1, 0) for frame in frames)
+    total_ms = sum(frames)
+    return {
+        "frames": len(frames),
+        "fps": round(len(frames) / total_ms * 1000, 1) if total_ms else None,
+        "refresh_ms": round(refresh, 2),
+        "dropped_frames": dropped,
+        "dropped_ratio": round(dropped / (len(frames) + dropped), 3),
+        "p50_frame_ms": round(percentile(frames, 50), 2),
+        "p95_frame_ms": round(percentile(frames, 95), 2),
+        "max_frame_ms": round(max(frames), 2),
+        "janky_frames": sum(1 for frame in frames if frame > JANK_FRAME_MS),
+    }
+
+
+def measure_scroll_fps(page, duration_ms: int = DEFAULT_SCROLL_DURATION_MS, selector: str = None) -> dict:
+    """Средняя частота кадров и самый долгий кадр за равномерную прокрутку"""
+    try:
+        result = page.evaluate(SCROLL_FRAMES_JS, {"duration": duration_ms, "selector": selector})
+    except Exception:
+        return {"scrollable_px": None, "frames": 0, "fps": None, "max_frame_ms": None}
+    frames = result["frames"]
+    total_ms = sum(frames)
+    return {
+        "scrollable_px": result["scrollable_px"],
+        "frames": len(frames),
+        "fps": round(len(frames) / total_ms * 1000, 1) if total_ms else None,
+        "max_frame_ms": round(max(frames), 1) if frames else None,
+    }
+
+
+def probe_scroll(page, selector: str = None, steps: int = DEFAULT_SCROLL_STEPS) -> dict:
+    """Плавные прокрутки до конца списка: кадры, пропуски, p95 и длинные задачи"""
+    try:
+        result = page.evaluate(SMOOTH_SCROLL_PROBE_JS,
+                               {"steps": steps, "stepTimeout": SCROLL_STEP_TIMEOUT_MS, "selector": selector})
+    except Exception as e:
+        return {"scrollable_px": None, "error": str(e), **summarize_frames([]),
+                "long_tasks": 0, "long_tasks_ms": 0, "longtask_supported": False}
+    longtasks = result["longtasks"]
+    return {
+        "scrollable_px": result["scrollable_px"],
+        "target": result["target"],
+        "duration_ms": round(result["duration_ms"], 1),
+        **summarize_frames(result["frames"]),
+        "long_tasks": len(longtasks),
+        "long_tasks_ms": round(sum(task["duration_ms"] for task in longtasks), 1),
+        "longest_tasks": sorted(longtasks, key=lambda task: task["duration_ms"], reverse=True)[:5],
+        "longtask_supported": result["longtask_supported"],
+    }
@@ -0,0 +1,198 @@
+"""
+Локальная замена страницы eventswidget для нагрузочных прогонов и бенчмарков
+
+Повторяет то, на что опирается EventsWidgetPage: селекторы тематики и страны,
+кнопку "Сгенерировать превью", кнопки "Очистить", таблицу событий с заголовками
+"Название события" / "Дата проведения" / "Страны проведения" и код виджета для
+вставки на сайт. События отдает JSON API с настраиваемой задержкой ответа.
+
+    python -m utils.stand_in_server --port 8000 --latency-ms 150
+    pytest tests/ --base-url http://127.0.0.1:8000
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+THEMES = ["Affiliate", "iGaming", "Crypto", "Fintech"]
+COUNTRIES = ["Россия", "Германия", "Кипр", "ОАЭ", "Таиланд"]
+
+WIDGET_PAGE_HTML = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>Генератор виджета событий</title>
+<style>
+body { font-family: sans-serif; margin: 24px; }
+.widget-settings { display: flex; gap: 12px; align-items: center; }
+.country-field { display: flex; gap: 4px; }
+.widget-preview { margin-top: 24px; }
+table { border-collapse: collapse; width: 100%; }
+td, th { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }
+textarea { width: 100%; height: 60px; margin-top: 12px; }
+</style>
+</head>
+<body>
+<h1 class="page-title">Виджет мероприятий</h1>
+<div class="widget-settings">
+  <select class="theme-select" name="theme">
+    <option value="">Выберите тематику</option>
+    {theme_options}
+  </select>
+  <div class="country-field">
+    <select class="country-select" name="country">
+      <option value="">Выберите страну</option>
+      {country_options}
+    </select>
+    <button type="button" class="clear-country">Очистить</button>
+  </div>
+  <button type="button" class="generate">Сгенерировать превью</button>
+</div>
+<div class="widget-preview">
+  <table>
+    <thead><tr><th>Название события</th><th>Дата проведения</th><th>Страны проведения</th></tr></thead>
+    <tbody class="events"></tbody>
+  </table>
+  <div class="empty-state" hidden>Нет событий</div>
+  <textarea class="widget-code" readonly></textarea>
+</div>
+<script>
+const theme = document.querySelector('.theme-select');
+const country = document.querySelector('.country-select');
+const rows = document.querySelector('.events');
+const empty = document.querySelector('.empty-state');
+const code = document.querySelector('.widget-code');
+async function generate() {
+  const query = new URLSearchParams({theme: theme.value, country: country.value});
+  const response = await fetch('api/events?' + query);
+  const events = await response.json();
+  rows.innerHTML = events.map(event =>
+    `<tr class="event-item"><td class="event-title">${event.title}</td>` +
+    `<td class="event-date">${event.date}</td><td>${event.countries.join(', ')}</td></tr>`).join('');
+  empty.hidden = events.length > 0;
+  code.value = `<iframe src="${location.origin}/eventswidget/embed?${query}" width="100%" height="420" ` +
+               `frameborder="0"></iframe>`;
+}
+document.querySelector('.generate').addEventListener('click', generate);
+document.querySelector('.clear-country').addEventListener('click', () => { country.value = ''; });
+</script>
+</body>
+</html>
+"""
+
+EMBED_HTML = """<!DOCTYPE html>
+<html lang="ru">
+<head><meta charset="utf-8"><title>События</title>
+<style>body {{ font-family: sans-serif; margin: 0; }} li {{ padding: 6px 8px; border-bottom: 1px solid #eee; }}</style>
+</head>
+<body>
+<ul class="events-widget">{items}</ul>
+</body>
+</html>
+"""
+
+
+def generate_events(theme: str = "", country: str = "", count: int = 12) -> list[dict]:
+    """Детерминированный список событий для фильтров"""
+    events = []
+    for index in range(count):
+        event_theme = theme or THEMES[index % len(THEMES)]
+        event_country = country or COUNTRIES[index % len(COUNTRIES)]
+        events.append({
+            "title": f"{event_theme} Conference {2025 + index // 12} #{index + 1}",
+            "date": f"2025-{index % 12 + 1:02d}-{index % 27 + 1:02d}",
+            "countries": [event_country],
+        })
+    return events
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: str, content_type: str, status: int = 200):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            count = int(query.get("count", self.server.events_count))
+        except ValueError:
+            count = -1
+        if count < 0:
+            self._send("count must be a non-negative integer", "text/plain", status=400)
+            return
+        if url.path in ("/eventswidget", "/eventswidget/"):
+            self._send(WIDGET_PAGE_HTML
+                       .replace("{theme_options}", "".join(f'<option value="{t}">{t}</option>' for t in THEMES))
+                       .replace("{country_options}", "".join(f'<option value="{c}">{c}</option>' for c in COUNTRIES)),
+                       "text/html")
+        elif url.path == "/eventswidget/api/events":
+            # Задержка имитирует время ответа бэкенда генератора
+            time.sleep(self.server.latency_ms / 1000)
+            events = generate_events(query.get("theme", ""), query.get("country", ""), count)
+            self._send(json.dumps(events, ensure_ascii=False), "application/json")
+        elif url.path == "/eventswidget/embed":
+            time.sleep(self.server.latency_ms / 1000)
+            events = generate_events(query.get("theme", ""), query.get("country", ""), count)
+            items = "".join(f"<li><b>{event['title']}</b> {event['date']} {', '.join(event['countries'])}</li>"
+                            for event in events)
+            self._send(EMBED_HTML.format(items=items), "text/html")
+        else:
+            self._send("Not found", "text/plain", status=404)
+
+
+class StandInServer:
+    """Сервер-заменитель в фоновом потоке"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0, events_count: int = 12):
+        self._server = ThreadingHTTPServer((host, port), _StandInHandler)
+        self._server.daemon_threads = True
+        self._server.latency_ms = latency_ms
+        self._server.events_count = events_count
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Локальная замена страницы eventswidget")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Задержка ответа API событий")
+    parser.add_argument("--events", type=int, default=12, help="Количество событий в ответе API")
+    args = parser.parse_args(argv)
+    server = StandInServer(args.host, args.port, args.latency_ms, args.events).start()
+    print(f"Страница: {server.base_url}/eventswidget/ (Ctrl+C - выход)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Статический анализ связей между тестами, методами EventsWidgetPage и вспомогательными модулями
+
+Для каждого теста определяется, какие методы объекта страницы он вызывает
+(events_page.<метод>), а для каждого метода - какие другие методы и имена из
+utils/ он использует. Помощники utils/ тоже вызывают методы страницы
+(run_memory_cycles -> events_page.click_generate_preview), поэтому зависимости
+замыкаются и через модули. По этим связям изменения в файлах отображаются на
+затронутые тесты.
+"""
+import ast
+import hashlib
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PAGE_OBJECT_FILE = PROJECT_ROOT / "pages" / "events_widget_page.py"
+PAGE_OBJECT_CLASS = "EventsWidgetPage"
+TESTS_DIR = PROJECT_ROOT / "tests"
+UTILS_DIR = PROJECT_ROOT / "utils"
+# Код модуля объекта страницы вне методов (импорты, константы, атрибуты класса)
+PAGE_MODULE_LEVEL = "<module>"
+# Изменение этих файлов затрагивает все тесты
+GLOBAL_FILES = ("conftest.py", "pytest.ini", "requirements.txt")
+GLOBAL_DIRS = ("plugins",)
+
+
+def _hash_node(source: str, node: ast.AST) -> str:
+    segment = ast.get_source_segment(source, node) or ""
+    return hashlib.sha1(segment.encode("utf-8")).hexdigest()
+
+
+def _imported_names(tree: ast.Module) -> dict:
+    """Имена, импортированные из модулей проекта: имя -> относительный путь модуля"""
+    names = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module and node.module.split(".")[0] in ("utils", "pages"):
+            module_path = node.module.replace(".", "/") + ".py"
+            for alias in node.names:
+                names[alias.asname or alias.name] = module_path
+    return names
+
+
+def _referenced_names(node: ast.AST) -> set[str]:
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+
+def _attribute_calls(node: ast.AST, owner: str) -> set[str]:
+    """Атрибуты, к которым функция обращается через owner (self.x, events_page.x)"""
+    return {
+        child.attr for child in ast.walk(node)
+        if isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name) and child.value.id == owner
+    }
+
+
+def analyze_page_object(path: Path = PAGE_OBJECT_FILE) -> dict:
+    """Методы объекта страницы: хэш исходника, вызываемые методы, используемые модули"""
+    source = path.read_text(encoding="utf-8")
+    tree = ast.parse(source)
+    imported = _imported_names(tree)
+    methods = {}
+    module_level = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == PAGE_OBJECT_CLASS:
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef):
+                    methods[item.name] = {
+                        "hash": _hash_node(source, item),
+                        "calls": _attribute_calls(item, "self"),
+                        "modules": {imported[name] for name in _referenced_names(item) if name in imported},
+                    }
+                else:
+                    module_level.append(item)
+        else:
+            module_level.append(node)
+    methods[PAGE_MODULE_LEVEL] = {
+        "hash": hashlib.sha1("".join(_hash_node(source, node) for node in module_level).encode()).hexdigest(),
+        "calls": set(),
+        "modules": set(imported.values()),
+    }
+    return methods
+
+
+def analyze_utils(utils_dir: Path = UTILS_DIR) -> dict:
+    """Модули utils/: импортируемые модули проекта и методы страницы, вызываемые через events_page"""
+    modules = {}
+    for path in sorted(utils_dir.glob("*.py")):
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        modules[path.relative_to(PROJECT_ROOT).as_posix()] = {
+            "imports": set(_imported_names(tree).values()),
+            "page_methods": _attribute_calls(tree, "events_page"),
+        }
+    return modules
+
+
+def analyze_tests(tests_dir: Path = TESTS_DIR) -> dict:
+    """Тесты: node id -> хэш исходника, вызываемые методы страницы, используемые модули"""
+    tests = {}
+    for path in sorted(tests_dir.glob("test_*.py")):
+        source = path.read_text(encoding="utf-8")
+        tree = ast.parse(source)
+        imported = _imported_names(tree)
+        relative = path.relative_to(PROJECT_ROOT).as_posix()
+        # Фикстуры и помощники модуля учитываются в хэше каждого теста файла
+        module_level = [node for node in tree.body if not isinstance(node, ast.ClassDef)
+                        and not (isinstance(node, ast.FunctionDef) and node.name.startswith("test_"))]
+        module_hash = hashlib.sha1("".join(_hash_node(source, node) for node in module_level).encode()).hexdigest()
+
+        def add_test(node, prefix):
+            tests[f"{relative}::{prefix}{node.name}"] = {
+                "hash": _hash_node(source, node),
+                "module_hash": module_hash,
+                "page_methods": _attribute_calls(node, "events_page"),
+                "fixtures": _argument_names(node),
+                "modules": {imported[name] for name in _referenced_names(node) if name in imported},
+            }
+
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+                add_test(node, "")
+            elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef) and item.name.startswith("test_"):
+                        add_test(item, f"{node.name}::")
+    return tests
+
+
+def expand_page_methods(methods: dict, names: set[str]) -> set[str]:
+    """Замыкание по вызовам: методы страницы, от которых транзитивно зависят names"""
+    result = set()
+    stack = [name for name in names if name in methods]
+    while stack:
+        name = stack.pop()
+        if name in result:
+            continue
+        result.add(name)
+        stack.extend(call for call in methods[name]["calls"] if call in methods and call not in result)
+    return result
+
+
+def collect_dependencies(test: dict, methods: dict, fixtures: dict, utils: dict = None) -> dict:
+    """Полный набор зависимостей теста: методы страницы и модули проекта (через фикстуры и помощники utils/)"""
+    if utils is None:
+        utils = analyze_utils()
+    page_methods = set()
+    modules = set()
+    pending_methods = set(test["page_methods"])
+    pending_modules = set(test["modules"]) | expand_fixture_modules(fixtures, test["fixtures"])
+    while pending_methods or pending_modules:
+        new_methods = expand_page_methods(methods, pending_methods) - page_methods
+        page_methods |= new_methods
+        for name in new_methods:
+            pending_modules |= methods[name]["modules"]
+        new_modules = pending_modules - modules
+        modules |= new_modules
+        pending_methods = set()
+        pending_modules = set()
+        for module in new_modules:
+            info = utils.get(module)
+            if info is not None:
+                pending_methods |= info["page_methods"] - page_methods
+                pending_modules |= info["imports"] - modules
+    return {"page_methods": page_methods, "modules": modules}
+
+
+def expand_changed_modules(changed: set[str]) -> set[str]:
+    """Замыкание по импортам внутри utils/: модуль затронут, если он импортирует измененный"""
+    imports = {}
+    for path in UTILS_DIR.glob("*.py"):
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        imports[path.relative_to(PROJECT_ROOT).as_posix()] = set(_imported_names(tree).values())
+    result = set(changed)
+    grew = True
+    while grew:
+        grew = False
+        for module, dependencies in imports.items():
+            if module not in result and dependencies & result:
+                result.add(module)
+                grew = True
+    return result
+
+
+def _is_fixture(node: ast.FunctionDef) -> bool:
+    for decorator in node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute) and target.attr == "fixture":
+            return True
+    return False
+
+
+def _argument_names(node: ast.FunctionDef) -> set[str]:
+    return {arg.arg for arg in node.args.args if arg.arg != "self"}
+
+
+def analyze_fixtures(paths: list[Path] = None) -> dict:
+    """Фикстуры conftest.py и тестовых модулей: запрашиваемые фикстуры и используемые модули"""
+    if paths is None:
+        paths = [PROJECT_ROOT / "conftest.py", *sorted(TESTS_DIR.glob("test_*.py"))]
+    fixtures = {}
+    for path in paths:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        imported = _imported_names(tree)
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and _is_fixture(node):
+                fixtures[node.name] = {
+                    "args": _argument_names(node),
+                    "modules": {imported[name] for name in _referenced_names(node) if name in imported},
+                }
+    return fixtures
+
+
+def expand_fixture_modules(fixtures: dict, names: set[str]) -> set[str]:
+    """Модули проекта, которыми транзитивно пользуются запрошенные фикстуры"""
+    modules = set()
+    seen = set()
+    stack = [name for name in names if name in fixtures]
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        modules |= fixtures[name]["modules"]
+        stack.extend(arg for arg in fixtures[name]["args"] if arg in fixtures)
+    return modules
+
+
+class ImpactSnapshot:
+    """Снимок хэшей тестов и методов страницы для сравнения до/после изменения"""
+
+    def __init__(self):
+        self.methods = analyze_page_object()
+        self.tests = analyze_tests()
+        self.fixtures = analyze_fixtures()
+        self.utils = analyze_utils()
+
+    def affected_tests(self, previous: "ImpactSnapshot", changed_files: list[str]) -> list[str] | None:
+        """Node id затронутых тестов; None означает, что нужно запустить все тесты"""
+        changed_files = [Path(path).as_posix() for path in changed_files]
+        if any(path in GLOBAL_FILES or path.split("/")[0] in GLOBAL_DIRS for path in changed_files):
+            return None
+
+        changed_methods = {
+            name for name, method in self.methods.items()
+            if name not in previous.methods or previous.methods[name]["hash"] != method["hash"]
+        }
+        # Изменение __init__ меняет локаторы, которыми пользуются все методы, а код модуля - весь класс
+        if changed_methods & {"__init__", PAGE_MODULE_LEVEL}:
+            changed_methods = set(self.methods)
+        changed_modules = expand_changed_modules({path for path in changed_files if path.startswith("utils/")})
+
+        affected = []
+        for nodeid, test in self.tests.items():
+            old = previous.tests.get(nodeid)
+            if old is None or old["hash"] != test["hash"] or old["module_hash"] != test["module_hash"]:
+                affected.append(nodeid)
+                continue
+            dependencies = collect_dependencies(test, self.methods, self.fixtures, self.utils)
+            if dependencies["page_methods"] & changed_methods or dependencies["modules"] & changed_modules:
+                affected.append(nodeid)
+        return affected
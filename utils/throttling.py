@@ -0,0 +1,67 @@
+"""
+Профили замедления сети и CPU для замеров загрузки страницы
+
+В Chromium профиль применяется через CDP, в остальных браузерах сеть
+замедляется локальным прокси, а замедление CPU недоступно.
+"""
+from utils.throttling_proxy import ThrottlingProxy
+
+# Значения соответствуют пресетам DevTools; пропускная способность в байтах в секунду
+THROTTLING_PROFILES = {
+    "slow-3g": {
+        "latency_ms": 2000,
+        "download_bps": 50 * 1024,
+        "upload_bps": 50 * 1024,
+        "cpu_rate": 1,
+        "load_budget_s": 90,
+    },
+    "fast-4g": {
+        "latency_ms": 165,
+        "download_bps": 9 * 1024 * 1024 / 8,
+        "upload_bps": 1.5 * 1024 * 1024 / 8,
+        "cpu_rate": 1,
+        "load_budget_s": 30,
+    },
+    "cpu-4x": {
+        "latency_ms": 0,
+        "download_bps": 0,
+        "upload_bps": 0,
+        "cpu_rate": 4,
+        "load_budget_s": 45,
+    },
+}
+
+
+def get_profile(name: str) -> dict:
+    """Профиль замедления по имени"""
+    if name not in THROTTLING_PROFILES:
+        raise ValueError(f"Неизвестный профиль замедления '{name}', доступны: {', '.join(THROTTLING_PROFILES)}")
+    return {"name": name, **THROTTLING_PROFILES[name]}
+
+
+def throttles_network(profile: dict) -> bool:
+    return bool(profile["latency_ms"] or profile["download_bps"] or profile["upload_bps"])
+
+
+def start_proxy(profile: dict) -> ThrottlingProxy | None:
+    """Прокси для браузеров без CDP; None, если профиль не замедляет сеть"""
+    if not throttles_network(profile):
+        return None
+    return ThrottlingProxy(profile["latency_ms"], profile["download_bps"], profile["upload_bps"]).start()
+
+
+def apply_cdp_throttling(page, profile: dict):
+    """Применение профиля через CDP; сессию нужно держать открытой, пока идет замер"""
+    cdp = page.context.new_cdp_session(page)
+    if throttles_network(profile):
+        cdp.send("Network.enable")
+        cdp.send("Network.emulateNetworkConditions", {
+            "offline": False,
+            "latency": profile["latency_ms"],
+            # -1 означает отсутствие ограничения
+            "downloadThroughput": profile["download_bps"] or -1,
+            "uploadThroughput": profile["upload_bps"] or -1,
+        })
+    if profile["cpu_rate"] > 1:
+        cdp.send("Emulation.setCPUThrottlingRate", {"rate": profile["cpu_rate"]})
+    return cdp
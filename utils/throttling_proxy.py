@@ -0,0 +1,158 @@
+"""
+Локальный HTTP(S)-прокси с ограничением пропускной способности и задержкой
+
+Используется для эмуляции медленной сети в браузерах без CDP (Firefox, WebKit).
+HTTPS проходит через CONNECT-туннель без расшифровки, поэтому задержка
+добавляется на каждую смену направления передачи (запрос -> ответ).
+"""
+import socket
+import socketserver
+import threading
+import time
+
+CHUNK_SIZE = 16 * 1024
+
+
+class RateLimiter:
+    """Общий для всех соединений лимит пропускной способности (token bucket)"""
+
+    def __init__(self, bytes_per_second: float):
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def consume(self, size: int):
+        if not self.bytes_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + size / self.bytes_per_second
+            delay = self._next_free - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _ProxyHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        server = self.server
+        client = self.request
+        try:
+            head = self._read_head(client)
+            if not head:
+                return
+            request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+            method, target, _ = request_line.split(" ", 2)
+            if method.upper() == "CONNECT":
+                host, _, port = target.rpartition(":")
+                upstream = socket.create_connection((host, int(port or 443)), timeout=30)
+                time.sleep(server.latency_s)
+                client.sendall(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            else:
+                host, port = self._parse_http_target(target, head)
+                upstream = socket.create_connection((host, port), timeout=30)
+                time.sleep(server.latency_s)
+                head = self._to_origin_form(head, target)
+                server.upload.consume(len(head))
+                upstream.sendall(head)
+        except Exception:
+            return
+        self._tunnel(client, upstream)
+
+    @staticmethod
+    def _read_head(sock) -> bytes:
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = sock.recv(CHUNK_SIZE)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    @staticmethod
+    def _parse_http_target(target: str, head: bytes) -> tuple[str, int]:
+        hostport = ""
+        if "://" in target:
+            hostport = target.split("://", 1)[1].split("/", 1)[0]
+        else:
+            for line in head.split(b"\r\n")[1:]:
+                if line.lower().startswith(b"host:"):
+                    hostport = line.split(b":", 1)[1].strip().decode("latin-1")
+                    break
+        host, _, port = hostport.partition(":")
+        return host, int(port or 80)
+
+    @staticmethod
+    def _to_origin_form(head: bytes, target: str) -> bytes:
+        """GET http://host/path -> GET /path: не все серверы принимают абсолютный URI"""
+        if "://" not in target:
+            return head
+        path = "/" + target.split("://", 1)[1].partition("/")[2]
+        return head.replace(target.encode("latin-1"), path.encode("latin-1"), 1)
+
+    def _tunnel(self, client, upstream):
+        server = self.server
+        # Признак "клиент отправил запрос, ответ еще не начался" для эмуляции задержки
+        state = {"awaiting_response": True}
+
+        def pipe(source, destination, limiter, upstream_to_client):
+            try:
+                while True:
+                    chunk = source.recv(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if upstream_to_client and state["awaiting_response"]:
+                        state["awaiting_response"] = False
+                        time.sleep(server.latency_s)
+                    elif not upstream_to_client:
+                        state["awaiting_response"] = True
+                    limiter.consume(len(chunk))
+                    destination.sendall(chunk)
+            except OSError:
+                pass
+            finally:
+                for sock in (source, destination):
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+
+        upload = threading.Thread(target=pipe, args=(client, upstream, server.upload, False), daemon=True)
+        upload.start()
+        pipe(upstream, client, server.download, True)
+        upload.join(timeout=5)
+        upstream.close()
+
+
+class _ThreadingProxyServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ThrottlingProxy:
+    """Прокси на 127.0.0.1 со свободным портом, работающий в фоновом потоке"""
+
+    def __init__(self, latency_ms: float, download_bps: float, upload_bps: float):
+        self._server = _ThreadingProxyServer(("127.0.0.1", 0), _ProxyHandler)
+        # Задержка распределяется на запрос и ответ, в сумме - один RTT
+        self._server.latency_s = latency_ms / 1000 / 2
+        self._server.download = RateLimiter(download_bps)
+        self._server.upload = RateLimiter(upload_bps)
+        self._thread = None
+
+    @property
+    def server_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ThrottlingProxy":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="throttling-proxy", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
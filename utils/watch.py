@@ -0,0 +1,128 @@
+"""
+Режим наблюдения: перезапуск только затронутых тестов при сохранении файлов
+
+    python -m utils.watch                      # Chromium
+    python -m utils.watch --browser firefox    # другой движок
+    python -m utils.watch -- -k preview        # дополнительные аргументы pytest
+
+Серверы браузеров (utils.browser_server) держатся запущенными, а pytest
+запускается с --reuse-browser-server, поэтому каждый перезапуск подключается к уже
+работающему браузеру вместо запуска нового. Какие тесты запускать, определяет
+utils.test_impact.
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+from utils.browser_server import BrowserServerLease, ensure_server
+from utils.test_impact import PROJECT_ROOT, ImpactSnapshot
+
+WATCHED_DIRS = ("pages", "tests", "utils", "plugins")
+WATCHED_FILES = ("conftest.py", "pytest.ini")
+
+
+def _scan() -> dict:
+    """Время изменения всех отслеживаемых файлов"""
+    mtimes = {}
+    for name in WATCHED_FILES:
+        path = PROJECT_ROOT / name
+        if path.exists():
+            mtimes[name] = path.stat().st_mtime
+    for directory in WATCHED_DIRS:
+        for path in (PROJECT_ROOT / directory).rglob("*.py"):
+            mtimes[path.relative_to(PROJECT_ROOT).as_posix()] = path.stat().st_mtime
+    return mtimes
+
+
+class WarmBrowsers:
+    """Запущенные серверы браузеров, к которым подключается pytest (--reuse-browser-server)"""
+
+    def __init__(self, browsers: list[str], headless: bool):
+        self.browsers = browsers
+        self.headless = headless
+        self._leases = []
+
+    def start(self):
+        for browser_name in self.browsers:
+            # Те же параметры, что у connect_options в conftest.py: pytest получит этот же сервер
+            ws_endpoint = ensure_server(browser_name, headless=self.headless)
+            # Аренда не дает серверу завершиться по простою между перезапусками
+            self._leases.append(BrowserServerLease(browser_name).acquire())
+            print(f"[watch] {browser_name}: браузер готов ({ws_endpoint})")
+
+    def stop(self):
+        for lease in self._leases:
+            lease.release()
+
+
+def run_pytest(nodeids: list[str] | None, browsers: list[str], headed: bool, extra_args: list[str]) -> int:
+    """Запуск pytest в отдельном процессе с подключением к прогретым браузерам"""
+    command = [sys.executable, "-m", "pytest", "-o", "addopts=", "-v", "--tb=short", "--strict-markers",
+               "--reuse-browser-server", "--no-schedule"]
+    for browser_name in browsers:
+        command += ["--browser", browser_name]
+    if headed:
+        command.append("--headed")
+    command += nodeids if nodeids is not None else ["tests/"]
+    command += extra_args
+    started = time.monotonic()
+    result = subprocess.run(command, cwd=PROJECT_ROOT)
+    print(f"[watch] pytest завершен за {time.monotonic() - started:.1f} с, код {result.returncode}")
+    return result.returncode
+
+
+def watch(browsers: list[str], headed: bool, interval: float, extra_args: list[str]):
+    warm = WarmBrowsers(browsers, headless=not headed)
+    warm.start()
+    snapshot = ImpactSnapshot()
+    mtimes = _scan()
+    print(f"[watch] отслеживаются {len(mtimes)} файлов, Ctrl+C - выход")
+    try:
+        while True:
+            time.sleep(interval)
+            current = _scan()
+            changed = sorted(path for path in current.keys() | mtimes.keys() if current.get(path) != mtimes.get(path))
+            if not changed:
+                continue
+            # Даем редактору дописать файл, прежде чем разбирать его
+            time.sleep(0.2)
+            mtimes = _scan()
+            try:
+                new_snapshot = ImpactSnapshot()
+            except SyntaxError as e:
+                print(f"[watch] синтаксическая ошибка, ждем исправления: {e}")
+                continue
+            affected = new_snapshot.affected_tests(snapshot, changed)
+            snapshot = new_snapshot
+            print(f"[watch] изменены: {', '.join(changed)}")
+            if affected is None:
+                print("[watch] изменение влияет на все тесты")
+            elif not affected:
+                print("[watch] затронутых тестов нет")
+                continue
+            else:
+                print(f"[watch] затронуто тестов: {len(affected)}")
+            run_pytest(affected, browsers, headed, extra_args)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        warm.stop()
+
+
+def main(argv: list[str] = None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    extra_args = []
+    if "--" in argv:
+        index = argv.index("--")
+        argv, extra_args = argv[:index], argv[index + 1:]
+    parser = argparse.ArgumentParser(description="Перезапуск затронутых тестов при изменении файлов")
+    parser.add_argument("--browser", action="append", choices=["chromium", "firefox", "webkit"], default=None)
+    parser.add_argument("--headed", action="store_true", default=False)
+    parser.add_argument("--interval", type=float, default=0.5, help="Период опроса файлов, секунды")
+    args = parser.parse_args(argv)
+    watch(args.browser or ["chromium"], args.headed, args.interval, extra_args)
+
+
+if __name__ == "__main__":
+    main()
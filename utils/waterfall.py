@@ -0,0 +1,158 @@
+"""
+Водопад загрузки и критический путь до первой отрисовки (FCP) и первой отрисовки виджета
+
+Вход - результат RequestCapture.stop(): запросы со временем от начала навигации
+и отметки fcp_ms / widget_render_ms. Критический путь строится от ресурса,
+завершившегося последним перед отметкой, по цепочке инициаторов к документу.
+"""
+import html
+
+PHASE_COLORS = {
+    "dns": "#7fb3d5",
+    "connect": "#f5b041",
+    "tls": "#af7ac5",
+    "ttfb": "#52be80",
+    "download": "#5d6d7e",
+}
+# Типы ресурсов, от которых может зависеть отрисовка виджета
+WIDGET_RESOURCE_TYPES = ("document", "script", "stylesheet", "xhr", "fetch", "font")
+TOP_DELAYING = 10
+
+
+def _finished(entry: dict) -> bool:
+    return entry.get("end_ms") is not None and not entry.get("failure")
+
+
+def initiator_chain(entry: dict, by_url: dict) -> list[dict]:
+    """Цепочка инициаторов от документа до ресурса (включительно)"""
+    chain = [entry]
+    seen = {entry["url"]}
+    while True:
+        parent = by_url.get(chain[-1].get("initiator_url"))
+        if parent is None or parent["url"] in seen:
+            break
+        chain.append(parent)
+        seen.add(parent["url"])
+    return list(reversed(chain))
+
+
+def critical_path(requests: list[dict], target_ms: float | None, predicate) -> list[dict]:
+    """Критический путь к отметке: цепочка инициаторов ресурса, завершившегося последним до нее"""
+    if target_ms is None:
+        return []
+    candidates = [entry for entry in requests
+                  if _finished(entry) and entry["end_ms"] <= target_ms and predicate(entry)]
+    if not candidates:
+        return []
+    by_url = {entry["url"]: entry for entry in requests}
+    last = max(candidates, key=lambda entry: entry["end_ms"])
+    return initiator_chain(last, by_url)
+
+
+def rank_delaying_resources(requests: list[dict], target_ms: float | None, path: list[dict],
+                            limit: int = TOP_DELAYING) -> list[dict]:
+    """Ресурсы, задерживающие отметку: сначала критический путь, затем по времени загрузки до отметки"""
+    if target_ms is None:
+        return []
+    on_path = {entry["url"] for entry in path}
+    ranked = []
+    for entry in requests:
+        if not _finished(entry) or entry["resource_type"] not in WIDGET_RESOURCE_TYPES:
+            continue
+        if entry["start_ms"] >= target_ms:
+            continue
+        ranked.append({
+            "url": entry["url"],
+            "resource_type": entry["resource_type"],
+            "delay_ms": round(min(entry["end_ms"], target_ms) - entry["start_ms"], 2),
+            "on_critical_path": entry["url"] in on_path,
+            "render_blocking": entry["render_blocking"],
+            "phases": entry["phases"],
+        })
+    ranked.sort(key=lambda item: (item["on_critical_path"], item["render_blocking"], item["delay_ms"]), reverse=True)
+    return ranked[:limit]
+
+
+def _path_summary(path: list[dict]) -> list[dict]:
+    return [{"url": entry["url"], "resource_type": entry["resource_type"],
+             "start_ms": entry["start_ms"], "end_ms": entry["end_ms"]} for entry in path]
+
+
+def analyze_waterfall(capture: dict) -> dict:
+    """Критические пути к FCP и к отрисовке виджета и ранжированный список задерживающих ресурсов"""
+    requests = capture.get("requests", [])
+    marks = capture.get("marks", {})
+    fcp_path = critical_path(requests, marks.get("fcp_ms"), lambda entry: entry["render_blocking"])
+    widget_path = critical_path(requests, marks.get("widget_render_ms"),
+                                lambda entry: entry["resource_type"] in WIDGET_RESOURCE_TYPES)
+    return {
+        "requests": len(requests),
+        "failed": sum(1 for entry in requests if entry.get("failure")),
+        "fcp_ms": marks.get("fcp_ms"),
+        "widget_render_ms": marks.get("widget_render_ms"),
+        "critical_path_fcp": _path_summary(fcp_path),
+        "critical_path_widget": _path_summary(widget_path),
+        "delaying_widget": rank_delaying_resources(requests, marks.get("widget_render_ms"), widget_path),
+    }
+
+
+def render_waterfall_html(capture: dict, analysis: dict) -> str:
+    """HTML-водопад: строка на запрос, цветные отрезки фаз, вертикальные линии FCP и отрисовки виджета"""
+    requests = capture.get("requests", [])
+    marks = capture.get("marks", {})
+    ends = [entry["end_ms"] for entry in requests if entry.get("end_ms") is not None]
+    ends += [value for value in (marks.get("fcp_ms"), marks.get("widget_render_ms")) if value is not None]
+    total = max(ends, default=1) or 1
+    critical = {item["url"] for item in analysis["critical_path_fcp"] + analysis["critical_path_widget"]}
+
+    def percent(value):
+        return f"{max(value, 0) / total * 100:.3f}%"
+
+    rows = []
+    for entry in requests:
+        end_ms = entry["end_ms"] if entry.get("end_ms") is not None else entry["start_ms"]
+        segments = []
+        offset = entry["start_ms"]
+        for phase, color in PHASE_COLORS.items():
+            duration = entry["phases"].get(phase)
+            if duration:
+                segments.append(f'<div class="seg" style="left:{percent(offset)};width:{percent(duration)};'
+                                f'background:{color}" title="{phase}: {duration} мс"></div>')
+                offset += duration
+        if not segments:
+            segments.append(f'<div class="seg" style="left:{percent(entry["start_ms"])};'
+                            f'width:{percent(end_ms - entry["start_ms"])};background:#aaa"></div>')
+        flags = "".join([
+            " ⛔" if entry["render_blocking"] else "",
+            " ★" if entry["url"] in critical else "",
+            " ✗" if entry.get("failure") else "",
+        ])
+        url = html.escape(entry["url"])
+        rows.append(
+            f'<tr><td class="url" title="{url}">{url[-70:]}{flags}</td><td>{entry["resource_type"]}</td>'
+            f'<td>{entry.get("status") or ""}</td><td class="bar">{"".join(segments)}</td></tr>'
+        )
+
+    lines = []
+    for name, color in (("fcp_ms", "#e74c3c"), ("widget_render_ms", "#2e86c1")):
+        if marks.get(name) is not None:
+            lines.append(f'<div class="mark" style="left:{percent(marks[name])};border-color:{color}" '
+                         f'title="{name}: {marks[name]:.0f} мс"></div>')
+    legend = " ".join(f'<span style="background:{color}">&nbsp;{phase}&nbsp;</span>'
+                      for phase, color in PHASE_COLORS.items())
+    return f"""<html><head><meta charset="utf-8"><style>
+body {{font-family: sans-serif; font-size: 12px}}
+table {{border-collapse: collapse; width: 100%}}
+td {{padding: 1px 4px; white-space: nowrap}}
+td.url {{max-width: 480px; overflow: hidden}}
+td.bar {{position: relative; width: 60%}}
+.seg {{position: absolute; top: 3px; height: 10px}}
+.marks {{position: relative; height: 0}}
+.mark {{position: absolute; top: 0; height: {len(rows) * 18 + 20}px; border-left: 2px dashed}}
+</style></head><body>
+<p>Запросов: {len(requests)}, FCP: {marks.get("fcp_ms")} мс (красная линия),
+отрисовка виджета: {marks.get("widget_render_ms")} мс (синяя линия). {legend}</p>
+<p>⛔ блокирует отрисовку, ★ на критическом пути, ✗ ошибка</p>
+<table><tr><th>URL</th><th>тип</th><th>статус</th><th><div class="marks">{"".join(lines)}</div>0 - {total:.0f} мс</th></tr>
+{"".join(rows)}
+</table></body></html>"""